@@ -0,0 +1,511 @@
+"""
+NourishBox Analysis Backends
+Run the seasonality, cohort and MRR analyses in pandas or in DuckDB SQL
+
+Both backends return the same result frames:
+
+    pandas  tables are loaded into memory (nourishbox.py) and reduced by
+            cohort_engine.py and mrr_engine.py
+    duckdb  each analysis is a few SQL queries that DuckDB runs straight over
+            the CSV (or Parquet) files; only the aggregates come back to Python
+
+The DuckDB backend reads data/nourishbox/<table>.parquet when it exists and
+<table>.csv otherwise, typed from table_schemas.py. Every table is a view
+over its file, so a query only scans the columns it uses and pushes its
+filters into the scan; scans run on all cores, and joins and aggregations
+that outgrow memory_limit spill to data/nourishbox/.cache/duckdb_spill/.
+Datasets larger than RAM therefore work with a bounded memory footprint.
+
+Results:
+    seasonality()        dict of per-month Series and New Year churn counts
+                         (analyze_seasonality.py)
+    cohort_matrices()    cohort_engine.CohortMatrices (cohort_analysis.py)
+    monthly_mrr()        mrr_engine.monthly_mrr frame (visualize_mrr.py)
+    mrr_movements()      mrr_engine.mrr_movements frame (customer level)
+
+Prerequisites (duckdb backend):
+    pip install duckdb
+
+Usage:
+    from analysis_backends import get_backend
+    backend = get_backend('duckdb', memory_limit='2GB')
+    mrr_df = backend.monthly_mrr()
+
+    python src/analysis_backends.py                          # compare both backends
+    python src/analysis_backends.py --memory-limit 512MB --threads 4
+    python src/cohort_analysis.py --backend duckdb
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cohort_engine import NEW_YEAR_LABELS, build_matrices, cohort_keys, cohort_matrices, period_labels
+from mrr_engine import ACTIVE_STATUSES, REALIZED_STATUSES, month_starts, monthly_mrr, mrr_frame, mrr_movements
+from nourishbox import CACHE_DIRNAME, load
+from table_schemas import DATA_DIR, MONTH_NAMES, TABLE_SCHEMAS, table_columns
+
+BACKENDS = ('pandas', 'duckdb')
+
+# Cohort offset 0: the signup date, or each customer's first order
+ANCHORS = ('signup', 'first_order')
+
+# Churns this soon after signup count as quick churns
+QUICK_CHURN_DAYS = 90
+
+SPILL_DIRNAME = 'duckdb_spill'
+
+
+def _by_month_name(series):
+    """Series indexed by month name, in calendar order"""
+    return series.reindex(MONTH_NAMES).rename_axis('month_name').rename(None)
+
+
+class PandasBackend:
+    """Analyses over in-memory tables"""
+
+    name = 'pandas'
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+
+    def load(self, table_name, columns=None):
+        return load(table_name, columns=columns, data_dir=self.data_dir)
+
+    def row_count(self, table_name):
+        return len(self.load(table_name))
+
+    def seasonality(self):
+        customers = self.load('customers', ['customer_id', 'registration_date', 'is_new_year_signup'])
+        orders = self.load('orders', ['order_date', 'order_total'])
+        churn_events = self.load('churn_events', ['customer_id', 'churn_date', 'subscription_length_days'])
+
+        signup_months = customers['registration_date'].dt.month_name()
+        order_months = orders['order_date'].dt.month_name()
+        signups_over_time = customers.groupby(customers['registration_date'].dt.to_period('M')).size()
+        signups_over_time.index = signups_over_time.index.to_timestamp().rename('month')
+
+        new_year = customers.loc[customers['is_new_year_signup'] == True, 'customer_id']
+        other = customers.loc[customers['is_new_year_signup'] == False, 'customer_id']
+        new_year_churns = churn_events[churn_events['customer_id'].isin(new_year)]
+        other_churns = churn_events[churn_events['customer_id'].isin(other)]
+
+        return {
+            'customers': len(customers),
+            'orders': len(orders),
+            'churns': len(churn_events),
+            'first_signup': customers['registration_date'].min(),
+            'last_signup': customers['registration_date'].max(),
+            'signups_by_month': _by_month_name(customers.groupby(signup_months).size()),
+            'orders_by_month': _by_month_name(orders.groupby(order_months).size()),
+            'revenue_by_month': _by_month_name(orders.groupby(order_months)['order_total'].sum()),
+            'churns_by_month': _by_month_name(
+                churn_events.groupby(churn_events['churn_date'].dt.month_name()).size()),
+            'signups_over_time': signups_over_time,
+            'new_year_customers': len(new_year),
+            'new_year_churns': len(new_year_churns),
+            'new_year_quick_churns': int((new_year_churns['subscription_length_days'] <= QUICK_CHURN_DAYS).sum()),
+            'other_customers': len(other),
+            'other_churns': len(other_churns),
+        }
+
+    def cohort_matrices(self, by='signup', anchor='signup', granularity='month', size='first_period'):
+        """cohort_engine.cohort_matrices() for a cohort_keys() key"""
+        if anchor not in ANCHORS:
+            raise ValueError(f"anchor must be one of {ANCHORS}, not {anchor!r}")
+        customers = self.load('customers')
+        subscriptions = self.load('subscriptions') if by == 'plan' else None
+        keys = cohort_keys(customers, by, granularity, subscriptions)
+        anchor_dates = customers.set_index('customer_id')['registration_date'] if anchor == 'signup' else None
+        return cohort_matrices(self.load('orders', ['customer_id', 'order_date', 'order_total']), keys,
+                               anchor_dates=anchor_dates, granularity=granularity, size=size)
+
+    def monthly_mrr(self):
+        return monthly_mrr(self.load('subscription_monthly'), self.load('orders'))
+
+    def mrr_movements(self):
+        return mrr_movements(self.load('subscription_monthly'))
+
+
+def _sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_list(values):
+    return ', '.join(_sql_string(value) for value in values)
+
+
+def _period_sql(column, granularity):
+    """SQL for cohort_engine.period_index(): periods since 1970 as BIGINT"""
+    if granularity == 'week':
+        # 1969-12-29 is the Monday that starts week 0
+        return f"CAST(floor(date_diff('day', DATE '1969-12-29', {column}) / 7) AS BIGINT)"
+    months = f"((year({column}) - 1970) * 12 + month({column}) - 1)"
+    if granularity == 'month':
+        return f"CAST({months} AS BIGINT)"
+    if granularity == 'quarter':
+        return f"CAST(floor({months} / 3) AS BIGINT)"
+    raise ValueError(f"unknown granularity {granularity!r}")
+
+
+class DuckDBBackend:
+    """Analyses as SQL over the CSV/Parquet files"""
+
+    name = 'duckdb'
+
+    def __init__(self, data_dir=DATA_DIR, memory_limit=None, threads=None, spill_dir=None):
+        import duckdb  # Optional dependency
+        self.data_dir = data_dir
+        self.spill_dir = spill_dir or os.path.join(data_dir, CACHE_DIRNAME, SPILL_DIRNAME)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        config = {'temp_directory': self.spill_dir}
+        if memory_limit:
+            config['memory_limit'] = memory_limit
+        if threads:
+            config['threads'] = int(threads)
+        self.db = duckdb.connect(':memory:', config=config)
+        self.sources = {}
+        for table_name in TABLE_SCHEMAS:
+            source = self.source_sql(table_name)
+            if source is not None:
+                self.db.execute(f'CREATE VIEW "{table_name}" AS SELECT * FROM {source}')
+                self.sources[table_name] = source
+
+    def source_sql(self, table_name):
+        """read_parquet(...) or typed read_csv(...) for a table; None if it has no file"""
+        parquet_path = os.path.join(self.data_dir, f'{table_name}.parquet')
+        if os.path.exists(parquet_path):
+            return f"read_parquet({_sql_string(parquet_path)})"
+        csv_path = os.path.join(self.data_dir, f'{table_name}.csv')
+        if not os.path.exists(csv_path):
+            return None
+        with open(csv_path, newline='') as f:
+            header = next(csv.reader(f), [])
+        types_sql = ', '.join(f"{_sql_string(col)}: {_sql_string(sql_type)}"
+                              for col, sql_type in table_columns(table_name, header).items())
+        return (f"read_csv({_sql_string(csv_path)}, header = true, "
+                f"columns = {{{types_sql}}}, dateformat = '%Y-%m-%d')")
+
+    def query(self, sql):
+        return self.db.execute(sql).df()
+
+    def row_count(self, table_name):
+        return self.db.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+
+    def seasonality(self):
+        def by_month_name(sql):
+            result = self.query(sql).dropna(subset=['month_name'])
+            return _by_month_name(result.set_index('month_name')['value'])
+
+        overview = self.query("""
+            SELECT COUNT(*) AS customers,
+                   MIN(registration_date) AS first_signup,
+                   MAX(registration_date) AS last_signup
+            FROM customers
+        """).iloc[0]
+        new_year = self.query(f"""
+            WITH signups AS (
+                SELECT is_new_year_signup AS new_year, COUNT(*) AS customers
+                FROM customers
+                WHERE is_new_year_signup IS NOT NULL
+                GROUP BY 1
+            ),
+            churns AS (
+                SELECT c.is_new_year_signup AS new_year,
+                       COUNT(*) AS churns,
+                       COUNT(CASE WHEN e.subscription_length_days <= {QUICK_CHURN_DAYS} THEN 1 END)
+                           AS quick_churns
+                FROM churn_events e
+                JOIN customers c ON c.customer_id = e.customer_id
+                WHERE c.is_new_year_signup IS NOT NULL
+                GROUP BY 1
+            )
+            SELECT s.new_year, s.customers,
+                   COALESCE(ch.churns, 0) AS churns,
+                   COALESCE(ch.quick_churns, 0) AS quick_churns
+            FROM signups s
+            LEFT JOIN churns ch ON ch.new_year = s.new_year
+        """).set_index('new_year')
+        group = lambda flag, col: int(new_year[col].get(flag, 0))
+
+        signups_over_time = self.query("""
+            SELECT CAST(date_trunc('month', registration_date) AS TIMESTAMP) AS month, COUNT(*) AS value
+            FROM customers
+            WHERE registration_date IS NOT NULL
+            GROUP BY 1
+            ORDER BY 1
+        """).set_index('month')['value'].rename(None)
+        signups_over_time.index = signups_over_time.index.astype('datetime64[ns]')
+
+        return {
+            'customers': int(overview['customers']),
+            'orders': self.row_count('orders'),
+            'churns': self.row_count('churn_events'),
+            'first_signup': pd.Timestamp(overview['first_signup']),
+            'last_signup': pd.Timestamp(overview['last_signup']),
+            'signups_by_month': by_month_name(
+                "SELECT monthname(registration_date) AS month_name, COUNT(*) AS value "
+                "FROM customers GROUP BY 1"),
+            'orders_by_month': by_month_name(
+                "SELECT monthname(order_date) AS month_name, COUNT(*) AS value FROM orders GROUP BY 1"),
+            'revenue_by_month': by_month_name(
+                "SELECT monthname(order_date) AS month_name, CAST(SUM(order_total) AS DOUBLE) AS value "
+                "FROM orders GROUP BY 1"),
+            'churns_by_month': by_month_name(
+                "SELECT monthname(churn_date) AS month_name, COUNT(*) AS value "
+                "FROM churn_events GROUP BY 1"),
+            'signups_over_time': signups_over_time,
+            'new_year_customers': group(True, 'customers'),
+            'new_year_churns': group(True, 'churns'),
+            'new_year_quick_churns': group(True, 'quick_churns'),
+            'other_customers': group(False, 'customers'),
+            'other_churns': group(False, 'churns'),
+        }
+
+    def _cohort_key_sql(self, by, granularity):
+        """(SELECT expression, extra FROM clause) for a cohort_keys() key"""
+        if by == 'signup':
+            return _period_sql('c.registration_date', granularity), ''
+        if by == 'new_year':
+            return (f"CASE WHEN c.is_new_year_signup THEN {_sql_string(NEW_YEAR_LABELS[True])} "
+                    f"ELSE {_sql_string(NEW_YEAR_LABELS[False])} END"), ''
+        if by == 'plan':
+            # Ties on start_date go to the earlier subscription, as in the
+            # stable sort of cohort_keys()
+            return 'p.plan_type', """
+                LEFT JOIN (
+                    SELECT customer_id,
+                           first(plan_type ORDER BY start_date NULLS LAST, subscription_id) AS plan_type
+                    FROM subscriptions
+                    GROUP BY customer_id
+                ) p ON p.customer_id = c.customer_id"""
+        if by not in TABLE_SCHEMAS['customers']:
+            raise ValueError(f"unknown cohort key {by!r}")
+        return f'c."{by}"', ''
+
+    def cohort_matrices(self, by='signup', anchor='signup', granularity='month', size='first_period'):
+        """Same CohortMatrices as PandasBackend.cohort_matrices(), aggregated in SQL"""
+        if anchor not in ANCHORS:
+            raise ValueError(f"anchor must be one of {ANCHORS}, not {anchor!r}")
+        if size not in ('first_period', 'all'):
+            raise ValueError(f"size must be 'first_period' or 'all', not {size!r}")
+        key_sql, key_join = self._cohort_key_sql(by, granularity)
+        if anchor == 'signup':
+            anchors = "SELECT customer_id, cohort, signup_period AS anchor FROM keyed"
+        else:
+            anchors = """
+                SELECT k.customer_id, k.cohort, MIN(o.period) AS anchor
+                FROM keyed k
+                JOIN order_periods o ON o.customer_id = k.customer_id
+                GROUP BY k.customer_id, k.cohort"""
+
+        cells = self.query(f"""
+            WITH keyed AS (
+                SELECT c.customer_id, {key_sql} AS cohort,
+                       {_period_sql('c.registration_date', granularity)} AS signup_period
+                FROM customers c{key_join}
+            ),
+            order_periods AS (
+                SELECT customer_id, {_period_sql('order_date', granularity)} AS period, order_total
+                FROM orders
+                WHERE order_date IS NOT NULL
+            ),
+            anchors AS ({anchors}),
+            offsets AS (
+                SELECT a.cohort, o.period - a.anchor AS period_index, o.customer_id, o.order_total
+                FROM order_periods o
+                JOIN anchors a ON a.customer_id = o.customer_id
+                WHERE o.period >= a.anchor
+            )
+            SELECT cohort, period_index,
+                   COUNT(DISTINCT customer_id) AS active,
+                   CAST(COALESCE(SUM(order_total), 0) AS DOUBLE) AS revenue
+            FROM offsets
+            GROUP BY cohort, period_index
+        """)
+
+        # Offsets span every order, as in cohort_engine; then drop unkeyed customers
+        n_offsets = int(cells['period_index'].max()) + 1 if len(cells) else 0
+        cells = cells.dropna(subset=['cohort'])
+        cohort_values = cells['cohort'].astype(np.int64) if by == 'signup' else cells['cohort']
+        codes, cohort_labels = pd.factorize(cohort_values, sort=True)
+        if by == 'signup':
+            cohort_labels = period_labels(cohort_labels, granularity)
+
+        offsets = cells['period_index'].to_numpy(dtype=np.int64)
+        active = np.zeros((len(cohort_labels), n_offsets), dtype=np.int64)
+        active[codes, offsets] = cells['active'].to_numpy()
+        revenue = np.zeros((len(cohort_labels), n_offsets))
+        revenue[codes, offsets] = cells['revenue'].to_numpy()
+
+        if size == 'first_period':
+            sizes = active[:, 0] if n_offsets else np.zeros(len(cohort_labels), dtype=np.int64)
+        else:
+            counts = self.query(f"""
+                SELECT {key_sql} AS cohort, COUNT(*) AS customers
+                FROM customers c{key_join}
+                GROUP BY 1
+            """).dropna(subset=['cohort'])
+            counts = counts.set_index('cohort')['customers']
+            if by == 'signup':
+                counts.index = period_labels(counts.index.astype(np.int64), granularity)
+            sizes = counts.reindex(cohort_labels).fillna(0).to_numpy(dtype=np.int64)
+        return build_matrices(cohort_labels, active, revenue, sizes, granularity)
+
+    def monthly_mrr(self):
+        """Same frame as mrr_engine.monthly_mrr()"""
+        snapshot = self.query(f"""
+            SELECT {_period_sql('month_start', 'month')} AS month,
+                   CAST(SUM(mrr) AS DOUBLE) AS mrr,
+                   COUNT(DISTINCT CASE WHEN status IN ({_sql_list(ACTIVE_STATUSES)})
+                       THEN subscription_id END) AS active_subscribers
+            FROM subscription_monthly
+            WHERE month_start IS NOT NULL
+            GROUP BY 1
+        """).set_index('month')
+        revenue = self.query(f"""
+            SELECT {_period_sql('order_date', 'month')} AS month,
+                   CAST(SUM(order_total) AS DOUBLE) AS actual_revenue
+            FROM orders
+            WHERE delivery_status IN ({_sql_list(REALIZED_STATUSES)}) AND order_date IS NOT NULL
+            GROUP BY 1
+        """).set_index('month')
+
+        first, last = snapshot.index.min(), snapshot.index.max()
+        months = np.arange(first, last + 1)
+        snapshot = snapshot.reindex(months, fill_value=0)
+        return mrr_frame(month_starts(first, last),
+                         snapshot['mrr'].to_numpy(dtype=float),
+                         snapshot['active_subscribers'].to_numpy(),
+                         revenue['actual_revenue'].reindex(months, fill_value=0.0).to_numpy(dtype=float))
+
+    def mrr_movements(self):
+        """Same frame as mrr_engine.mrr_movements() (customer level)"""
+        from export_duckdb import ROLLUPS
+        bridge = self.query(ROLLUPS['rollup_mrr_movements'])
+        bridge['month_start'] = bridge['month_start'].astype('datetime64[ns]')
+        bridge['paying_customers'] = bridge['paying_customers'].astype(int)
+        bridge.insert(1, 'starting_mrr', bridge['ending_mrr'].shift(1, fill_value=0.0))
+        bridge['net_change'] = bridge['ending_mrr'] - bridge['starting_mrr']
+        return bridge
+
+
+def get_backend(name='pandas', data_dir=DATA_DIR, **options):
+    """PandasBackend or DuckDBBackend; options (memory_limit, threads,
+    spill_dir) only apply to duckdb"""
+    if name == 'pandas':
+        return PandasBackend(data_dir)
+    if name == 'duckdb':
+        return DuckDBBackend(data_dir, **options)
+    raise ValueError(f"backend must be one of {BACKENDS}, not {name!r}")
+
+
+def add_backend_arguments(parser):
+    """--backend / --memory-limit / --threads for the analysis scripts"""
+    parser.add_argument('--backend', choices=BACKENDS, default='pandas',
+                        help='pandas (in memory) or duckdb (SQL over the files); default: pandas')
+    parser.add_argument('--memory-limit', help='DuckDB memory limit before spilling to disk, e.g. 4GB')
+    parser.add_argument('--threads', type=int, help='DuckDB worker threads (default: all cores)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'Table directory (default: {DATA_DIR})')
+
+
+def backend_from_args(args):
+    options = {}
+    if args.backend == 'duckdb':
+        options = {'memory_limit': args.memory_limit, 'threads': args.threads}
+    return get_backend(args.backend, args.data_dir, **options)
+
+
+def _differences(expected, actual, rtol=1e-9):
+    """Description of how two results differ, or None if they match"""
+    if isinstance(expected, dict):
+        problems = [f"{key}: {_differences(value, actual[key], rtol)}" for key, value in expected.items()
+                    if _differences(value, actual[key], rtol)]
+        return '; '.join(problems) or None
+    try:
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=rtol,
+                                          check_index_type=False, check_categorical=False, check_freq=False)
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(expected, actual, check_exact=False, rtol=rtol,
+                                           check_index_type=False, check_categorical=False,
+                                           check_freq=False)
+        elif expected != actual:
+            return f"{expected!r} != {actual!r}"
+    except AssertionError as e:
+        return ' '.join(line.strip() for line in str(e).splitlines() if line.strip())
+    return None
+
+
+def check_parity(reference, candidate, cohort_specs=None):
+    """[(analysis, seconds reference, seconds candidate, problem or None)]"""
+    analyses = [
+        ('seasonality', lambda b: b.seasonality()),
+        ('monthly_mrr', lambda b: b.monthly_mrr()),
+        ('mrr_movements', lambda b: b.mrr_movements()),
+    ]
+    for by, anchor, granularity in cohort_specs or COHORT_SPECS:
+        def run(b, by=by, anchor=anchor, granularity=granularity):
+            matrices = b.cohort_matrices(by, anchor=anchor, granularity=granularity)
+            return {'active': matrices.active, 'sizes': matrices.sizes, 'revenue': matrices.revenue}
+        analyses.append((f'cohorts {by}/{anchor}/{granularity}', run))
+
+    results = []
+    for name, run in analyses:
+        start = time.perf_counter()
+        expected = run(reference)
+        middle = time.perf_counter()
+        actual = run(candidate)
+        end = time.perf_counter()
+        results.append((name, middle - start, end - middle, _differences(expected, actual)))
+    return results
+
+
+# (by, anchor, granularity) combinations compared by check_parity()
+COHORT_SPECS = [
+    ('signup', 'signup', 'month'),
+    ('new_year', 'first_order', 'month'),
+    ('acquisition_channel', 'first_order', 'week'),
+    ('plan', 'signup', 'quarter'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the pandas and DuckDB analysis backends')
+    parser.add_argument('--memory-limit', help='DuckDB memory limit before spilling to disk, e.g. 4GB')
+    parser.add_argument('--threads', type=int, help='DuckDB worker threads (default: all cores)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'Table directory (default: {DATA_DIR})')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("ANALYSIS BACKEND PARITY (pandas vs duckdb)")
+    print("="*70)
+    pandas_backend = get_backend('pandas', args.data_dir)
+    duckdb_backend = get_backend('duckdb', args.data_dir, memory_limit=args.memory_limit,
+                                 threads=args.threads)
+
+    print(f"\n{'Analysis':40s} {'pandas':>8s} {'duckdb':>8s}")
+    failures = 0
+    for name, pandas_seconds, duckdb_seconds, problem in check_parity(pandas_backend, duckdb_backend):
+        icon = '✓' if problem is None else '✗'
+        print(f"   {icon} {name:36s} {pandas_seconds:7.2f}s {duckdb_seconds:7.2f}s")
+        if problem:
+            failures += 1
+            print(f"      {problem}")
+    print("-"*70)
+    if failures:
+        print(f"⚠️  {failures} analyses differ between the backends")
+    else:
+        print("✓ Both backends return the same results")
+    print("="*70)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,37 +3,33 @@ NourishBox Seasonality Analysis
 Analyze the seasonal patterns in customer signups, orders, and churn
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+import argparse
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from analysis_backends import add_backend_arguments, backend_from_args
+from chart_renderer import ChartJob, add_render_arguments, render_from_args
+from resampling_engine import DEFAULT_REPLICATES, load_intervals, print_intervals
+
+parser = argparse.ArgumentParser(description='NourishBox seasonality analysis')
+add_backend_arguments(parser)
+add_render_arguments(parser)
+parser.add_argument('--replicates', type=int, default=DEFAULT_REPLICATES,
+                    help=f'Bootstrap replicates for the confidence intervals, 0 to skip (default: {DEFAULT_REPLICATES:,})')
+parser.add_argument('--seed', type=int, default=0, help='Random seed of the bootstrap (default: 0)')
+args = parser.parse_args()
 
 # Load data
 print("Loading data...")
-customers = pd.read_csv('data/nourishbox/customers.csv')
-subscriptions = pd.read_csv('data/nourishbox/subscriptions.csv')
-orders = pd.read_csv('data/nourishbox/orders.csv')
-churn_events = pd.read_csv('data/nourishbox/churn_events.csv')
-
-# Convert date columns
-customers['registration_date'] = pd.to_datetime(customers['registration_date'])
-subscriptions['start_date'] = pd.to_datetime(subscriptions['start_date'])
-subscriptions['end_date'] = pd.to_datetime(subscriptions['end_date'])
-orders['order_date'] = pd.to_datetime(orders['order_date'])
-churn_events['churn_date'] = pd.to_datetime(churn_events['churn_date'])
+# Per-month aggregates from the pandas or DuckDB backend (analysis_backends.py)
+backend = backend_from_args(args)
+season = backend.seasonality()
 
 print(f"\nDataset Overview:")
-print(f"  Total Customers: {len(customers):,}")
-print(f"  Total Orders: {len(orders):,}")
-print(f"  Total Churns: {len(churn_events):,}")
-print(f"  Date Range: {customers['registration_date'].min()} to {customers['registration_date'].max()}")
+print(f"  Total Customers: {season['customers']:,}")
+print(f"  Total Orders: {season['orders']:,}")
+print(f"  Total Churns: {season['churns']:,}")
+print(f"  Date Range: {season['first_signup']} to {season['last_signup']}")
 
 # ============================================================================
 # ANALYSIS 1: Customer Signups by Month
@@ -42,15 +38,8 @@ print("\n" + "="*60)
 print("ANALYSIS 1: Customer Signup Seasonality")
 print("="*60)
 
-# Group by year-month
-customers['year_month'] = customers['registration_date'].dt.to_period('M')
-customers['month'] = customers['registration_date'].dt.month
-customers['month_name'] = customers['registration_date'].dt.month_name()
-
-signups_by_month = customers.groupby('month_name').size()
-month_order = ['January', 'February', 'March', 'April', 'May', 'June',
-               'July', 'August', 'September', 'October', 'November', 'December']
-signups_by_month = signups_by_month.reindex(month_order)
+# Signups per calendar month, January first
+signups_by_month = season['signups_by_month']
 
 print("\nSignups by Month:")
 for month, count in signups_by_month.items():
@@ -71,33 +60,29 @@ print("\n" + "="*60)
 print("ANALYSIS 2: New Year's Resolution Churn Pattern")
 print("="*60)
 
-# Identify New Year signups
-new_year_customers = customers[customers['is_new_year_signup'] == True]['customer_id']
-other_customers = customers[customers['is_new_year_signup'] == False]['customer_id']
-
-# Get churns for each group
-new_year_churns = churn_events[churn_events['customer_id'].isin(new_year_customers)]
-other_churns = churn_events[churn_events['customer_id'].isin(other_customers)]
+# Customers and churns of New Year vs other signups
+new_year_customers = season['new_year_customers']
+other_customers = season['other_customers']
+new_year_churns = season['new_year_churns']
+other_churns = season['other_churns']
 
 # Calculate churn rates
-new_year_churn_rate = len(new_year_churns) / len(new_year_customers) * 100
-other_churn_rate = len(other_churns) / len(other_customers) * 100
+new_year_churn_rate = new_year_churns / new_year_customers * 100
+other_churn_rate = other_churns / other_customers * 100
 
 print(f"\nNew Year Signups (Jan-Feb):")
-print(f"  Total customers: {len(new_year_customers):,}")
-print(f"  Churned: {len(new_year_churns):,}")
+print(f"  Total customers: {new_year_customers:,}")
+print(f"  Churned: {new_year_churns:,}")
 print(f"  Churn rate: {new_year_churn_rate:.1f}%")
 
 print(f"\nOther Month Signups:")
-print(f"  Total customers: {len(other_customers):,}")
-print(f"  Churned: {len(other_churns):,}")
+print(f"  Total customers: {other_customers:,}")
+print(f"  Churned: {other_churns:,}")
 print(f"  Churn rate: {other_churn_rate:.1f}%")
 
 # Analyze churn timing for New Year customers
-new_year_churns_copy = new_year_churns.copy()
-new_year_churns_copy['days_to_churn'] = new_year_churns_copy['subscription_length_days']
-quick_churns = new_year_churns_copy[new_year_churns_copy['days_to_churn'] <= 90]
-print(f"\nNew Year customers who churned within 90 days: {len(quick_churns)} ({len(quick_churns)/len(new_year_churns)*100:.1f}% of New Year churns)")
+quick_churns = season['new_year_quick_churns']
+print(f"\nNew Year customers who churned within 90 days: {quick_churns} ({quick_churns/new_year_churns*100:.1f}% of New Year churns)")
 
 # ============================================================================
 # ANALYSIS 3: Order Volume by Month
@@ -106,11 +91,7 @@ print("\n" + "="*60)
 print("ANALYSIS 3: Order Volume Seasonality")
 print("="*60)
 
-orders['month'] = orders['order_date'].dt.month
-orders['month_name'] = orders['order_date'].dt.month_name()
-
-orders_by_month = orders.groupby('month_name').size()
-orders_by_month = orders_by_month.reindex(month_order)
+orders_by_month = season['orders_by_month']
 
 print("\nOrders by Month:")
 for month, count in orders_by_month.items():
@@ -131,8 +112,7 @@ print("\n" + "="*60)
 print("ANALYSIS 4: Revenue Seasonality")
 print("="*60)
 
-revenue_by_month = orders.groupby('month_name')['order_total'].sum()
-revenue_by_month = revenue_by_month.reindex(month_order)
+revenue_by_month = season['revenue_by_month']
 
 print("\nRevenue by Month:")
 for month, revenue in revenue_by_month.items():
@@ -152,16 +132,25 @@ print("\n" + "="*60)
 print("ANALYSIS 5: Churn Seasonality")
 print("="*60)
 
-churn_events['month'] = churn_events['churn_date'].dt.month
-churn_events['month_name'] = churn_events['churn_date'].dt.month_name()
-
-churns_by_month = churn_events.groupby('month_name').size()
-churns_by_month = churns_by_month.reindex(month_order)
+churns_by_month = season['churns_by_month']
 
 print("\nChurns by Month:")
 for month, count in churns_by_month.items():
     print(f"  {month:12s}: {count:4d} churns")
 
+# ============================================================================
+# ANALYSIS 6: Uncertainty
+# ============================================================================
+if args.replicates > 0:
+    print("\n" + "="*60)
+    print("ANALYSIS 6: Confidence Intervals")
+    print("="*60)
+
+    # Bootstrap over customers (resampling_engine.py); intervals that
+    # include 0 are within noise
+    intervals = load_intervals(replicates=args.replicates, seed=args.seed, data_dir=args.data_dir)
+    print_intervals(intervals)
+
 # ============================================================================
 # VISUALIZATION
 # ============================================================================
@@ -169,74 +158,9 @@ print("\n" + "="*60)
 print("Creating visualizations...")
 print("="*60)
 
-fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-fig.suptitle('NourishBox Seasonality Analysis', fontsize=16, fontweight='bold')
-
-# Plot 1: Signups by Month
-ax1 = axes[0, 0]
-signups_by_month.plot(kind='bar', ax=ax1, color='steelblue')
-ax1.set_title('Customer Signups by Month', fontweight='bold')
-ax1.set_xlabel('Month')
-ax1.set_ylabel('Number of Signups')
-ax1.axhline(y=avg_signups, color='red', linestyle='--', label=f'Average ({avg_signups:.0f})')
-ax1.legend()
-ax1.tick_params(axis='x', rotation=45)
-
-# Plot 2: Orders by Month
-ax2 = axes[0, 1]
-orders_by_month.plot(kind='bar', ax=ax2, color='green')
-ax2.set_title('Order Volume by Month', fontweight='bold')
-ax2.set_xlabel('Month')
-ax2.set_ylabel('Number of Orders')
-ax2.axhline(y=avg_orders, color='red', linestyle='--', label=f'Average ({avg_orders:.0f})')
-ax2.legend()
-ax2.tick_params(axis='x', rotation=45)
-
-# Plot 3: Revenue by Month
-ax3 = axes[0, 2]
-(revenue_by_month / 1000).plot(kind='bar', ax=ax3, color='orange')
-ax3.set_title('Revenue by Month', fontweight='bold')
-ax3.set_xlabel('Month')
-ax3.set_ylabel('Revenue ($1000s)')
-ax3.axhline(y=avg_revenue/1000, color='red', linestyle='--', label=f'Average (${avg_revenue/1000:.1f}K)')
-ax3.legend()
-ax3.tick_params(axis='x', rotation=45)
-
-# Plot 4: Churns by Month
-ax4 = axes[1, 0]
-churns_by_month.plot(kind='bar', ax=ax4, color='crimson')
-ax4.set_title('Customer Churn by Month', fontweight='bold')
-ax4.set_xlabel('Month')
-ax4.set_ylabel('Number of Churns')
-ax4.tick_params(axis='x', rotation=45)
-
-# Plot 5: Churn Rate Comparison
-ax5 = axes[1, 1]
-churn_comparison = pd.DataFrame({
-    'New Year Signups\n(Jan-Feb)': [new_year_churn_rate],
-    'Other Months': [other_churn_rate]
-})
-churn_comparison.T.plot(kind='bar', ax=ax5, legend=False, color=['crimson', 'steelblue'])
-ax5.set_title('Churn Rate: New Year vs Other Signups', fontweight='bold')
-ax5.set_ylabel('Churn Rate (%)')
-ax5.set_xlabel('')
-ax5.tick_params(axis='x', rotation=45)
-for i, v in enumerate([new_year_churn_rate, other_churn_rate]):
-    ax5.text(i, v + 1, f'{v:.1f}%', ha='center', fontweight='bold')
-
-# Plot 6: Time Series - Signups over time
-ax6 = axes[1, 2]
-signups_over_time = customers.groupby(customers['registration_date'].dt.to_period('M')).size()
-signups_over_time.index = signups_over_time.index.to_timestamp()
-signups_over_time.plot(ax=ax6, color='steelblue', linewidth=2)
-ax6.set_title('Customer Signups Over Time', fontweight='bold')
-ax6.set_xlabel('Date')
-ax6.set_ylabel('Monthly Signups')
-ax6.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('data/nourishbox/seasonality_analysis.png', dpi=300, bbox_inches='tight')
-print("\n✓ Visualization saved to: data/nourishbox/seasonality_analysis.png")
+# Drawn by charts.seasonality_dashboard; skipped when its inputs are unchanged
+render_from_args(args, [ChartJob('seasonality_dashboard', season,
+                                 'data/nourishbox/seasonality_analysis.png')])
 
 # ============================================================================
 # SUMMARY INSIGHTS
@@ -251,9 +175,13 @@ print(f"   • Summer months (Jun-Aug) have lowest signups")
 print(f"   • Holiday season (Nov-Dec) also shows reduced acquisition")
 
 print("\n2. NEW YEAR'S RESOLUTION EFFECT:")
-print(f"   • {len(new_year_customers)} customers signed up in Jan-Feb ({len(new_year_customers)/len(customers)*100:.1f}% of total)")
+print(f"   • {new_year_customers} customers signed up in Jan-Feb ({new_year_customers/season['customers']*100:.1f}% of total)")
 print(f"   • New Year signups have {new_year_churn_rate-other_churn_rate:.1f}% higher churn rate")
-print(f"   • {len(quick_churns)/len(new_year_churns)*100:.1f}% of New Year churns happen within 90 days")
+if args.replicates > 0:
+    difference = intervals.loc['churn_rate_difference']
+    print(f"     ({difference['ci_low']:.1f} to {difference['ci_high']:.1f} points at 95%, "
+          f"permutation p = {difference['p_value']:.4f})")
+print(f"   • {quick_churns/new_year_churns*100:.1f}% of New Year churns happen within 90 days")
 
 print("\n3. ORDER PATTERNS:")
 july_orders = orders_by_month['July']
@@ -0,0 +1,122 @@
+"""
+NourishBox Async PostgreSQL Writer
+Binary COPY over an asyncpg connection pool, behind PostgresSink(method='async')
+
+LoadEngine reads, converts and schedules the batches; this module only sends
+them. The asyncio event loop runs on a background thread and every engine
+worker hands its batch to it with copy(), so --workers batches are in flight
+over the pool while the main thread parses the next chunk. Batches go out
+with binary COPY (copy_records_to_table), which skips SQL parsing and text
+conversion.
+
+If the target table is empty when its load starts, batches are copied
+straight into it. Otherwise each batch is copied into a temporary staging
+table and moved with INSERT ... ON CONFLICT DO NOTHING, which keeps
+append-mode syncs idempotent like the other methods.
+
+Every COPY commits on its own; batches that were already copied stay
+committed when a load is interrupted, and a rerun skips them.
+
+Prerequisites:
+    pip install asyncpg
+
+Usage:
+    python src/sync_to_supabase.py --backend async --workers 4
+"""
+
+import asyncio
+import threading
+
+try:
+    import asyncpg
+except ImportError:  # Optional dependency, only needed for --backend async
+    asyncpg = None
+
+# Seconds close() waits for busy connections before dropping them
+CLOSE_TIMEOUT_SECONDS = 10
+
+
+def require_asyncpg():
+    """Raise a helpful error if asyncpg is not installed"""
+    if asyncpg is None:
+        raise ImportError(
+            "The async backend needs asyncpg:\n"
+            "  pip install asyncpg"
+        )
+
+
+class AsyncCopyWriter:
+    """asyncpg pool on a background event loop; copy() may be called from any thread"""
+
+    def __init__(self, connections=4, **connect_kwargs):
+        require_asyncpg()
+        self.direct = {}
+        self.closed = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='asyncpg-loop',
+                                       daemon=True)
+        self.thread.start()
+        try:
+            self.pool = self._run(self._create_pool(max(1, connections), connect_kwargs))
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    def _run(self, coroutine):
+        """Run a coroutine on the loop thread and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _create_pool(self, connections, connect_kwargs):
+        return await asyncpg.create_pool(min_size=1, max_size=connections, **connect_kwargs)
+
+    def begin_table(self, table_name):
+        """Copy straight into the table if it is empty, through staging otherwise"""
+        self.direct[table_name] = not self._run(self._has_rows(table_name))
+
+    async def _has_rows(self, table_name):
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(f'SELECT EXISTS (SELECT 1 FROM "{table_name}")')
+
+    def copy(self, table_name, columns, records):
+        """COPY one batch of tuples. Returns rows inserted."""
+        return self._run(self._copy(table_name, columns, records))
+
+    async def _copy(self, table_name, columns, records):
+        async with self.pool.acquire() as conn:
+            if self.direct.get(table_name):
+                status = await conn.copy_records_to_table(
+                    table_name, records=records, columns=columns
+                )
+            else:
+                staging = f'_load_{table_name}'
+                column_list = ', '.join(f'"{c}"' for c in columns)
+                async with conn.transaction():
+                    # Emptied by every commit, so one temp table serves all batches
+                    await conn.execute(
+                        f'CREATE TEMP TABLE IF NOT EXISTS "{staging}" '
+                        f'(LIKE "{table_name}") ON COMMIT DELETE ROWS'
+                    )
+                    await conn.copy_records_to_table(staging, records=records, columns=columns)
+                    status = await conn.execute(
+                        f'INSERT INTO "{table_name}" ({column_list}) '
+                        f'SELECT {column_list} FROM "{staging}" '
+                        f'ON CONFLICT DO NOTHING'
+                    )
+        return int(status.split()[-1])
+
+    def close(self):
+        """Close the pool (dropping connections still busy after a timeout), stop the loop"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._run(asyncio.wait_for(self.pool.close(), CLOSE_TIMEOUT_SECONDS))
+        except Exception:
+            self.loop.call_soon_threadsafe(self.pool.terminate)
+        finally:
+            self._stop_loop()
+
+    def _stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
@@ -0,0 +1,157 @@
+"""
+NourishBox Batch Ledger
+Durable record of every batch sent by a sync, so interrupted loads can resume
+
+Each table load is split into deterministic batches (fixed batch size over
+the CSV in file order). The ledger (a local SQLite file) records, per batch:
+row range, checksum of the payload, status, attempts and the last error.
+
+    pending   never sent
+    sending   sent, outcome unknown (the process died mid-statement)
+    done      committed by the server
+    failed    given up on after retries
+
+A load is identified by table, source file hash and batch size, so rerunning
+the same file skips batches that are already done and resends the rest,
+while a regenerated file starts a fresh load.
+
+Sinks given a ledger (see sinks.py) do this for every CSV that LoadEngine
+loads. By hand:
+
+    ledger = BatchLedger('data/nourishbox/.sync_ledger_databricks.sqlite')
+    load_id = ledger.begin_load('orders', file_fingerprint(path), batch_size=1000)
+    checksum = frame_checksum(batch)
+    if not ledger.is_done('orders', load_id, 1, checksum):
+        ledger.mark_sending('orders', load_id, 1, 0, 1000, checksum)
+        ...
+        ledger.mark_done('orders', load_id, 1, affected_rows=1000)
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS batches (
+        table_name TEXT NOT NULL,
+        load_id TEXT NOT NULL,
+        batch_number INTEGER NOT NULL,
+        row_start INTEGER,
+        row_count INTEGER,
+        checksum TEXT,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        affected_rows INTEGER,
+        error TEXT,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (table_name, load_id, batch_number)
+    )
+"""
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_checksum(df):
+    """Short SHA-256 of a batch's column names and values, in row order"""
+    digest = hashlib.sha256('\x1f'.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+class BatchLedger:
+    """SQLite-backed batch ledger. Every update is committed immediately."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(LEDGER_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _now(self):
+        return datetime.now().isoformat(timespec='seconds')
+
+    def begin_load(self, table_name, fingerprint, batch_size, mode='append'):
+        """Return the load id for this source, dropping stale loads of the table"""
+        load_id = f"{fingerprint[:16]}:{batch_size}:{mode}"
+        self.conn.execute(
+            "DELETE FROM batches WHERE table_name = ? AND load_id <> ?",
+            (table_name, load_id)
+        )
+        self.conn.commit()
+        return load_id
+
+    def batch_status(self, table_name, load_id):
+        """{batch_number: (status, checksum)} recorded for a load"""
+        rows = self.conn.execute(
+            "SELECT batch_number, status, checksum FROM batches "
+            "WHERE table_name = ? AND load_id = ?",
+            (table_name, load_id)
+        ).fetchall()
+        return {batch: (status, checksum) for batch, status, checksum in rows}
+
+    def is_done(self, table_name, load_id, batch_number, checksum):
+        row = self.conn.execute(
+            "SELECT status, checksum FROM batches "
+            "WHERE table_name = ? AND load_id = ? AND batch_number = ?",
+            (table_name, load_id, batch_number)
+        ).fetchone()
+        return row is not None and row[0] == 'done' and row[1] == checksum
+
+    def mark_sending(self, table_name, load_id, batch_number, row_start, row_count, checksum):
+        self.conn.execute("""
+            INSERT INTO batches (table_name, load_id, batch_number, row_start, row_count,
+                                 checksum, status, attempts, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 'sending', 1, ?)
+            ON CONFLICT (table_name, load_id, batch_number) DO UPDATE SET
+                checksum = excluded.checksum,
+                status = 'sending',
+                attempts = attempts + 1,
+                updated_at = excluded.updated_at
+        """, (table_name, load_id, batch_number, row_start, row_count, checksum, self._now()))
+        self.conn.commit()
+
+    def mark_done(self, table_name, load_id, batch_number, affected_rows=None, retries=0):
+        self._set_status(table_name, load_id, batch_number, 'done', affected_rows, None, retries)
+
+    def mark_failed(self, table_name, load_id, batch_number, error, retries=0):
+        self._set_status(table_name, load_id, batch_number, 'failed', None, error, retries)
+
+    def _set_status(self, table_name, load_id, batch_number, status, affected_rows, error,
+                    retries):
+        # retries: extra attempts made within this run (mark_sending counted the first)
+        self.conn.execute("""
+            UPDATE batches SET status = ?, affected_rows = ?, error = ?,
+                               attempts = attempts + ?, updated_at = ?
+            WHERE table_name = ? AND load_id = ? AND batch_number = ?
+        """, (status, affected_rows, error, retries, self._now(), table_name, load_id,
+              batch_number))
+        self.conn.commit()
+
+    def reset(self, table_name=None):
+        """Forget loads of one table (e.g. after clearing it) or of all tables"""
+        if table_name is None:
+            self.conn.execute("DELETE FROM batches")
+        else:
+            self.conn.execute("DELETE FROM batches WHERE table_name = ?", (table_name,))
+        self.conn.commit()
+
+    def failures(self):
+        """(table, batch, attempts, error) for every batch not loaded"""
+        return self.conn.execute("""
+            SELECT table_name, batch_number, attempts, COALESCE(error, 'interrupted')
+            FROM batches
+            WHERE status IN ('failed', 'sending')
+            ORDER BY table_name, batch_number
+        """).fetchall()
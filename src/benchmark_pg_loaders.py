@@ -0,0 +1,122 @@
+"""
+NourishBox PostgreSQL Loader Benchmark
+Compares PostgresSink's load methods (values, copy, async) through LoadEngine
+
+Each round loads one CSV into an empty scratch copy of its table
+(_bench_<table>, created LIKE the real table INCLUDING ALL, dropped at the
+end), once per method, and reports rows/sec. The real tables are not touched.
+
+Prerequisites:
+    pip install psycopg2-binary asyncpg python-dotenv
+    Tables created by a previous sync_to_supabase.py run
+
+Usage:
+    python benchmark_pg_loaders.py                       # order_items, 3 rounds
+    python benchmark_pg_loaders.py --table orders --rounds 5 --workers 8
+
+Local PostgreSQL:
+    SUPABASE_HOST=localhost SUPABASE_PASSWORD=postgres SUPABASE_SSLMODE=disable \\
+        python benchmark_pg_loaders.py
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from load_engine import DEFAULT_BATCH_ROWS, LoadEngine
+from sinks import PostgresSink
+from sync_telemetry import SyncTelemetry
+from table_schemas import DATA_DIR, TABLE_CONFIGS, TABLE_SCHEMAS
+
+
+def reset_scratch_table(sink, table_name, scratch_name):
+    """(Re)create an empty copy of table_name with the same keys and indexes"""
+    sink.cursor.execute(f'DROP TABLE IF EXISTS "{scratch_name}"')
+    sink.cursor.execute(f'CREATE TABLE "{scratch_name}" (LIKE "{table_name}" INCLUDING ALL)')
+    sink.conn.commit()
+
+
+def run_method(method, csv_file, table_name, workers, batch_rows):
+    """Load csv_file with one method on fresh connections. Returns rows inserted."""
+    sink = PostgresSink(method=method, connections=workers).connect()
+    engine = LoadEngine(sink, telemetry=SyncTelemetry('benchmark'), batch_rows=batch_rows,
+                        workers=workers)
+    try:
+        return engine.load_table(csv_file, table_name)
+    finally:
+        engine.close()
+        sink.close()
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Benchmark PostgreSQL loaders')
+    parser.add_argument('--table', default='order_items', choices=sorted(TABLE_CONFIGS),
+                        help='Table/CSV to load (default: order_items)')
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='Loads per method (default: 3)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Connections per load (default: 4)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                        help=f'Rows per batch (default: {DEFAULT_BATCH_ROWS})')
+    args = parser.parse_args()
+
+    csv_file = os.path.join(DATA_DIR, f'{args.table}.csv')
+    if not os.path.exists(csv_file):
+        print(f"\n❌ {csv_file} not found")
+        print("   Run 'python generate_nourishbox_data.py' first to generate data")
+        return
+
+    # The scratch table gets the real table's key and column types
+    scratch_name = f'_bench_{args.table}'
+    TABLE_CONFIGS.setdefault(scratch_name, TABLE_CONFIGS[args.table])
+    TABLE_SCHEMAS.setdefault(scratch_name, TABLE_SCHEMAS[args.table])
+
+    print("\n" + "="*70)
+    print(f"LOADER BENCHMARK: {args.table} ({args.rounds} rounds)")
+    print("="*70)
+
+    admin = PostgresSink().connect()
+    results = {method: [] for method in PostgresSink.METHODS}
+
+    try:
+        for round_number in range(1, args.rounds + 1):
+            for method in PostgresSink.METHODS:
+                reset_scratch_table(admin, args.table, scratch_name)
+
+                start = time.perf_counter()
+                inserted = run_method(method, csv_file, scratch_name, args.workers,
+                                      args.batch_rows)
+                elapsed = time.perf_counter() - start
+
+                results[method].append((inserted, elapsed))
+                print(f"   round {round_number} {method:15s}: {inserted:>10,} rows "
+                      f"in {elapsed:6.2f}s")
+    finally:
+        try:
+            admin.conn.rollback()
+            admin.cursor.execute(f'DROP TABLE IF EXISTS "{scratch_name}"')
+            admin.conn.commit()
+        finally:
+            admin.close()
+
+    print("\n" + "="*70)
+    print("RESULTS (median of rounds)")
+    print("="*70)
+    medians = {}
+    for method, runs in results.items():
+        if not runs:
+            continue
+        rows = runs[0][0]
+        seconds = statistics.median(elapsed for _, elapsed in runs)
+        medians[method] = rows / seconds if seconds > 0 else 0.0
+        print(f"  {method:15s}: {medians[method]:>12,.0f} rows/s  ({seconds:.2f}s)")
+
+    if medians.get('values'):
+        for method in ('copy', 'async'):
+            print(f"\n  {method} speedup over values: {medians[method] / medians['values']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
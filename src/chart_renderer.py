@@ -0,0 +1,235 @@
+"""
+NourishBox Chart Renderer
+Render dashboards headless, in parallel, and only when their inputs changed
+
+A ChartJob names a chart function in charts.py, the data it draws and the
+PNG to write. render() then:
+
+1. Hashes each job's inputs (every Series/DataFrame value, index and
+   dtype, plus the chart name and the source of charts.py)
+2. Skips jobs whose PNG is still the one written for that hash, per the
+   record in data/nourishbox/.cache/renders.json
+3. Renders the remaining jobs in a process pool (one figure per worker),
+   or in-process when there is only one
+
+matplotlib and seaborn are only imported by the chart functions, so
+scripts run with --no-plots never load them.
+
+The pool uses the 'fork' start method: the analysis scripts are plain
+top-level scripts, which 'spawn' workers would re-run on import. Where fork
+is unavailable (Windows, macOS default) figures render one after another.
+
+Usage:
+    from chart_renderer import ChartJob, render
+    results = render([ChartJob('seasonality_dashboard', season, 'data/nourishbox/seasonality_analysis.png')])
+
+    python src/chart_renderer.py                    # every dashboard, in parallel
+    python src/chart_renderer.py --force --backend duckdb
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from nourishbox import CACHE_DIRNAME
+from table_schemas import DATA_DIR
+
+RENDER_RECORD = os.path.join(DATA_DIR, CACHE_DIRNAME, 'renders.json')
+
+# Bump to re-render every chart (e.g. after a matplotlib upgrade)
+RENDER_VERSION = 1
+
+CHARTS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'charts.py')
+
+
+class ChartJob:
+    """One figure: charts.<chart>(data, output)"""
+
+    def __init__(self, chart, data, output):
+        self.chart = chart
+        self.data = data
+        self.output = output
+
+    def input_hash(self):
+        digest = hashlib.sha256()
+        digest.update(f"{RENDER_VERSION}:{self.chart}:".encode())
+        with open(CHARTS_SOURCE, 'rb') as f:
+            digest.update(f.read())
+        _update_digest(digest, self.data)
+        return digest.hexdigest()
+
+
+def _update_digest(digest, value):
+    """Feed a (nested) chart input into a hashlib digest"""
+    if isinstance(value, dict):
+        for key in sorted(value, key=str):
+            digest.update(f"key:{key!r}".encode())
+            _update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"list:{len(value)}".encode())
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, pd.DataFrame):
+        digest.update(f"frame:{list(map(str, value.columns))}:{list(map(str, value.dtypes))}".encode())
+        _update_digest(digest, value.index)
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(f"series:{value.name!r}:{value.dtype}".encode())
+        _update_digest(digest, value.index)
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, pd.Index):
+        digest.update(f"index:{value.names}:{value.dtype}".encode())
+        digest.update(pd.util.hash_pandas_object(value.to_frame(index=False), index=False)
+                      .to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"array:{value.dtype}:{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(f"value:{value!r}".encode())
+
+
+def _read_record(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_record(path, record):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _is_current(entry, output, input_hash):
+    """True if output is the PNG written for input_hash"""
+    if not entry or entry.get('hash') != input_hash or not os.path.exists(output):
+        return False
+    stat = os.stat(output)
+    return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+
+def _render_job(chart, data, output):
+    """Worker: draw one figure; returns seconds spent"""
+    import charts
+    start = time.perf_counter()
+    getattr(charts, chart)(data, output)
+    return time.perf_counter() - start
+
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        return None
+
+
+def render(jobs, workers=None, force=False, record_path=RENDER_RECORD):
+    """Render jobs whose inputs changed; returns [(job, 'rendered'|'unchanged', seconds)]"""
+    record = _read_record(record_path)
+    hashes = [job.input_hash() for job in jobs]
+    results = {}
+    pending = []
+    for job, input_hash in zip(jobs, hashes):
+        key = os.path.abspath(job.output)
+        if not force and _is_current(record.get(key), job.output, input_hash):
+            results[key] = (job, 'unchanged', 0.0)
+        else:
+            pending.append(job)
+
+    context = _fork_context()
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers > 1 and context is not None:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [(job, pool.submit(_render_job, job.chart, job.data, job.output)) for job in pending]
+            for job, future in futures:
+                results[os.path.abspath(job.output)] = (job, 'rendered', future.result())
+    else:
+        for job in pending:
+            results[os.path.abspath(job.output)] = (job, 'rendered', _render_job(job.chart, job.data, job.output))
+
+    for job, input_hash in zip(jobs, hashes):
+        key = os.path.abspath(job.output)
+        if results[key][1] == 'rendered':
+            stat = os.stat(job.output)
+            record[key] = {'chart': job.chart, 'hash': input_hash,
+                           'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if pending:
+        _write_record(record_path, record)
+    return [results[os.path.abspath(job.output)] for job in jobs]
+
+
+def add_render_arguments(parser):
+    """--no-plots / --force-plots / --plot-workers for the analysis scripts"""
+    parser.add_argument('--no-plots', action='store_true',
+                        help='Compute and print the numbers only; never load matplotlib')
+    parser.add_argument('--force-plots', action='store_true',
+                        help='Re-render figures even if their inputs did not change')
+    parser.add_argument('--plot-workers', type=int,
+                        help='Processes for rendering figures (default: one per figure, up to the core count)')
+
+
+def render_from_args(args, jobs):
+    """render() per the script's arguments, printing one line per figure"""
+    if args.no_plots:
+        print("\n⏭️  Skipped visualizations (--no-plots)")
+        return []
+    results = render(jobs, workers=args.plot_workers, force=args.force_plots)
+    for job, status, seconds in results:
+        if status == 'rendered':
+            print(f"\n✓ Visualization saved to: {job.output} ({seconds:.1f}s)")
+        else:
+            print(f"\n✓ Visualization unchanged (same inputs): {job.output}")
+    return results
+
+
+def dashboard_jobs(backend):
+    """ChartJobs for every dashboard of the analysis scripts"""
+    from charts import cohort_chart_data
+    signup_matrices = backend.cohort_matrices('signup', anchor='signup')
+    new_year_matrices = backend.cohort_matrices('new_year', anchor='first_order')
+    return [
+        ChartJob('seasonality_dashboard', backend.seasonality(),
+                 os.path.join(DATA_DIR, 'seasonality_analysis.png')),
+        ChartJob('cohort_dashboard', cohort_chart_data(signup_matrices, new_year_matrices),
+                 os.path.join(DATA_DIR, 'cohort_analysis.png')),
+        ChartJob('mrr_dashboard', backend.monthly_mrr(), 'mrr_analysis.png'),
+    ]
+
+
+def main():
+    from analysis_backends import add_backend_arguments, backend_from_args
+
+    parser = argparse.ArgumentParser(description='Render every NourishBox dashboard')
+    add_backend_arguments(parser)
+    parser.add_argument('--force', action='store_true', help='Re-render unchanged figures')
+    parser.add_argument('--workers', type=int, help='Rendering processes (default: one per figure)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("NOURISHBOX DASHBOARDS")
+    print("="*70)
+    start = time.perf_counter()
+    jobs = dashboard_jobs(backend_from_args(args))
+    print(f"\nComputed inputs in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for job, status, seconds in render(jobs, workers=args.workers, force=args.force):
+        icon = '✓' if status == 'rendered' else '='
+        print(f"   {icon} {job.chart:24s} {status:9s} {seconds:6.2f}s  {job.output}")
+    print(f"\nWall time: {time.perf_counter() - start:.2f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
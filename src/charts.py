@@ -0,0 +1,415 @@
+"""
+NourishBox Charts
+The dashboards of the analysis scripts, as functions of their input data
+
+Each chart function takes the numbers a script computed (plain dicts,
+Series and DataFrames) plus an output path, draws the figure and saves it as
+a 300-dpi PNG. The plotting stack (matplotlib, seaborn) is imported inside
+the functions, so importing this module - or running a script with
+--no-plots - never loads it. Figures are drawn with the non-interactive Agg
+backend unless MPLBACKEND says otherwise.
+
+Scripts do not call these directly; they hand ChartJobs to
+chart_renderer.render(), which skips unchanged figures and renders the rest
+in parallel.
+
+Usage:
+    from charts import seasonality_dashboard
+    seasonality_dashboard(backend.seasonality(), 'data/nourishbox/seasonality_analysis.png')
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DPI = 300
+
+
+def _pyplot(style, palette=None):
+    """matplotlib.pyplot (headless unless MPLBACKEND is set), styled"""
+    import matplotlib
+    if not os.environ.get('MPLBACKEND'):
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use(style)
+    if palette:
+        import seaborn as sns
+        sns.set_palette(palette)
+    return plt
+
+
+def _save(plt, fig, output):
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    plt.savefig(output, dpi=DPI, bbox_inches='tight')
+    plt.close(fig)
+
+
+def seasonality_dashboard(season, output):
+    """2x3 seasonality dashboard from analysis_backends seasonality()"""
+    plt = _pyplot('seaborn-v0_8-darkgrid', 'husl')
+
+    signups_by_month = season['signups_by_month']
+    orders_by_month = season['orders_by_month']
+    revenue_by_month = season['revenue_by_month']
+    churns_by_month = season['churns_by_month']
+    avg_signups = signups_by_month.mean()
+    avg_orders = orders_by_month.mean()
+    avg_revenue = revenue_by_month.mean()
+    new_year_churn_rate = season['new_year_churns'] / season['new_year_customers'] * 100
+    other_churn_rate = season['other_churns'] / season['other_customers'] * 100
+
+    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+    fig.suptitle('NourishBox Seasonality Analysis', fontsize=16, fontweight='bold')
+
+    # Plot 1: Signups by Month
+    ax1 = axes[0, 0]
+    signups_by_month.plot(kind='bar', ax=ax1, color='steelblue')
+    ax1.set_title('Customer Signups by Month', fontweight='bold')
+    ax1.set_xlabel('Month')
+    ax1.set_ylabel('Number of Signups')
+    ax1.axhline(y=avg_signups, color='red', linestyle='--', label=f'Average ({avg_signups:.0f})')
+    ax1.legend()
+    ax1.tick_params(axis='x', rotation=45)
+
+    # Plot 2: Orders by Month
+    ax2 = axes[0, 1]
+    orders_by_month.plot(kind='bar', ax=ax2, color='green')
+    ax2.set_title('Order Volume by Month', fontweight='bold')
+    ax2.set_xlabel('Month')
+    ax2.set_ylabel('Number of Orders')
+    ax2.axhline(y=avg_orders, color='red', linestyle='--', label=f'Average ({avg_orders:.0f})')
+    ax2.legend()
+    ax2.tick_params(axis='x', rotation=45)
+
+    # Plot 3: Revenue by Month
+    ax3 = axes[0, 2]
+    (revenue_by_month / 1000).plot(kind='bar', ax=ax3, color='orange')
+    ax3.set_title('Revenue by Month', fontweight='bold')
+    ax3.set_xlabel('Month')
+    ax3.set_ylabel('Revenue ($1000s)')
+    ax3.axhline(y=avg_revenue/1000, color='red', linestyle='--', label=f'Average (${avg_revenue/1000:.1f}K)')
+    ax3.legend()
+    ax3.tick_params(axis='x', rotation=45)
+
+    # Plot 4: Churns by Month
+    ax4 = axes[1, 0]
+    churns_by_month.plot(kind='bar', ax=ax4, color='crimson')
+    ax4.set_title('Customer Churn by Month', fontweight='bold')
+    ax4.set_xlabel('Month')
+    ax4.set_ylabel('Number of Churns')
+    ax4.tick_params(axis='x', rotation=45)
+
+    # Plot 5: Churn Rate Comparison
+    ax5 = axes[1, 1]
+    churn_comparison = pd.DataFrame({
+        'New Year Signups\n(Jan-Feb)': [new_year_churn_rate],
+        'Other Months': [other_churn_rate]
+    })
+    churn_comparison.T.plot(kind='bar', ax=ax5, legend=False, color=['crimson', 'steelblue'])
+    ax5.set_title('Churn Rate: New Year vs Other Signups', fontweight='bold')
+    ax5.set_ylabel('Churn Rate (%)')
+    ax5.set_xlabel('')
+    ax5.tick_params(axis='x', rotation=45)
+    for i, v in enumerate([new_year_churn_rate, other_churn_rate]):
+        ax5.text(i, v + 1, f'{v:.1f}%', ha='center', fontweight='bold')
+
+    # Plot 6: Time Series - Signups over time
+    ax6 = axes[1, 2]
+    signups_over_time = season['signups_over_time']
+    signups_over_time.plot(ax=ax6, color='steelblue', linewidth=2)
+    ax6.set_title('Customer Signups Over Time', fontweight='bold')
+    ax6.set_xlabel('Date')
+    ax6.set_ylabel('Monthly Signups')
+    ax6.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    _save(plt, fig, output)
+
+
+def cohort_chart_data(signup_matrices, new_year_matrices):
+    """cohort_dashboard() input from the signup and New Year CohortMatrices"""
+    retention_comparison = new_year_matrices.retention.T
+    retention_comparison.columns.name = 'cohort_type'
+    return {
+        'retention_matrix_12m': signup_matrices.retention.iloc[:, :13],
+        'retention_comparison': retention_comparison.loc[:12],
+        'cumulative_revenue': signup_matrices.revenue_per_customer.iloc[:, :13].cumsum(axis=1),
+    }
+
+
+def cohort_dashboard(cohorts, output):
+    """Retention and LTV dashboard; cohorts holds the retention_matrix_12m,
+    retention_comparison and cumulative_revenue frames of cohort_analysis.py"""
+    plt = _pyplot('seaborn-v0_8-whitegrid', 'coolwarm')
+    import seaborn as sns
+
+    retention_matrix_12m = cohorts['retention_matrix_12m']
+    retention_comparison = cohorts['retention_comparison']
+    cumulative_revenue = cohorts['cumulative_revenue']
+
+    fig = plt.figure(figsize=(20, 12))
+    gs = fig.add_gridspec(3, 2, hspace=0.3, wspace=0.3)
+
+    # ============================================================================
+    # Plot 1: Retention Heatmap
+    # ============================================================================
+    ax1 = fig.add_subplot(gs[0, :])
+
+    # Use only cohorts with enough history (at least 6 months)
+    retention_matrix_plot = retention_matrix_12m.iloc[-20:]  # Last 20 cohorts
+
+    sns.heatmap(
+        retention_matrix_plot,
+        annot=True,
+        fmt='.0f',
+        cmap='RdYlGn',
+        center=50,
+        vmin=0,
+        vmax=100,
+        cbar_kws={'label': 'Retention %'},
+        ax=ax1,
+        linewidths=0.5,
+        yticklabels=[str(x) for x in retention_matrix_plot.index]
+    )
+    ax1.set_title('Monthly Retention Rate by Cohort (%)\nMonth 0 = First Order',
+                  fontsize=14, fontweight='bold', pad=20)
+    ax1.set_xlabel('Months Since First Order', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Cohort (Registration Month)', fontsize=12, fontweight='bold')
+
+    # ============================================================================
+    # Plot 2: Retention Curve Comparison (New Year vs Others)
+    # ============================================================================
+    ax2 = fig.add_subplot(gs[1, 0])
+
+    retention_comparison.plot(ax=ax2, linewidth=3, marker='o', markersize=8)
+    ax2.set_title('Retention Curve: New Year vs Other Signups',
+                  fontsize=14, fontweight='bold')
+    ax2.set_xlabel('Months Since First Order', fontsize=11, fontweight='bold')
+    ax2.set_ylabel('Retention Rate (%)', fontsize=11, fontweight='bold')
+    ax2.legend(title='Cohort Type', fontsize=10, title_fontsize=11)
+    ax2.grid(True, alpha=0.3)
+    ax2.set_ylim(0, 105)
+
+    # Add annotations for key drop-off points
+    for col in retention_comparison.columns:
+        if 3 in retention_comparison.index:
+            month3_retention = retention_comparison.loc[3, col]
+            ax2.annotate(f'{month3_retention:.1f}%',
+                        xy=(3, month3_retention),
+                        xytext=(3, month3_retention + 5),
+                        fontsize=9, ha='center')
+
+    # ============================================================================
+    # Plot 3: Average Retention by Month
+    # ============================================================================
+    ax3 = fig.add_subplot(gs[1, 1])
+
+    avg_retention = retention_matrix_12m.mean(axis=0)
+    avg_retention.plot(kind='bar', ax=ax3, color='steelblue', width=0.7)
+    ax3.set_title('Average Retention Rate by Month',
+                  fontsize=14, fontweight='bold')
+    ax3.set_xlabel('Months Since First Order', fontsize=11, fontweight='bold')
+    ax3.set_ylabel('Average Retention (%)', fontsize=11, fontweight='bold')
+    ax3.tick_params(axis='x', rotation=0)
+    ax3.grid(True, alpha=0.3, axis='y')
+
+    # Add value labels on bars
+    for i, v in enumerate(avg_retention):
+        if not pd.isna(v):
+            ax3.text(i, v + 2, f'{v:.0f}%', ha='center', fontsize=9)
+
+    # ============================================================================
+    # Plot 4: Cumulative LTV Heatmap
+    # ============================================================================
+    ax4 = fig.add_subplot(gs[2, 0])
+
+    cumulative_revenue_plot = cumulative_revenue.iloc[-20:]
+
+    sns.heatmap(
+        cumulative_revenue_plot,
+        annot=True,
+        fmt='.0f',
+        cmap='YlGnBu',
+        cbar_kws={'label': 'Cumulative Revenue ($)'},
+        ax=ax4,
+        linewidths=0.5,
+        yticklabels=[str(x) for x in cumulative_revenue_plot.index]
+    )
+    ax4.set_title('Cumulative Customer Lifetime Value by Cohort ($)',
+                  fontsize=14, fontweight='bold', pad=20)
+    ax4.set_xlabel('Months Since First Order', fontsize=12, fontweight='bold')
+    ax4.set_ylabel('Cohort (Registration Month)', fontsize=12, fontweight='bold')
+
+    # ============================================================================
+    # Plot 5: LTV Curve
+    # ============================================================================
+    ax5 = fig.add_subplot(gs[2, 1])
+
+    avg_ltv = cumulative_revenue.mean(axis=0)
+    avg_ltv.plot(ax=ax5, linewidth=3, marker='o', markersize=8, color='green')
+    ax5.set_title('Average Customer Lifetime Value Over Time',
+                  fontsize=14, fontweight='bold')
+    ax5.set_xlabel('Months Since First Order', fontsize=11, fontweight='bold')
+    ax5.set_ylabel('Cumulative LTV ($)', fontsize=11, fontweight='bold')
+    ax5.grid(True, alpha=0.3)
+
+    # Add annotations
+    for i in [3, 6, 12]:
+        if i in avg_ltv.index and not pd.isna(avg_ltv[i]):
+            ax5.annotate(f'${avg_ltv[i]:.0f}',
+                        xy=(i, avg_ltv[i]),
+                        xytext=(i, avg_ltv[i] + 20),
+                        fontsize=10, ha='center', fontweight='bold',
+                        bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.3))
+
+    plt.suptitle('NourishBox Cohort Analysis Dashboard',
+                 fontsize=18, fontweight='bold', y=0.995)
+
+    _save(plt, fig, output)
+
+
+def mrr_dashboard(mrr_df, output):
+    """2x2 MRR dashboard from mrr_engine.monthly_mrr()"""
+    plt = _pyplot('default')
+    import matplotlib.dates as mdates
+
+    mrr_df = mrr_df.copy()
+
+    # Create figure with subplots
+    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
+    fig.suptitle('NourishBox - Monthly Recurring Revenue Analysis',
+                 fontsize=16, fontweight='bold', y=0.995)
+
+    # Color scheme
+    primary_color = '#2E86AB'    # Blue
+    secondary_color = '#A23B72'  # Purple
+    success_color = '#06A77D'    # Green
+
+    # ========================================================================
+    # Plot 1: MRR Over Time (Main Chart)
+    # ========================================================================
+    ax1 = axes[0, 0]
+    ax1.plot(mrr_df['date'], mrr_df['mrr'],
+             linewidth=3, color=primary_color, marker='o', markersize=4)
+    ax1.fill_between(mrr_df['date'], mrr_df['mrr'],
+                      alpha=0.3, color=primary_color)
+
+    # Format
+    ax1.set_title('Monthly Recurring Revenue (MRR)',
+                  fontsize=12, fontweight='bold', pad=10)
+    ax1.set_xlabel('Date', fontsize=10)
+    ax1.set_ylabel('MRR ($)', fontsize=10)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+    ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+
+    # Date formatting
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax1.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    # Add current MRR annotation
+    current_mrr = mrr_df['mrr'].iloc[-1]
+    ax1.annotate(f'Current MRR:\n${current_mrr:,.0f}',
+                xy=(mrr_df['date'].iloc[-1], current_mrr),
+                xytext=(-100, 20), textcoords='offset points',
+                bbox=dict(boxstyle='round,pad=0.5', facecolor=primary_color, alpha=0.8),
+                color='white', fontweight='bold', fontsize=10,
+                arrowprops=dict(arrowstyle='->', color=primary_color, lw=2))
+
+    # ========================================================================
+    # Plot 2: Active Subscribers Over Time
+    # ========================================================================
+    ax2 = axes[0, 1]
+    ax2.plot(mrr_df['date'], mrr_df['active_subscribers'],
+             linewidth=3, color=secondary_color, marker='s', markersize=4)
+    ax2.fill_between(mrr_df['date'], mrr_df['active_subscribers'],
+                      alpha=0.3, color=secondary_color)
+
+    ax2.set_title('Active Subscribers Over Time',
+                  fontsize=12, fontweight='bold', pad=10)
+    ax2.set_xlabel('Date', fontsize=10)
+    ax2.set_ylabel('Active Subscribers', fontsize=10)
+    ax2.grid(True, alpha=0.3, linestyle='--')
+    ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
+
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax2.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    # Add current subscriber annotation
+    current_subs = mrr_df['active_subscribers'].iloc[-1]
+    ax2.annotate(f'{current_subs:,} subscribers',
+                xy=(mrr_df['date'].iloc[-1], current_subs),
+                xytext=(-100, 20), textcoords='offset points',
+                bbox=dict(boxstyle='round,pad=0.5', facecolor=secondary_color, alpha=0.8),
+                color='white', fontweight='bold', fontsize=10,
+                arrowprops=dict(arrowstyle='->', color=secondary_color, lw=2))
+
+    # ========================================================================
+    # Plot 3: MRR vs Actual Revenue
+    # ========================================================================
+    ax3 = axes[1, 0]
+
+    x_pos = np.arange(len(mrr_df))
+    width = 0.35
+
+    ax3.bar(x_pos - width/2, mrr_df['mrr'], width,
+            label='MRR (Expected)', color=primary_color, alpha=0.8)
+    ax3.bar(x_pos + width/2, mrr_df['actual_revenue'], width,
+            label='Actual Revenue', color=success_color, alpha=0.8)
+
+    ax3.set_title('MRR vs Actual Revenue',
+                  fontsize=12, fontweight='bold', pad=10)
+    ax3.set_xlabel('Month', fontsize=10)
+    ax3.set_ylabel('Revenue ($)', fontsize=10)
+    ax3.grid(True, alpha=0.3, linestyle='--', axis='y')
+    ax3.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    ax3.legend(loc='upper left', fontsize=9)
+
+    # Show every 6th month label
+    tick_positions = range(0, len(mrr_df), 6)
+    tick_labels = [mrr_df['year_month'].iloc[i] for i in tick_positions]
+    ax3.set_xticks(tick_positions)
+    ax3.set_xticklabels(tick_labels, rotation=45, ha='right')
+
+    # ========================================================================
+    # Plot 4: MRR Growth Rate (Month-over-Month)
+    # ========================================================================
+    ax4 = axes[1, 1]
+
+    # Calculate month-over-month growth rate
+    mrr_df['growth_rate'] = mrr_df['mrr'].pct_change() * 100
+
+    # Color positive/negative growth differently
+    colors = [success_color if x >= 0 else '#E63946' for x in mrr_df['growth_rate'][1:]]
+
+    ax4.bar(mrr_df['date'][1:], mrr_df['growth_rate'][1:],
+            color=colors, alpha=0.8, width=20)
+    ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
+
+    ax4.set_title('MRR Growth Rate (Month-over-Month)',
+                  fontsize=12, fontweight='bold', pad=10)
+    ax4.set_xlabel('Date', fontsize=10)
+    ax4.set_ylabel('Growth Rate (%)', fontsize=10)
+    ax4.grid(True, alpha=0.3, linestyle='--', axis='y')
+    ax4.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
+
+    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax4.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+    plt.setp(ax4.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    # Add average growth rate
+    avg_growth = mrr_df['growth_rate'][1:].mean()
+    ax4.axhline(y=avg_growth, color='gray', linestyle='--', linewidth=1.5,
+                label=f'Avg: {avg_growth:.2f}%')
+    ax4.legend(loc='upper left', fontsize=9)
+
+    # ========================================================================
+    # Adjust layout and save
+    # ========================================================================
+    plt.tight_layout()
+
+    _save(plt, fig, output)
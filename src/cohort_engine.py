@@ -0,0 +1,212 @@
+"""
+NourishBox Cohort Engine
+Retention and revenue matrices for any cohort key and period length
+
+Customers are grouped by a cohort key (signup month, acquisition channel,
+plan, New Year flag, ...) and their orders are placed at an offset from an
+anchor date (signup date, or the customer's first order):
+
+    active               distinct customers with an order, cohort x offset
+    sizes                customers per cohort (denominator)
+    retention            active / sizes, in %
+    revenue              order value, cohort x offset
+    revenue_per_customer revenue / sizes
+    cumulative_revenue   revenue_per_customer summed across offsets (LTV)
+
+Dates become integer period indices (week, month or quarter since 1970);
+distinct (customer, offset) pairs come from one np.unique over int64 ids,
+and every matrix is one np.bincount over cohort * n_offsets + offset. No
+Period objects, merges or pivots, so millions of customers take seconds.
+
+Cells with no activity are NaN (as in a pivot of the observed rows).
+By default a cohort's size is its number of customers active at offset 0,
+as in cohort_analysis.py; size='all' counts every customer in the cohort.
+
+Usage:
+    from cohort_engine import cohort_keys, cohort_matrices
+    keys = cohort_keys(customers, 'signup')                      # monthly signup cohorts
+    cohorts = cohort_matrices(orders, keys, anchor_dates=customers.set_index('customer_id')['registration_date'])
+    cohorts.retention.iloc[:, :13]
+
+    keys = cohort_keys(customers, 'acquisition_channel')
+    cohorts = cohort_matrices(orders, keys, granularity='week')  # anchored on first order
+"""
+
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = ('week', 'month', 'quarter')
+
+# 1970-01-01 was a Thursday; weeks start on Monday
+_WEEK_SHIFT_DAYS = 3
+_NS_PER_DAY = 86_400 * 10**9
+
+# period_index() of a missing date
+NO_PERIOD = np.iinfo(np.int64).min
+
+NEW_YEAR_LABELS = {True: 'New Year (Jan-Feb)', False: 'Other Months'}
+
+
+def period_index(dates, granularity='month'):
+    """Integer period numbers (weeks/months/quarters since 1970) for datetime64
+    values; NaT becomes NO_PERIOD"""
+    values = np.asarray(dates, dtype='datetime64[ns]')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}, not {granularity!r}")
+    missing = np.isnat(values)
+    any_missing = missing.any()
+    # Integer division is much faster than a datetime64[D] conversion
+    days = values.view(np.int64) // _NS_PER_DAY
+    # Masking copies every value, so only do it when there is a NaT
+    present = days[~missing] if any_missing else days
+    if len(present) == 0:
+        return np.full(len(days), NO_PERIOD, dtype=np.int64)
+    if granularity == 'week':
+        periods = (present + _WEEK_SHIFT_DAYS) // 7
+    else:
+        # Calendar months via a per-day lookup table: datetime64[M] conversion
+        # of every value is several times slower than indexing
+        first_day = present.min()
+        day_months = np.arange(first_day, present.max() + 1).astype('datetime64[D]').astype('datetime64[M]')
+        lookup = day_months.astype(np.int64)
+        if granularity == 'quarter':
+            lookup //= 3
+        present -= first_day
+        periods = lookup.take(present)
+    if not any_missing:
+        return periods
+    result = np.full(len(days), NO_PERIOD, dtype=np.int64)
+    result[~missing] = periods
+    return result
+
+
+def period_labels(indices, granularity='month'):
+    """pandas Periods for integer period numbers (inverse of period_index)"""
+    indices = np.asarray(indices, dtype=np.int64)
+    if granularity == 'week':
+        starts = (indices * 7 - _WEEK_SHIFT_DAYS).astype('datetime64[D]')
+        return pd.DatetimeIndex(starts).to_period('W')
+    if granularity == 'month':
+        return pd.PeriodIndex.from_ordinals(indices, freq='M')
+    if granularity == 'quarter':
+        return pd.PeriodIndex.from_ordinals(indices, freq='Q')
+    raise ValueError(f"granularity must be one of {GRANULARITIES}, not {granularity!r}")
+
+
+def cohort_keys(customers, by='signup', granularity='month', subscriptions=None):
+    """Cohort label per customer (Series indexed by customer_id).
+
+    by: 'signup'    period of registration_date
+        'new_year'  New Year (Jan-Feb) vs Other Months signups
+        'plan'      plan_type of the customer's first subscription
+        any other customers column, e.g. 'acquisition_channel'
+    """
+    customer_ids = customers['customer_id'].to_numpy()
+    if by == 'signup':
+        labels = period_labels(period_index(customers['registration_date'], granularity), granularity)
+        return pd.Series(labels, index=customer_ids, name='cohort')
+    if by == 'new_year':
+        labels = customers['is_new_year_signup'].astype(bool).map(NEW_YEAR_LABELS)
+        return pd.Series(labels.to_numpy(), index=customer_ids, name='cohort')
+    if by == 'plan':
+        if subscriptions is None:
+            raise ValueError("by='plan' needs the subscriptions table")
+        first = subscriptions.sort_values('start_date', kind='stable').drop_duplicates('customer_id')
+        plans = first.set_index('customer_id')['plan_type']
+        return pd.Series(plans.reindex(customer_ids).to_numpy(), index=customer_ids, name='cohort')
+    return pd.Series(customers[by].to_numpy(), index=customer_ids, name='cohort')
+
+
+class CohortMatrices:
+    """Result of cohort_matrices(): DataFrames indexed by cohort, columns = offset"""
+
+    def __init__(self, active, sizes, revenue, granularity):
+        self.granularity = granularity
+        self.active = active
+        self.sizes = sizes
+        self.revenue = revenue
+        denominators = sizes.where(sizes > 0)
+        self.retention = active.div(denominators, axis=0) * 100
+        self.revenue_per_customer = revenue.div(denominators, axis=0)
+
+    @property
+    def cumulative_revenue(self):
+        return self.revenue_per_customer.cumsum(axis=1)
+
+
+def cohort_matrices(orders, keys, anchor_dates=None, granularity='month', value_column='order_total',
+                    size='first_period'):
+    """Cohort x offset matrices from orders (customer_id, order_date, value_column).
+
+    keys          cohort label per customer (Series indexed by customer_id,
+                  see cohort_keys); orders of other customers are ignored
+    anchor_dates  offset 0 per customer (Series indexed by customer_id);
+                  None anchors each customer on their first order
+    size          'first_period' (active at offset 0) or 'all' (every
+                  customer in the cohort)
+    """
+    if size not in ('first_period', 'all'):
+        raise ValueError(f"size must be 'first_period' or 'all', not {size!r}")
+
+    key_index = pd.Index(keys.index)
+    customer = key_index.get_indexer(orders['customer_id'])
+    known = customer >= 0
+    customer = customer[known]
+    order_period = period_index(orders['order_date'], granularity)[known]
+    values = orders[value_column].to_numpy(dtype=float)[known] if value_column else None
+
+    n_customers = len(key_index)
+    if anchor_dates is None:
+        anchor = np.full(n_customers, np.iinfo(np.int64).max)
+        np.minimum.at(anchor, customer, order_period)
+    else:
+        anchor = period_index(anchor_dates.reindex(key_index), granularity)
+
+    order_anchor = anchor[customer]
+    offset = order_period - np.where(order_anchor == NO_PERIOD, 0, order_anchor)
+    in_range = (offset >= 0) & (order_anchor != NO_PERIOD) & (order_period != NO_PERIOD)
+    customer, offset = customer[in_range], offset[in_range]
+    if values is not None:
+        values = values[in_range]
+
+    cohort_codes, cohort_labels = pd.factorize(keys, sort=True)
+    n_cohorts = len(cohort_labels)
+    n_offsets = int(offset.max()) + 1 if len(offset) else 0
+    cells = n_cohorts * n_offsets
+
+    # Distinct (customer, offset) pairs -> active customers per cell
+    pairs = np.unique(customer.astype(np.int64) * max(n_offsets, 1) + offset)
+    pair_customer, pair_offset = np.divmod(pairs, max(n_offsets, 1))
+    pair_cohort = cohort_codes[pair_customer]
+    valid = pair_cohort >= 0
+    active = np.bincount(pair_cohort[valid] * n_offsets + pair_offset[valid],
+                         minlength=cells).reshape(n_cohorts, n_offsets)
+
+    order_cohort = cohort_codes[customer]
+    valid = order_cohort >= 0
+    if values is not None:
+        revenue = np.bincount(order_cohort[valid] * n_offsets + offset[valid],
+                              weights=values[valid], minlength=cells).reshape(n_cohorts, n_offsets)
+    else:
+        revenue = np.zeros((n_cohorts, n_offsets))
+
+    if size == 'first_period':
+        sizes = active[:, 0] if n_offsets else np.zeros(n_cohorts, dtype=np.int64)
+    else:
+        sizes = np.bincount(cohort_codes[cohort_codes >= 0], minlength=n_cohorts)
+    return build_matrices(cohort_labels, active, revenue, sizes, granularity)
+
+
+def build_matrices(cohort_labels, active, revenue, sizes, granularity='month'):
+    """CohortMatrices from dense cohort x offset arrays (one row per label);
+    cohorts with no activity are dropped"""
+    n_offsets = active.shape[1]
+    # Keep cohorts with any activity; empty cells are NaN, as in a pivot
+    seen = active.sum(axis=1) > 0
+    index = pd.Index(cohort_labels[seen], name='cohort')
+    columns = pd.RangeIndex(n_offsets, name='period_index')
+    empty = active[seen] == 0
+    active_df = pd.DataFrame(np.where(empty, np.nan, active[seen]), index=index, columns=columns)
+    revenue_df = pd.DataFrame(np.where(empty, np.nan, revenue[seen]), index=index, columns=columns)
+    sizes = pd.Series(sizes[seen], index=index, name='cohort_size')
+    return CohortMatrices(active_df, sizes, revenue_df, granularity)
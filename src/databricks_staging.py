@@ -0,0 +1,296 @@
+"""
+NourishBox Databricks Staged Loading
+Parquet staging + COPY INTO bulk path for sync_to_databricks.py
+
+Instead of sending INSERT ... VALUES text, each batch (up to
+DEFAULT_ROWS_PER_FILE rows) is:
+1. Written locally as compressed Parquet files (ParquetCopyLoader)
+2. Uploaded to a staging location (a Stager)
+3. Loaded with a single COPY INTO, casting each column to the Delta
+   table's type
+4. Removed from the staging location
+
+A table is loaded as several COPY INTOs (one per batch) rather than staging
+all of its files and issuing one at the end, because the batch is the unit
+LoadEngine and the ledger work in:
+- Memory and local disk stay bounded to the batches in flight; the table is
+  never materialized whole
+- Batches upload and COPY concurrently under the adaptive limit, and a
+  throttled or failed batch is retried on its own
+- A committed batch is recorded in the ledger and skipped by a rerun; with
+  one COPY INTO per table, an interrupted load would have to start over
+Each batch COPYs from its own run directory, so no statement re-lists the
+files of earlier batches, and at 250,000 rows per batch the extra round
+trips are few (4 for a 1M-row table).
+
+Stagers are pluggable. Both expose location(), upload() and remove():
+- VolumeStager: a Unity Catalog volume, using the SQL connector's PUT/REMOVE
+  commands (requires staging_allowed_local_path on connect)
+- LocalStager: a local directory, for development and tests
+
+LocalSqlEndpoint is a stand-in for the Databricks SQL endpoint backed by an
+in-memory DuckDB database (pip install duckdb). It accepts the statements
+DatabricksSink sends (Delta DDL, COPY INTO from Parquet, MERGE INTO,
+DESCRIBE, COUNT; layout maintenance such as OPTIMIZE is a no-op) so the
+whole staged path can be exercised without a workspace. Each cursor has its
+own DuckDB connection, so worker threads can share one endpoint:
+
+    sink = DatabricksSink(loader='copy', stager=LocalStager('/tmp/stage'),
+                          endpoint=LocalSqlEndpoint()).connect()
+    LoadEngine(sink, workers=4).run(tables)
+"""
+
+import os
+import re
+import shutil
+import time
+import uuid
+
+from sql_literals import unescape_string
+
+DEFAULT_ROWS_PER_FILE = 250000
+DEFAULT_COMPRESSION = 'zstd'
+
+
+class LocalStager:
+    """Stages Parquet files in a local directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def location(self, table_name, run_id):
+        return os.path.join(self.root, table_name, run_id)
+
+    def upload(self, local_file, location):
+        os.makedirs(location, exist_ok=True)
+        shutil.copy2(local_file, os.path.join(location, os.path.basename(local_file)))
+
+    def remove(self, location, file_names):
+        shutil.rmtree(location, ignore_errors=True)
+
+
+class VolumeStager:
+    """Stages Parquet files in a Unity Catalog volume (/Volumes/catalog/schema/volume)"""
+
+    def __init__(self, cursor, volume_path):
+        self.cursor = cursor
+        self.volume_path = volume_path.rstrip('/')
+
+    def location(self, table_name, run_id):
+        return f"{self.volume_path}/{table_name}/{run_id}"
+
+    def upload(self, local_file, location):
+        remote = f"{location}/{os.path.basename(local_file)}"
+        self.cursor.execute(f"PUT '{local_file}' INTO '{remote}' OVERWRITE")
+
+    def remove(self, location, file_names):
+        for name in file_names:
+            try:
+                self.cursor.execute(f"REMOVE '{location}/{name}'")
+            except Exception as e:
+                print(f"   ⚠️  Could not remove staged file {name}: {e}")
+
+
+class ParquetCopyLoader:
+    """Writes a DataFrame as Parquet, stages it and runs one COPY INTO"""
+
+    def __init__(self, cursor, stager, work_dir, rows_per_file=DEFAULT_ROWS_PER_FILE,
+                 compression=DEFAULT_COMPRESSION):
+        self.cursor = cursor
+        self.stager = stager
+        self.work_dir = work_dir
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+
+    def write_parquet(self, df, table_name, run_id):
+        """Split df into compressed Parquet files. Returns local paths."""
+        directory = os.path.join(self.work_dir, table_name, run_id)
+        os.makedirs(directory, exist_ok=True)
+
+        paths = []
+        for part, start in enumerate(range(0, len(df), self.rows_per_file)):
+            path = os.path.join(directory, f"{table_name}_{part:05d}.parquet")
+            df.iloc[start:start + self.rows_per_file].to_parquet(
+                path, index=False, compression=self.compression
+            )
+            paths.append(path)
+        return paths
+
+    def copy_into_sql(self, full_table_name, location, column_types):
+        """COPY INTO statement casting every column to the table's type"""
+        select_list = ',\n                   '.join(
+            f"CAST(`{col}` AS {col_type}) AS `{col}`"
+            for col, col_type in column_types.items()
+        )
+        return f"""
+            COPY INTO {full_table_name}
+            FROM (SELECT {select_list}
+                  FROM '{location}')
+            FILEFORMAT = PARQUET
+            COPY_OPTIONS ('mergeSchema' = 'false')
+        """
+
+    def load(self, df, full_table_name, table_name, column_types):
+        """Stage df and COPY it into full_table_name.
+
+        Returns a dict with files, bytes, prepare_s (Parquet write),
+        send_s (upload + COPY INTO) and affected (rows loaded).
+        """
+        run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        columns = [col for col in df.columns if col in column_types]
+        column_types = {col: column_types[col] for col in columns}
+
+        prepare_start = time.perf_counter()
+        paths = self.write_parquet(df[columns], table_name, run_id)
+        prepare_s = time.perf_counter() - prepare_start
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+
+        location = self.stager.location(table_name, run_id)
+        file_names = [os.path.basename(path) for path in paths]
+        send_start = time.perf_counter()
+        try:
+            for path in paths:
+                self.stager.upload(path, location)
+            self.cursor.execute(self.copy_into_sql(full_table_name, location, column_types))
+            row = self.cursor.fetchone()
+            affected = int(row[0]) if row is not None and row[0] is not None else len(df)
+        finally:
+            self.stager.remove(location, file_names)
+            shutil.rmtree(os.path.join(self.work_dir, table_name, run_id), ignore_errors=True)
+        send_s = time.perf_counter() - send_start
+
+        return {
+            'files': len(paths),
+            'bytes': total_bytes,
+            'prepare_s': prepare_s,
+            'send_s': send_s,
+            'affected': affected,
+        }
+
+
+# ============================================================================
+# Stand-in SQL endpoint (local testing)
+# ============================================================================
+
+COPY_INTO_PATTERN = re.compile(
+    r"COPY\s+INTO\s+(?P<table>\S+)\s+FROM\s+\(SELECT\s+(?P<select>.*?)\s+FROM\s+'(?P<location>[^']+)'\s*\)"
+    r"\s+FILEFORMAT\s*=\s*PARQUET",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+MERGE_INTO_PATTERN = re.compile(r"^\s*MERGE\s+INTO\s+(?P<table>\S+)", re.IGNORECASE)
+
+
+DELTA_ONLY_CLAUSES = [
+    re.compile(r'\bUSING\s+DELTA\b', re.IGNORECASE),
+    re.compile(r'\b(PARTITIONED|CLUSTER)\s+BY\s*\([^)]*\)', re.IGNORECASE),
+    re.compile(r'\bTBLPROPERTIES\s*\([^)]*\)', re.IGNORECASE),
+]
+
+# One Spark string literal, or several adjacent ones (which Spark concatenates)
+STRING_LITERALS = re.compile(r"'(?:\\.|[^'\\])*'(?:\s*'(?:\\.|[^'\\])*')*", re.DOTALL)
+STRING_LITERAL = re.compile(r"'((?:\\.|[^'\\])*)'", re.DOTALL)
+
+
+DELTA_ONLY_STATEMENTS = re.compile(
+    r'^\s*(OPTIMIZE\b|ANALYZE\s+TABLE\b|ALTER\s+TABLE\s+\S+\s+(CLUSTER\s+BY|SET\s+TBLPROPERTIES))',
+    re.IGNORECASE
+)
+
+
+class LocalSqlCursor:
+    """DB-API cursor translating Databricks SQL to DuckDB"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.db = endpoint.db.cursor()
+        self._rows = []
+        self.rowcount = -1
+
+    def _translate(self, statement):
+        for pattern in DELTA_ONLY_CLAUSES:
+            statement = pattern.sub('', statement)
+
+        # String literals are read with Spark's backslash escapes and
+        # rewritten in standard SQL; only the text around them is translated
+        parts = []
+        position = 0
+        for literal in STRING_LITERALS.finditer(statement):
+            parts.append(self._translate_code(statement[position:literal.start()]))
+            value = ''.join(unescape_string(body)
+                            for body in STRING_LITERAL.findall(literal.group()))
+            parts.append("'" + value.replace("'", "''") + "'")
+            position = literal.end()
+        parts.append(self._translate_code(statement[position:]))
+        return ''.join(parts)
+
+    def _translate_code(self, code):
+        code = code.replace('`', '"')
+        return code.replace(f"{self.endpoint.catalog}.", '')
+
+    def execute(self, statement, parameters=None):
+        db = self.db
+        if DELTA_ONLY_STATEMENTS.search(statement):
+            # Layout maintenance has no DuckDB equivalent
+            self._rows = []
+            self.rowcount = 0
+            return
+
+        merge = MERGE_INTO_PATTERN.search(statement)
+        if merge:
+            # DuckDB returns one count; Databricks reports (num_affected_rows,
+            # num_updated_rows, num_deleted_rows, num_inserted_rows)
+            target = self._translate(merge.group('table'))
+            before = db.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0]
+            affected = db.execute(self._translate(statement)).fetchone()[0]
+            inserted = db.execute(f"SELECT COUNT(*) FROM {target}").fetchone()[0] - before
+            self._rows = [(affected, affected - inserted, 0, inserted)]
+            self.rowcount = affected
+            return
+
+        match = COPY_INTO_PATTERN.search(statement)
+        if match:
+            # COPY INTO -> INSERT ... SELECT over read_parquet(); Databricks
+            # reports (num_affected_rows, num_inserted_rows)
+            location = os.path.join(match.group('location'), '*.parquet')
+            query = self._translate(
+                f"INSERT INTO {match.group('table')} "
+                f"SELECT {match.group('select')} FROM read_parquet('{location}')"
+            )
+            inserted = db.execute(query).fetchone()[0]
+            self._rows = [(inserted, inserted, 0)]
+            self.rowcount = inserted
+            return
+
+        result = db.execute(self._translate(statement), parameters)
+        try:
+            self._rows = result.fetchall()
+        except Exception:
+            self._rows = []
+        self.rowcount = len(self._rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self.db.close()
+
+
+class LocalSqlEndpoint:
+    """In-memory DuckDB stand-in for a Databricks SQL warehouse connection"""
+
+    def __init__(self, catalog='main'):
+        import duckdb  # Optional dependency, only needed for local testing
+        self.catalog = catalog
+        self.db = duckdb.connect()
+
+    def cursor(self):
+        return LocalSqlCursor(self)
+
+    def close(self):
+        self.db.close()
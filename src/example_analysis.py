@@ -1,34 +1,114 @@
 """
 NourishBox - Example Analysis Script
 Demonstrates basic exploratory data analysis on the generated data
+
+Every number printed below is declared in METRICS and computed in one go
+by metric_engine (one pass per table and dimension, tables in parallel);
+the section functions only format the results.
 """
 
 import pandas as pd
-import numpy as np
-from datetime import datetime
 
-# Configuration
-DATA_DIR = 'data/nourishbox'
+from metric_engine import Metric, compute
+from nourishbox import load
+from survival_engine import lifetime_summary, segment_keys, subscription_durations
+
+REVIEW_CATEGORIES = ['meal_quality_rating', 'beauty_quality_rating', 'delivery_rating', 'value_rating']
+
+METRICS = [
+    # Customers
+    Metric('customers', 'customers', 'count'),
+    Metric('age_mean', 'customers', 'mean', 'age'),
+    Metric('age_median', 'customers', 'median', 'age'),
+    Metric('age_min', 'customers', 'min', 'age'),
+    Metric('age_max', 'customers', 'max', 'age'),
+    Metric('genders', 'customers', 'value_counts', 'gender'),
+    Metric('channels', 'customers', 'value_counts', 'acquisition_channel'),
+    Metric('referrals', 'customers', 'count', 'referred_by_customer_id'),
+    Metric('cohort_sizes', 'customers', 'count', by='registration_date:month'),
+
+    # Subscriptions
+    Metric('subscriptions', 'subscriptions', 'count'),
+    Metric('plans', 'subscriptions', 'value_counts', 'plan_name'),
+    Metric('subscription_statuses', 'subscriptions', 'value_counts', 'status'),
+    Metric('price_mean', 'subscriptions', 'mean', 'monthly_price'),
+    Metric('price_median', 'subscriptions', 'median', 'monthly_price'),
+
+    # Revenue
+    Metric('revenue', 'orders', 'sum', 'order_total'),
+    Metric('order_value_mean', 'orders', 'mean', 'order_total'),
+    Metric('monthly_revenue', 'orders', 'sum', 'order_total', by='order_date:month'),
+    Metric('revenue_by_status', 'orders', 'sum', 'order_total', by='delivery_status'),
+
+    # Churn
+    Metric('churned', 'churn', 'count'),
+    Metric('churn_days_mean', 'churn', 'mean', 'subscription_length_days'),
+    Metric('churn_reasons', 'churn', 'value_counts', 'churn_reason'),
+    Metric('retention_attempts', 'churn', 'sum', 'attempted_retention'),
+    Metric('retention_successes', 'churn', 'sum', 'retention_offer_accepted'),
+
+    # Reviews
+    Metric('reviews', 'reviews', 'count'),
+    Metric('rating_mean', 'reviews', 'mean', 'rating'),
+    Metric('rating_median', 'reviews', 'median', 'rating'),
+    Metric('ratings', 'reviews', 'value_counts', 'rating'),
+    Metric('recommends', 'reviews', 'sum', 'would_recommend'),
+    Metric('meal_quality_rating', 'reviews', 'mean', 'meal_quality_rating'),
+    Metric('beauty_quality_rating', 'reviews', 'mean', 'beauty_quality_rating'),
+    Metric('delivery_rating', 'reviews', 'mean', 'delivery_rating'),
+    Metric('value_rating', 'reviews', 'mean', 'value_rating'),
+
+    # Marketing
+    Metric('campaigns', 'campaigns', 'count'),
+    Metric('budget', 'campaigns', 'sum', 'budget'),
+    Metric('conversions', 'campaigns', 'sum', 'conversions'),
+    Metric('type_budget', 'campaigns', 'sum', 'budget', by='campaign_type'),
+    Metric('type_conversions', 'campaigns', 'sum', 'conversions', by='campaign_type'),
+    Metric('type_conversion_rate', 'campaigns', 'mean', 'conversion_rate', by='campaign_type'),
+    Metric('type_cpa', 'campaigns', 'mean', 'cost_per_acquisition', by='campaign_type'),
+
+    # Products
+    Metric('items', 'order_items', 'count'),
+    Metric('product_types', 'order_items', 'value_counts', 'product_type'),
+    Metric('products', 'order_items', 'value_counts', 'product_name'),
+    Metric('item_categories', 'order_items', 'value_counts', 'product_category', by='product_type'),
+]
 
 def load_data():
     """Load all datasets"""
     print("Loading datasets...")
 
     data = {
-        'customers': pd.read_csv(f'{DATA_DIR}/customers.csv'),
-        'preferences': pd.read_csv(f'{DATA_DIR}/customer_preferences.csv'),
-        'subscriptions': pd.read_csv(f'{DATA_DIR}/subscriptions.csv'),
-        'orders': pd.read_csv(f'{DATA_DIR}/orders.csv'),
-        'order_items': pd.read_csv(f'{DATA_DIR}/order_items.csv'),
-        'churn': pd.read_csv(f'{DATA_DIR}/churn_events.csv'),
-        'reviews': pd.read_csv(f'{DATA_DIR}/reviews.csv'),
-        'campaigns': pd.read_csv(f'{DATA_DIR}/marketing_campaigns.csv'),
-        'products': pd.read_csv(f'{DATA_DIR}/product_catalog.csv')
+        'customers': load('customers'),
+        'preferences': load('customer_preferences'),
+        'subscriptions': load('subscriptions'),
+        'orders': load('orders'),
+        'order_items': load('order_items'),
+        'churn': load('churn_events'),
+        'reviews': load('reviews'),
+        'campaigns': load('marketing_campaigns'),
+        'products': load('product_catalog')
     }
 
     print("✓ All datasets loaded successfully\n")
     return data
 
+def compute_metrics(data):
+    """Compute every metric of METRICS"""
+    results = compute(METRICS, data)
+    print(f"✓ Computed {results.summary()}\n")
+    return results
+
+def subscription_lifetimes(data):
+    """Censoring-aware lifetime of all subscriptions (survival_engine)"""
+    subscriptions = data['subscriptions']
+    observed = subscription_durations(subscriptions, data['churn'])
+    keys = segment_keys(subscriptions, data['customers'], 'all')
+    summary = lifetime_summary(observed, keys, subscriptions['monthly_price'])
+    lifetime = summary.iloc[0].copy()
+    lifetime['horizon_days'] = summary.attrs['horizon_days']
+    return lifetime
+
 def basic_overview(data):
     """Print basic overview of the dataset"""
     print("="*70)
@@ -39,124 +119,113 @@ def basic_overview(data):
         print(f"{name.upper():20s}: {len(df):,} rows × {len(df.columns)} columns")
     print()
 
-def customer_analysis(data):
+def customer_analysis(m):
     """Analyze customer demographics and acquisition"""
     print("="*70)
     print("CUSTOMER ANALYSIS")
     print("="*70)
 
-    customers = data['customers']
-
     # Age distribution
     print(f"\nAge Distribution:")
-    print(f"  Average age: {customers['age'].mean():.1f} years")
-    print(f"  Median age: {customers['age'].median():.0f} years")
-    print(f"  Age range: {customers['age'].min()}-{customers['age'].max()}")
+    print(f"  Average age: {m['age_mean']:.1f} years")
+    print(f"  Median age: {m['age_median']:.0f} years")
+    print(f"  Age range: {m['age_min']}-{m['age_max']}")
 
     # Gender distribution
     print(f"\nGender Distribution:")
-    print(customers['gender'].value_counts())
+    print(m['genders'])
 
     # Acquisition channels
     print(f"\nTop Acquisition Channels:")
-    channel_counts = customers['acquisition_channel'].value_counts()
-    for channel, count in channel_counts.head(5).items():
-        pct = (count / len(customers)) * 100
+    for channel, count in m['channels'].head(5).items():
+        pct = (count / m['customers']) * 100
         print(f"  {channel:20s}: {count:4d} ({pct:5.1f}%)")
 
     # Referrals
-    referrals = customers['referred_by_customer_id'].notna().sum()
+    referrals = m['referrals']
     print(f"\nReferral Program:")
-    print(f"  Customers from referrals: {referrals} ({referrals/len(customers)*100:.1f}%)")
+    print(f"  Customers from referrals: {referrals} ({referrals/m['customers']*100:.1f}%)")
     print()
 
-def subscription_analysis(data):
+def subscription_analysis(m):
     """Analyze subscription patterns"""
     print("="*70)
     print("SUBSCRIPTION ANALYSIS")
     print("="*70)
 
-    subscriptions = data['subscriptions']
-
     # Subscription plan distribution
     print(f"\nSubscription Plans (All Time):")
-    plan_counts = subscriptions['plan_name'].value_counts()
-    for plan, count in plan_counts.items():
-        pct = (count / len(subscriptions)) * 100
+    for plan, count in m['plans'].items():
+        pct = (count / m['subscriptions']) * 100
         print(f"  {plan:25s}: {count:4d} ({pct:5.1f}%)")
 
     # Active vs Cancelled
     print(f"\nSubscription Status:")
-    status_counts = subscriptions['status'].value_counts()
-    for status, count in status_counts.items():
-        pct = (count / len(subscriptions)) * 100
+    for status, count in m['subscription_statuses'].items():
+        pct = (count / m['subscriptions']) * 100
         print(f"  {status:15s}: {count:4d} ({pct:5.1f}%)")
 
     # Average subscription price
     print(f"\nPricing Metrics:")
-    print(f"  Average monthly price: ${subscriptions['monthly_price'].mean():.2f}")
-    print(f"  Median monthly price: ${subscriptions['monthly_price'].median():.2f}")
+    print(f"  Average monthly price: ${m['price_mean']:.2f}")
+    print(f"  Median monthly price: ${m['price_median']:.2f}")
     print()
 
-def revenue_analysis(data):
+def revenue_analysis(m):
     """Analyze revenue metrics"""
     print("="*70)
     print("REVENUE ANALYSIS")
     print("="*70)
 
-    orders = data['orders']
-
-    # Convert date
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-
     # Total revenue
-    total_revenue = orders['order_total'].sum()
+    total_revenue = m['revenue']
     print(f"\nTotal Revenue: ${total_revenue:,.2f}")
 
     # Average order value
-    print(f"Average Order Value: ${orders['order_total'].mean():.2f}")
+    print(f"Average Order Value: ${m['order_value_mean']:.2f}")
 
     # Monthly revenue trend
-    monthly_revenue = orders.groupby(orders['order_date'].dt.to_period('M'))['order_total'].sum()
     print(f"\nRevenue by Month (Last 6 months):")
-    for period, revenue in monthly_revenue.tail(6).items():
+    for period, revenue in m['monthly_revenue'].tail(6).items():
         print(f"  {period}: ${revenue:>10,.2f}")
 
     # Revenue by delivery status
     print(f"\nRevenue by Delivery Status:")
     for status in ['delivered', 'delayed', 'cancelled', 'pending']:
-        rev = orders[orders['delivery_status'] == status]['order_total'].sum()
+        rev = m['revenue_by_status'].get(status, 0.0)
         pct = (rev / total_revenue) * 100
         print(f"  {status:15s}: ${rev:>12,.2f} ({pct:5.1f}%)")
     print()
 
-def churn_analysis(data):
+def churn_analysis(m, lifetime):
     """Analyze customer churn"""
     print("="*70)
     print("CHURN ANALYSIS")
     print("="*70)
 
-    churn = data['churn']
-    customers = data['customers']
-
     # Overall churn rate
-    churn_rate = (len(churn) / len(customers)) * 100
+    churn_rate = (m['churned'] / m['customers']) * 100
     print(f"\nOverall Churn Rate: {churn_rate:.1f}%")
 
     # Average subscription length before churn
-    avg_days = churn['subscription_length_days'].mean()
+    avg_days = m['churn_days_mean']
     print(f"Average Subscription Length (churned): {avg_days:.0f} days ({avg_days/30:.1f} months)")
+    median_days = lifetime['median_lifetime_days']
+    if pd.notna(median_days):
+        print(f"Median Subscription Lifetime (incl. active): {median_days:.0f} days ({median_days/30:.1f} months)")
+    else:
+        # Over half the subscriptions outlast the longest observed duration
+        print(f"Median Subscription Lifetime (incl. active): not reached (> {lifetime['horizon_days']:,.0f} days)")
 
     # Churn reasons
     print(f"\nTop Churn Reasons:")
-    reason_counts = churn['churn_reason'].value_counts()
-    for reason, count in reason_counts.head(7).items():
-        pct = (count / len(churn)) * 100
+    for reason, count in m['churn_reasons'].head(7).items():
+        pct = (count / m['churned']) * 100
         print(f"  {reason:25s}: {count:4d} ({pct:5.1f}%)")
 
     # Retention attempts
-    retention_attempted = churn['attempted_retention'].sum()
-    retention_success = churn['retention_offer_accepted'].sum()
+    retention_attempted = m['retention_attempts']
+    retention_success = m['retention_successes']
     if retention_attempted > 0:
         success_rate = (retention_success / retention_attempted) * 100
         print(f"\nRetention Program:")
@@ -165,130 +234,105 @@ def churn_analysis(data):
         print(f"  Success rate: {success_rate:.1f}%")
     print()
 
-def review_analysis(data):
+def review_analysis(m):
     """Analyze customer reviews"""
     print("="*70)
     print("REVIEW ANALYSIS")
     print("="*70)
 
-    reviews = data['reviews']
+    reviews = m['reviews']
 
     # Overall rating
     print(f"\nOverall Metrics:")
-    print(f"  Total reviews: {len(reviews):,}")
-    print(f"  Average rating: {reviews['rating'].mean():.2f}/5.0")
-    print(f"  Median rating: {reviews['rating'].median():.0f}/5.0")
+    print(f"  Total reviews: {reviews:,}")
+    print(f"  Average rating: {m['rating_mean']:.2f}/5.0")
+    print(f"  Median rating: {m['rating_median']:.0f}/5.0")
 
     # Rating distribution
     print(f"\nRating Distribution:")
     for rating in range(5, 0, -1):
-        count = (reviews['rating'] == rating).sum()
-        pct = (count / len(reviews)) * 100
+        count = m['ratings'].get(rating, 0)
+        pct = (count / reviews) * 100
         stars = '★' * rating + '☆' * (5 - rating)
         print(f"  {stars} ({rating}): {count:5d} ({pct:5.1f}%)")
 
     # Would recommend
-    would_recommend = reviews['would_recommend'].sum()
-    rec_pct = (would_recommend / len(reviews)) * 100
+    would_recommend = m['recommends']
+    rec_pct = (would_recommend / reviews) * 100
     print(f"\nWould Recommend: {would_recommend:,} ({rec_pct:.1f}%)")
 
     # Category ratings
     print(f"\nCategory Ratings (Average):")
-    for category in ['meal_quality_rating', 'beauty_quality_rating', 'delivery_rating', 'value_rating']:
-        avg = reviews[category].mean()
-        print(f"  {category.replace('_', ' ').title():25s}: {avg:.2f}/5.0")
+    for category in REVIEW_CATEGORIES:
+        print(f"  {category.replace('_', ' ').title():25s}: {m[category]:.2f}/5.0")
     print()
 
-def marketing_analysis(data):
+def marketing_analysis(m):
     """Analyze marketing campaign performance"""
     print("="*70)
     print("MARKETING CAMPAIGN ANALYSIS")
     print("="*70)
 
-    campaigns = data['campaigns']
-
     # Total spend and conversions
-    total_budget = campaigns['budget'].sum()
-    total_conversions = campaigns['conversions'].sum()
+    total_budget = m['budget']
+    total_conversions = m['conversions']
     avg_cpa = total_budget / total_conversions if total_conversions > 0 else 0
 
     print(f"\nOverall Performance:")
-    print(f"  Total campaigns: {len(campaigns)}")
+    print(f"  Total campaigns: {m['campaigns']}")
     print(f"  Total budget: ${total_budget:,.2f}")
     print(f"  Total conversions: {total_conversions:,}")
     print(f"  Average CPA: ${avg_cpa:.2f}")
 
     # Best performing campaign types
     print(f"\nPerformance by Campaign Type:")
-    campaign_perf = campaigns.groupby('campaign_type').agg({
-        'budget': 'sum',
-        'conversions': 'sum',
-        'conversion_rate': 'mean',
-        'cost_per_acquisition': 'mean'
-    }).round(2)
-
-    for camp_type, row in campaign_perf.iterrows():
+    for camp_type in m['type_budget'].index:
         print(f"\n  {camp_type.upper()}:")
-        print(f"    Budget: ${row['budget']:,.2f}")
-        print(f"    Conversions: {row['conversions']:.0f}")
-        print(f"    Avg Conversion Rate: {row['conversion_rate']:.2f}%")
-        print(f"    Avg CPA: ${row['cost_per_acquisition']:.2f}")
+        print(f"    Budget: ${round(m['type_budget'][camp_type], 2):,.2f}")
+        print(f"    Conversions: {m['type_conversions'][camp_type]:.0f}")
+        print(f"    Avg Conversion Rate: {round(m['type_conversion_rate'][camp_type], 2):.2f}%")
+        print(f"    Avg CPA: ${round(m['type_cpa'][camp_type], 2):.2f}")
     print()
 
-def product_analysis(data):
+def product_analysis(m):
     """Analyze product performance"""
     print("="*70)
     print("PRODUCT ANALYSIS")
     print("="*70)
 
-    order_items = data['order_items']
-    products = data['products']
-
     # Product type distribution
     print(f"\nProduct Type Distribution:")
-    type_counts = order_items['product_type'].value_counts()
-    for ptype, count in type_counts.items():
-        pct = (count / len(order_items)) * 100
+    for ptype, count in m['product_types'].items():
+        pct = (count / m['items']) * 100
         print(f"  {ptype.title():15s}: {count:7,} ({pct:5.1f}%)")
 
     # Top products by volume
     print(f"\nTop 10 Products (by volume):")
-    top_products = order_items['product_name'].value_counts().head(10)
-    for i, (product, count) in enumerate(top_products.items(), 1):
+    for i, (product, count) in enumerate(m['products'].head(10).items(), 1):
         print(f"  {i:2d}. {product:40s}: {count:5,}")
 
     # Meal categories
-    meal_items = order_items[order_items['product_type'] == 'meal']
+    meal_items = m['product_types'].get('meal', 0)
     print(f"\nMeal Categories:")
-    meal_cats = meal_items['product_category'].value_counts()
-    for cat, count in meal_cats.items():
-        pct = (count / len(meal_items)) * 100
+    for cat, count in m['item_categories'].loc['meal'].items():
+        pct = (count / meal_items) * 100
         print(f"  {cat:15s}: {count:6,} ({pct:5.1f}%)")
 
     # Beauty categories
-    beauty_items = order_items[order_items['product_type'] == 'beauty']
+    beauty_items = m['product_types'].get('beauty', 0)
     print(f"\nBeauty Categories:")
-    beauty_cats = beauty_items['product_category'].value_counts()
-    for cat, count in beauty_cats.items():
-        pct = (count / len(beauty_items)) * 100
+    for cat, count in m['item_categories'].loc['beauty'].items():
+        pct = (count / beauty_items) * 100
         print(f"  {cat:20s}: {count:5,} ({pct:5.1f}%)")
     print()
 
-def cohort_preview(data):
+def cohort_preview(m):
     """Preview cohort analysis opportunity"""
     print("="*70)
     print("COHORT ANALYSIS PREVIEW")
     print("="*70)
 
-    customers = data['customers']
-    subscriptions = data['subscriptions']
-
-    # Convert dates
-    customers['registration_date'] = pd.to_datetime(customers['registration_date'])
-    customers['cohort'] = customers['registration_date'].dt.to_period('M')
-
-    # Count by cohort
-    cohort_sizes = customers.groupby('cohort').size()
+    cohort_sizes = m['cohort_sizes']
 
     print(f"\nCustomer Cohorts (Monthly):")
     print(f"\nFirst 6 cohorts:")
@@ -310,19 +354,21 @@ def main():
     print("╚" + "="*68 + "╝")
     print()
 
-    # Load data
+    # Load data and compute every metric
     data = load_data()
+    metrics = compute_metrics(data)
+    lifetime = subscription_lifetimes(data)
 
-    # Run analyses
+    # Print analyses
     basic_overview(data)
-    customer_analysis(data)
-    subscription_analysis(data)
-    revenue_analysis(data)
-    churn_analysis(data)
-    review_analysis(data)
-    marketing_analysis(data)
-    product_analysis(data)
-    cohort_preview(data)
+    customer_analysis(metrics)
+    subscription_analysis(metrics)
+    revenue_analysis(metrics)
+    churn_analysis(metrics, lifetime)
+    review_analysis(metrics)
+    marketing_analysis(metrics)
+    product_analysis(metrics)
+    cohort_preview(metrics)
 
     print("="*70)
     print("ANALYSIS COMPLETE")
@@ -0,0 +1,332 @@
+"""
+NourishBox DuckDB Export
+Writes the whole star schema into one DuckDB file for offline analysis
+
+The file contains:
+- every table from table_schemas.py with typed columns and primary keys
+- fact tables physically sorted by their usual filter columns (date, then
+  customer/order), so DuckDB's min/max zone maps skip most row groups
+- secondary indexes for customer and order lookups
+- pre-computed rollups:
+    rollup_monthly_revenue   orders, customers and revenue per month, with MRR
+    rollup_cohort_retention  customers ordering N months after signup, per cohort
+    rollup_mrr_movements     new / expansion / contraction / churned /
+                             reactivation MRR per month
+
+The export is built in <output>.tmp and renamed when complete, so readers
+never see a half-written file. Power BI (DuckDB ODBC driver), the DuckDB CLI
+and Python (duckdb.connect(path, read_only=True)) can all open it.
+
+Prerequisites:
+    pip install duckdb
+
+Usage:
+    python src/export_duckdb.py                 # from data/nourishbox/*.csv
+    python src/export_duckdb.py --generate      # generate in-process, no CSVs
+    python src/export_duckdb.py --output reports/nourishbox.duckdb
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from load_engine import typed_frame
+from sinks import DuckDBSink
+from table_schemas import CSV_FILES, DATA_DIR, SORT_KEYS, TABLE_CONFIGS, table_columns
+
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, 'nourishbox_analytics.duckdb')
+
+# (table, column) lookups that are not primary keys
+SECONDARY_INDEXES = [
+    ('subscriptions', 'customer_id'),
+    ('subscription_monthly', 'customer_id'),
+    ('orders', 'customer_id'),
+    ('order_items', 'order_id'),
+    ('reviews', 'order_id'),
+    ('churn_events', 'customer_id'),
+]
+
+# Rollups, built in this order once all tables are loaded
+ROLLUPS = {
+    # Same measures as v_monthly_revenue (supabase_views.sql) and
+    # visualize_mrr.calculate_mrr
+    'rollup_monthly_revenue': """
+        WITH revenue AS (
+            SELECT
+                year_month,
+                COUNT(DISTINCT customer_id) AS unique_customers,
+                COUNT(*) AS total_orders,
+                SUM(order_total) AS total_revenue,
+                AVG(order_total) AS avg_order_value,
+                SUM(CASE WHEN delivery_status = 'delivered'
+                    THEN order_total ELSE 0 END) AS delivered_revenue,
+                COUNT(CASE WHEN delivery_status = 'delivered' THEN 1 END) AS delivered_orders,
+                SUM(CASE WHEN delivery_status IN ('delivered', 'pending', 'delayed')
+                    THEN order_total ELSE 0 END) AS actual_revenue
+            FROM orders
+            GROUP BY year_month
+        ),
+        mrr AS (
+            SELECT
+                strftime(month_start, '%Y-%m') AS year_month,
+                SUM(mrr) AS mrr,
+                COUNT(DISTINCT CASE WHEN status IN ('active', 'upgraded')
+                    THEN subscription_id END) AS active_subscribers
+            FROM subscription_monthly
+            GROUP BY 1
+        )
+        SELECT
+            COALESCE(r.year_month, m.year_month) AS year_month,
+            COALESCE(r.unique_customers, 0) AS unique_customers,
+            COALESCE(r.total_orders, 0) AS total_orders,
+            COALESCE(r.total_revenue, 0) AS total_revenue,
+            r.avg_order_value,
+            COALESCE(r.delivered_revenue, 0) AS delivered_revenue,
+            COALESCE(r.delivered_orders, 0) AS delivered_orders,
+            COALESCE(r.actual_revenue, 0) AS actual_revenue,
+            COALESCE(m.mrr, 0) AS mrr,
+            COALESCE(m.active_subscribers, 0) AS active_subscribers
+        FROM revenue r
+        FULL OUTER JOIN mrr m ON m.year_month = r.year_month
+        ORDER BY year_month
+    """,
+
+    # Same definition as cohort_analysis.py: cohort = registration month,
+    # retention = customers ordering in month N / customers ordering in month 0
+    'rollup_cohort_retention': """
+        WITH customer_periods AS (
+            SELECT DISTINCT
+                o.customer_id,
+                date_trunc('month', c.registration_date) AS cohort_month,
+                date_diff('month', date_trunc('month', c.registration_date),
+                          date_trunc('month', o.order_date)) AS period_index
+            FROM orders o
+            JOIN customers c ON c.customer_id = o.customer_id
+        ),
+        cohort_counts AS (
+            SELECT cohort_month, period_index, COUNT(*) AS customers
+            FROM customer_periods
+            GROUP BY cohort_month, period_index
+        )
+        SELECT
+            CAST(k.cohort_month AS DATE) AS cohort_month,
+            k.period_index,
+            k.customers,
+            s.customers AS cohort_size,
+            100.0 * k.customers / s.customers AS retention
+        FROM cohort_counts k
+        JOIN cohort_counts s ON s.cohort_month = k.cohort_month AND s.period_index = 0
+        ORDER BY cohort_month, period_index
+    """,
+
+    # Customer-level MRR month over month. A customer absent from a month has
+    # MRR 0 there; returning after a gap counts as reactivation.
+    'rollup_mrr_movements': """
+        WITH customer_mrr AS (
+            SELECT customer_id, month_start, SUM(mrr) AS mrr
+            FROM subscription_monthly
+            GROUP BY customer_id, month_start
+        ),
+        months AS (
+            SELECT DISTINCT month_start FROM subscription_monthly
+        ),
+        first_month AS (
+            SELECT customer_id, MIN(month_start) AS first_month
+            FROM customer_mrr WHERE mrr > 0
+            GROUP BY customer_id
+        ),
+        grid AS (
+            SELECT f.customer_id, m.month_start, f.first_month,
+                   COALESCE(c.mrr, 0) AS mrr
+            FROM first_month f
+            JOIN months m ON m.month_start >= f.first_month
+            LEFT JOIN customer_mrr c
+                ON c.customer_id = f.customer_id AND c.month_start = m.month_start
+        ),
+        changes AS (
+            SELECT customer_id, month_start, first_month, mrr,
+                   COALESCE(LAG(mrr) OVER (PARTITION BY customer_id ORDER BY month_start), 0)
+                       AS previous_mrr
+            FROM grid
+        )
+        SELECT
+            CAST(month_start AS DATE) AS month_start,
+            SUM(CASE WHEN month_start = first_month THEN mrr ELSE 0 END) AS new_mrr,
+            SUM(CASE WHEN previous_mrr > 0 AND mrr > previous_mrr
+                THEN mrr - previous_mrr ELSE 0 END) AS expansion_mrr,
+            SUM(CASE WHEN previous_mrr > 0 AND mrr > 0 AND mrr < previous_mrr
+                THEN previous_mrr - mrr ELSE 0 END) AS contraction_mrr,
+            SUM(CASE WHEN previous_mrr > 0 AND mrr = 0 THEN previous_mrr ELSE 0 END)
+                AS churned_mrr,
+            SUM(CASE WHEN month_start > first_month AND previous_mrr = 0 AND mrr > 0
+                THEN mrr ELSE 0 END) AS reactivation_mrr,
+            SUM(mrr) AS ending_mrr,
+            COUNT(CASE WHEN mrr > 0 THEN 1 END) AS paying_customers
+        FROM changes
+        GROUP BY month_start
+        ORDER BY month_start
+    """,
+}
+
+
+def order_by(table_name):
+    keys = SORT_KEYS.get(table_name)
+    return f" ORDER BY {', '.join(keys)}" if keys else ''
+
+
+class DuckDBExporter:
+    """Builds the analytical DuckDB file"""
+
+    def __init__(self, output):
+        self.output = output
+        self.build_path = output + '.tmp'
+        self.sink = None
+        self.db = None
+        self.row_counts = {}
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+        for path in (self.build_path, self.build_path + '.wal'):
+            if os.path.exists(path):
+                os.remove(path)
+        self.sink = DuckDBSink(self.build_path).connect()
+        self.db = self.sink.cursor
+
+    def create_table(self, table_name, columns):
+        column_types = table_columns(table_name, columns)
+        self.sink.create_table(table_name, column_types, TABLE_CONFIGS.get(table_name))
+        return column_types
+
+    def load_csv(self, table_name, csv_path):
+        """Load a CSV with DuckDB's parallel reader, typed from the schema"""
+        import pandas as pd
+        column_types = self.create_table(table_name,
+                                         pd.read_csv(csv_path, nrows=0).columns.tolist())
+        types_sql = ', '.join(f"'{col}': '{sql_type}'" for col, sql_type in column_types.items())
+        self.db.execute(
+            f'INSERT INTO "{table_name}" SELECT * FROM read_csv(?, header = true, '
+            f'columns = {{{types_sql}}}){order_by(table_name)}', [csv_path]
+        )
+        self.finish_table(table_name)
+
+    def load_frame(self, table_name, df):
+        """Load a DataFrame (e.g. straight from the generator)"""
+        column_types = self.create_table(table_name, list(df.columns))
+        frame = typed_frame(df.copy(), column_types)
+        columns = ', '.join(f'"{col}"' for col in frame.columns)
+        self.db.register('export_frame', frame)
+        try:
+            self.db.execute(f'INSERT INTO "{table_name}" ({columns}) '
+                            f'SELECT {columns} FROM export_frame{order_by(table_name)}')
+        finally:
+            self.db.unregister('export_frame')
+        self.finish_table(table_name)
+
+    def finish_table(self, table_name):
+        count = self.db.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        self.row_counts[table_name] = count
+        sort_note = f" (sorted by {', '.join(SORT_KEYS[table_name])})" if table_name in SORT_KEYS else ''
+        print(f"   ✓ {table_name:24s} {count:>10,} rows{sort_note}")
+
+    def build_indexes(self):
+        for table_name, column in SECONDARY_INDEXES:
+            if table_name not in self.row_counts:
+                continue
+            self.db.execute(f'CREATE INDEX "idx_{table_name}_{column}" '
+                            f'ON "{table_name}" ("{column}")')
+            print(f"   ✓ idx_{table_name}_{column}")
+
+    def build_rollups(self):
+        for name, query in ROLLUPS.items():
+            start = time.perf_counter()
+            try:
+                self.db.execute(f'CREATE TABLE "{name}" AS {query}')
+            except Exception as e:
+                raise RuntimeError(f"could not build {name}: {e}") from e
+            count = self.db.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            self.row_counts[name] = count
+            print(f"   ✓ {name:24s} {count:>10,} rows ({time.perf_counter() - start:.2f}s)")
+
+    def finish(self):
+        """Checkpoint and move the finished file into place"""
+        self.db.execute("CHECKPOINT")
+        self.sink.close()
+        os.replace(self.build_path, self.output)
+
+    def abort(self):
+        if self.sink is not None:
+            self.sink.close()
+        for path in (self.build_path, self.build_path + '.wal'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Export NourishBox to a single DuckDB file')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, metavar='PATH',
+                       help=f'DuckDB file to write (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--generate', action='store_true',
+                       help='Generate the data in-process instead of reading the CSVs')
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("NOURISHBOX → DUCKDB EXPORT")
+    print("="*70)
+
+    if not args.generate and not os.path.exists(DATA_DIR):
+        print(f"\n❌ Data directory not found: {DATA_DIR}")
+        print("   Run 'python generate_nourishbox_data.py' first, or use --generate")
+        sys.exit(1)
+
+    exporter = DuckDBExporter(args.output)
+    start = time.perf_counter()
+    try:
+        exporter.open()
+
+        print("\n📦 Loading tables...")
+        if args.generate:
+            # Imported here: the generator seeds its random state on import
+            from generate_nourishbox_data import generate_tables
+            for table_name, df in generate_tables():
+                exporter.load_frame(table_name, df)
+        else:
+            for csv_file in CSV_FILES:
+                csv_path = os.path.join(DATA_DIR, csv_file)
+                if not os.path.exists(csv_path):
+                    print(f"⚠️  Skipping {csv_file} (not found)")
+                    continue
+                exporter.load_csv(csv_file.replace('.csv', ''), csv_path)
+
+        print("\n🔎 Building indexes...")
+        exporter.build_indexes()
+
+        print("\n📊 Building rollups...")
+        exporter.build_rollups()
+
+        exporter.finish()
+
+    except KeyboardInterrupt:
+        exporter.abort()
+        print("\n\n⚠️  Export interrupted by user")
+        sys.exit(1)
+
+    except Exception as e:
+        exporter.abort()
+        print(f"\n❌ Export failed: {e}")
+        sys.exit(1)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print("\n" + "="*70)
+    print(f"✅ Exported {len(exporter.row_counts)} tables to {args.output} "
+          f"({size_mb:,.1f} MB) in {time.perf_counter() - start:.1f}s")
+    print("="*70)
+    print("\nQuery it with:")
+    print(f"   duckdb {args.output} \"SELECT * FROM rollup_monthly_revenue\"")
+    print(f"   python -c \"import duckdb; print(duckdb.connect('{args.output}', "
+          f"read_only=True).sql('FROM rollup_mrr_movements'))\"\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,11 @@ import random
 from faker import Faker
 import os
 
+from table_schemas import (
+    ACQUISITION_CHANNELS, CAMPAIGN_TYPES, CHURN_REASONS, GENDERS, MEAL_TIMES,
+    OFFER_TYPES, SKIN_TYPES, TARGET_AUDIENCES, typed_table
+)
+
 # Set random seeds for reproducibility
 np.random.seed(42)
 random.seed(42)
@@ -43,10 +48,8 @@ SUBSCRIPTION_PLANS = {
     'combo_deluxe': {'name': 'Combo Deluxe', 'price': 119.99, 'meals_per_week': 5, 'items_per_month': 6, 'category': 'combo'}
 }
 
-ACQUISITION_CHANNELS = ['organic_search', 'paid_social', 'referral', 'instagram', 'facebook_ads', 'google_ads', 'partnership', 'direct']
 DIETARY_PREFERENCES = ['none', 'vegetarian', 'vegan', 'gluten_free', 'keto', 'paleo', 'dairy_free', 'low_carb']
 BEAUTY_PREFERENCES = ['anti_aging', 'acne_treatment', 'hydration', 'natural_organic', 'fragrance_free', 'vegan_beauty', 'luxury']
-SKIN_TYPES = ['normal', 'oily', 'dry', 'combination', 'sensitive']
 
 MEAL_PRODUCTS = [
     # Protein-based meals
@@ -109,12 +112,6 @@ BEAUTY_PRODUCTS = [
     {'name': 'Jade Facial Roller', 'category': 'wellness', 'cost': 12.00, 'retail_value': 28.00, 'tags': ['luxury', 'anti_aging']},
 ]
 
-CHURN_REASONS = [
-    'too_expensive', 'moving', 'product_quality', 'variety_lacking',
-    'dietary_needs_changed', 'prefer_competitor', 'financial_reasons',
-    'delivery_issues', 'too_much_food', 'lifestyle_change', 'other'
-]
-
 def create_output_directory():
     """Create output directory if it doesn't exist"""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -239,7 +236,7 @@ def generate_customers(num_customers):
                 k=1
             )[0],
             'age': random.randint(22, 65),
-            'gender': random.choice(['Female', 'Male', 'Non-binary', 'Prefer not to say']),
+            'gender': random.choice(GENDERS),
             'zip_code': fake.zipcode(),
             'city': fake.city(),
             'state': fake.state_abbr(),
@@ -283,7 +280,7 @@ def generate_customer_preferences(customers_df):
             'skin_type': random.choice(SKIN_TYPES),
             'allergies': ', '.join(random.sample(['nuts', 'soy', 'shellfish', 'eggs', 'none'],
                                                 k=random.choices([1, 2, 0], weights=[10, 5, 85], k=1)[0])) or 'none',
-            'preferred_meal_time': random.choice(['lunch', 'dinner', 'both']),
+            'preferred_meal_time': random.choice(MEAL_TIMES),
             'household_size': random.choices([1, 2, 3, 4, 5], weights=[25, 35, 20, 15, 5], k=1)[0]
         }
         preferences.append(pref)
@@ -756,7 +753,6 @@ def generate_marketing_campaigns():
     """Generate marketing campaign data"""
     campaigns = []
 
-    campaign_types = ['email', 'social_media', 'influencer', 'paid_ads', 'referral_bonus', 'partnership']
 
     # Generate campaigns throughout the period
     current_date = START_DATE
@@ -767,7 +763,7 @@ def generate_marketing_campaigns():
         num_campaigns = random.randint(1, 3)
 
         for _ in range(num_campaigns):
-            campaign_type = random.choice(campaign_types)
+            campaign_type = random.choice(CAMPAIGN_TYPES)
             start = current_date + timedelta(days=random.randint(0, 28))
             duration = random.randint(7, 30)
             end = start + timedelta(days=duration)
@@ -784,8 +780,8 @@ def generate_marketing_campaigns():
                 'start_date': start.strftime('%Y-%m-%d'),
                 'end_date': end.strftime('%Y-%m-%d'),
                 'budget': round(budget, 2),
-                'target_audience': random.choice(['new_customers', 'existing_customers', 'churned_customers', 'all']),
-                'offer_type': random.choice(['discount_percent', 'discount_fixed', 'free_trial', 'free_gift', 'none']),
+                'target_audience': random.choice(TARGET_AUDIENCES),
+                'offer_type': random.choice(OFFER_TYPES),
                 'offer_value': random.choice([10, 15, 20, 25, 30, 50]) if random.random() > 0.3 else 0,
                 'impressions': random.randint(10000, 500000),
                 'clicks': random.randint(100, 20000),
@@ -851,51 +847,83 @@ def generate_product_catalog():
     print(f"✓ Generated product catalog with {len(df)} products")
     return df
 
-def generate_all_data():
-    """Main function to generate all datasets"""
-    print("\n" + "="*60)
-    print("NourishBox Data Generation Started")
-    print("="*60 + "\n")
+def generate_tables():
+    """Generate every dataset, yielding (table_name, DataFrame) as each one is ready.
 
-    create_output_directory()
-
-    # Generate all datasets
+    Tables come out in dependency order, so a consumer (CSV writer or the
+    streaming loader in load_engine.py) can start on a table while the
+    next one is being generated. Each yielded frame carries the registry
+    types (table_schemas.typed_table): parsed dates and categoricals, with
+    every categorical value checked against its domain.
+    """
     print("\n[1/13] Generating customers...")
     customers_df = generate_customers(NUM_CUSTOMERS)
+    yield 'customers', typed_table('customers', customers_df)
 
     print("\n[2/13] Generating customer preferences...")
     preferences_df = generate_customer_preferences(customers_df)
+    yield 'customer_preferences', typed_table('customer_preferences', preferences_df)
 
     print("\n[3/13] Generating subscriptions...")
     subscriptions_df = generate_subscriptions(customers_df)
+    yield 'subscriptions', typed_table('subscriptions', subscriptions_df)
 
     print("\n[4/13] Generating marketing campaigns...")
     campaigns_df = generate_marketing_campaigns()
+    yield 'marketing_campaigns', typed_table('marketing_campaigns', campaigns_df)
 
     print("\n[5/13] Generating orders...")
     orders_df = generate_orders(subscriptions_df, campaigns_df)
+    yield 'orders', typed_table('orders', orders_df)
 
     print("\n[6/13] Generating product catalog...")
     products_df = generate_product_catalog()
+    yield 'product_catalog', typed_table('product_catalog', products_df)
 
     print("\n[7/13] Generating order items...")
     order_items_df = generate_order_items(orders_df, subscriptions_df, preferences_df, products_df)
+    yield 'order_items', typed_table('order_items', order_items_df)
 
     print("\n[8/13] Generating churn events...")
     churn_df = generate_churn_events(subscriptions_df)
+    yield 'churn_events', typed_table('churn_events', churn_df)
 
     print("\n[9/13] Generating reviews...")
     reviews_df = generate_reviews(orders_df, subscriptions_df)
+    yield 'reviews', typed_table('reviews', reviews_df)
 
     print("\n[10/13] Generating plan dimension...")
-    plan_dim_df = generate_plan_dimension()
+    yield 'plan_dim', typed_table('plan_dim', generate_plan_dimension())
 
     print("\n[11/13] Generating date dimension...")
-    date_dim_df = generate_date_dimension(START_DATE, END_DATE)
+    yield 'date_dim', typed_table('date_dim', generate_date_dimension(START_DATE, END_DATE))
 
     print("\n[12/13] Generating subscription monthly snapshots...")
-    subscription_monthly_df = generate_subscription_monthly(subscriptions_df)
+    yield 'subscription_monthly', typed_table('subscription_monthly', generate_subscription_monthly(subscriptions_df))
+
 
+def generate_all_data():
+    """Main function to generate all datasets"""
+    print("\n" + "="*60)
+    print("NourishBox Data Generation Started")
+    print("="*60 + "\n")
+
+    create_output_directory()
+
+    # Generate all datasets
+    tables = dict(generate_tables())
+    customers_df = tables['customers']
+    preferences_df = tables['customer_preferences']
+    subscriptions_df = tables['subscriptions']
+    orders_df = tables['orders']
+    order_items_df = tables['order_items']
+    churn_df = tables['churn_events']
+    reviews_df = tables['reviews']
+    campaigns_df = tables['marketing_campaigns']
+    products_df = tables['product_catalog']
+    plan_dim_df = tables['plan_dim']
+    date_dim_df = tables['date_dim']
+    subscription_monthly_df = tables['subscription_monthly']
 
     # Save all datasets
     print("\n[13/13] Saving datasets to CSV files...")
@@ -0,0 +1,593 @@
+"""
+NourishBox Load Engine
+One bulk-load path for every target database
+
+LoadEngine does the work that is the same for every target:
+1. Reads each CSV in chunks of --batch-rows (constant memory)
+2. Converts columns to their declared types (table_schemas.py)
+3. Sends each chunk as one batch through a sink (sinks.py), with up to
+   --workers batches in flight on separate connections
+4. Retries failed batches with exponential backoff
+5. Records parse/prepare/send timings in SyncTelemetry
+
+With adaptive=True the number of batches in flight is not fixed: it starts
+at half the workers and adapts (AIMD) - +1/limit per fast batch, -1 when
+latency rises well above the best observed, halved on throttling errors.
+
+Targets:
+    postgres    Supabase/PostgreSQL (SUPABASE_* in .env)
+    databricks  Databricks SQL warehouse (DATABRICKS_* in .env)
+    duckdb      local DuckDB file (default: data/nourishbox/nourishbox.duckdb)
+    sqlite      local SQLite file (default: data/nourishbox/nourishbox.sqlite)
+
+With --stream the data is not read from CSVs at all: the generator
+(generate_nourishbox_data.generate_tables) runs on a background thread and
+hands each finished DataFrame over a bounded queue, so generating one table
+overlaps loading the previous one and the CSV write/parse round trip is
+skipped. Wall time approaches max(generate, load) instead of their sum.
+
+Every target gets the same tables, primary keys and column types.
+sync_to_supabase.py and sync_to_databricks.py load through this engine too;
+their target-specific steps (bulk index rebuilds, reporting views, MERGE,
+Delta layouts, the resume ledger) are sink hooks, see sinks.py.
+
+Usage:
+    python src/load_engine.py --target duckdb
+    python src/load_engine.py --target sqlite --clear --report reports/
+    python src/load_engine.py --target postgres --workers 4 --batch-rows 5000
+    python src/load_engine.py --target duckdb --stream --clear
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from sinks import SINKS
+from sync_telemetry import SyncTelemetry
+from table_schemas import CSV_FILES, DATA_DIR, TABLE_CONFIGS, logical_type, table_columns
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_BATCH_ROWS = 10000
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 1.0
+# Generated tables waiting to be loaded in --stream mode
+DEFAULT_QUEUE_DEPTH = 2
+
+# Error text that means "slow down" rather than "this batch is wrong"
+THROTTLE_MARKERS = (
+    '429', 'too many requests', 'temporarily_unavailable', 'resource_exhausted',
+    'throttl', 'rate limit',
+)
+
+# Latency above this multiple of the best observed counts as congestion
+LATENCY_TOLERANCE = 2.0
+
+LOCAL_DATABASES = {
+    'duckdb': os.path.join(DATA_DIR, 'nourishbox.duckdb'),
+    'sqlite': os.path.join(DATA_DIR, 'nourishbox.sqlite'),
+}
+
+# --method values per target; the first is the default
+TARGET_METHODS = {
+    'postgres': SINKS['postgres'].METHODS,
+    'databricks': SINKS['databricks'].LOADERS,
+}
+
+TRUE_STRINGS = ('true', 't', '1', '1.0', 'yes', 'y')
+
+
+def read_options(column_types):
+    """read_csv dtype for the text columns, so IDs and zip codes stay verbatim"""
+    return {col: str for col, sql_type in column_types.items()
+            if logical_type(sql_type) == 'string'}
+
+
+def is_throttling_error(error):
+    text = str(error).lower()
+    return any(marker in text for marker in THROTTLE_MARKERS)
+
+
+class AdaptiveLimit:
+    """Additive-increase / multiplicative-decrease in-flight limit"""
+
+    def __init__(self, initial, minimum, maximum):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.best_latency = None
+
+    def on_success(self, latency):
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if latency > self.best_latency * LATENCY_TOLERANCE:
+            self.limit = max(self.minimum, self.limit - 1)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(self.minimum, self.limit / 2)
+
+    @property
+    def slots(self):
+        return int(self.limit)
+
+
+class LoadError(Exception):
+    """Raised when batches were not loaded or a sink could not finish the load"""
+
+
+def typed_frame(df, column_types):
+    """Convert a chunk's columns to their declared types (in place)"""
+    for col in df.columns:
+        kind = logical_type(column_types.get(col, 'TEXT'))
+        series = df[col]
+        if kind == 'date':
+            df[col] = pd.to_datetime(series, errors='coerce')
+        elif kind == 'integer':
+            df[col] = pd.to_numeric(series, errors='coerce').round().astype('Int64')
+        elif kind == 'decimal':
+            df[col] = pd.to_numeric(series, errors='coerce').astype(float)
+        elif kind == 'boolean' and series.dtype != bool:
+            values = series.astype(str).str.strip().str.lower().isin(TRUE_STRINGS)
+            df[col] = values.astype('boolean').mask(series.isna())
+    return df
+
+
+class LoadEngine:
+    """Loads CSV files into a sink in parallel, retried, instrumented batches"""
+
+    def __init__(self, sink, telemetry=None, batch_rows=DEFAULT_BATCH_ROWS, workers=1,
+                 retries=DEFAULT_RETRIES, backoff_seconds=DEFAULT_BACKOFF_SECONDS,
+                 adaptive=False):
+        self.sink = sink
+        self.telemetry = telemetry or SyncTelemetry(sink.name)
+        self.batch_rows = batch_rows
+        self.workers = max(1, workers) if sink.parallel_writes else 1
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.failures = []
+
+        # Without a limit, up to two batches wait per worker
+        self.limit = None
+        if adaptive and self.workers > 1:
+            self.limit = AdaptiveLimit(self.workers // 2, 1, self.workers)
+        self.peak_in_flight = 0
+        self.throttled = 0
+
+        self._local = threading.local()
+        self._worker_sinks = []
+        self._lock = threading.Lock()
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='load-engine')
+
+    def _worker_sink(self):
+        """This thread's sink (one connection per worker thread)"""
+        if self._executor is None:
+            return self.sink
+        sink = getattr(self._local, 'sink', None)
+        if sink is None:
+            sink = self.sink.worker()
+            with self._lock:
+                self._worker_sinks.append(sink)
+            self._local.sink = sink
+        return sink
+
+    def prepare_tables(self, tables, clear=False):
+        """Create every table (and clear it if requested)"""
+        print("\n" + "="*70)
+        print("CREATING TABLES")
+        print("="*70)
+
+        for table_name, csv_path in tables:
+            csv_columns = pd.read_csv(csv_path, nrows=0).columns.tolist()
+            self.prepare_table(table_name, csv_columns, clear)
+
+    def prepare_table(self, table_name, columns, clear=False):
+        """Create one table with the given columns (and clear it if requested)"""
+        self.sink.create_table(table_name, table_columns(table_name, columns),
+                               TABLE_CONFIGS.get(table_name))
+        print(f"   ✓ Table '{table_name}' ready{self.sink.describe_table(table_name)}")
+        if clear:
+            self.sink.clear_table(table_name)
+            print(f"   🗑️  Cleared table '{table_name}'")
+
+    def write_batch(self, table_name, df, column_types):
+        """Send one batch, retrying with exponential backoff.
+
+        Returns (inserted, retries, error, send_s).
+        """
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            attempt_start = time.perf_counter()
+            try:
+                inserted = self._worker_sink().write_batch(table_name, df, column_types)
+                self._adapt(latency=time.perf_counter() - attempt_start)
+                return inserted, attempt, None, time.perf_counter() - start
+            except Exception as e:
+                if is_throttling_error(e):
+                    self._adapt(throttled=True)
+                if attempt == self.retries:
+                    return 0, attempt, str(e).strip(), time.perf_counter() - start
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+
+    def _adapt(self, latency=None, throttled=False):
+        """Feed a batch outcome to the adaptive in-flight limit"""
+        if self.limit is None:
+            return
+        with self._lock:
+            if throttled:
+                self.throttled += 1
+                self.limit.on_throttle()
+            else:
+                self.limit.on_success(latency)
+
+    def load_table(self, csv_file, table_name):
+        """Load one CSV file. Returns rows inserted."""
+        print(f"\n📤 Loading {csv_file} → {table_name}")
+        telemetry = self.telemetry
+        telemetry.start_table(table_name)
+
+        csv_columns = pd.read_csv(csv_file, nrows=0).columns.tolist()
+        column_types = table_columns(table_name, csv_columns)
+        reader = pd.read_csv(csv_file, dtype=read_options(column_types),
+                             chunksize=self.batch_rows)
+        return self.load_chunks(table_name, reader, column_types, os.path.getsize(csv_file),
+                                source=csv_file)
+
+    def load_frame(self, table_name, df):
+        """Load an in-memory DataFrame (e.g. straight from the generator)"""
+        print(f"\n📤 Loading {len(df):,} generated rows → {table_name}")
+        self.telemetry.start_table(table_name)
+        column_types = table_columns(table_name, list(df.columns))
+        chunks = (df.iloc[start:start + self.batch_rows].copy()
+                  for start in range(0, len(df), self.batch_rows))
+        return self.load_chunks(table_name, chunks, column_types)
+
+    def load_chunks(self, table_name, chunks, column_types, file_bytes=0, source=None):
+        """Convert and send each chunk as one batch. Returns rows inserted."""
+        telemetry = self.telemetry
+        rows_read = 0
+        inserted_total = 0
+        skipped = 0
+        pending = {}
+
+        def record(batch_num, rows, size, prepare_s, result):
+            nonlocal inserted_total
+            inserted, retries, error, send_s = result
+            telemetry.record_batch(table_name, batch_num, rows, size, prepare_s, send_s,
+                                   retries=retries, affected_rows=inserted, error=error)
+            self.sink.batch_finished(table_name, batch_num, inserted, retries, error)
+            if error:
+                self.failures.append((table_name, batch_num, retries + 1, error))
+                print(f"\n   ⚠️  Error loading {table_name} batch {batch_num}: {error}")
+            else:
+                inserted_total += inserted
+
+        self.sink.begin_table(table_name, source, self.batch_rows)
+        batch_num = 0
+        try:
+            while True:
+                parse_start = time.perf_counter()
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                rows_read += len(chunk)
+                batch_num += 1
+                telemetry.record_parse(table_name, rows_read, time.perf_counter() - parse_start,
+                                       file_bytes)
+
+                prepare_start = time.perf_counter()
+                df = typed_frame(chunk, column_types)
+                if self.sink.skip_batch(table_name, batch_num, rows_read - len(df), df):
+                    skipped += 1
+                    continue
+                size = int(df.memory_usage(index=False).sum())
+                prepare_s = time.perf_counter() - prepare_start
+
+                if self._executor is None:
+                    record(batch_num, len(df), size, prepare_s,
+                           self.write_batch(table_name, df, column_types))
+                else:
+                    # Bounded queue: the adaptive limit, or two batches per worker
+                    while len(pending) >= (self.limit.slots if self.limit else self.workers * 2):
+                        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record(*pending.pop(future), future.result())
+                    future = self._executor.submit(self.write_batch, table_name, df,
+                                                   column_types)
+                    pending[future] = (batch_num, len(df), size, prepare_s)
+                    self.peak_in_flight = max(self.peak_in_flight,
+                                              sum(not f.done() for f in pending))
+
+                if not telemetry.live:
+                    print(f"   ⏳ Progress: {batch_num} batches ({rows_read:,} rows)", end='\r')
+
+            for future in list(pending):
+                record(*pending.pop(future), future.result())
+        except BaseException:
+            # Drop queued batches and let the ones already sending finish, so
+            # the sink's end_load() hook does not race them
+            for future in pending:
+                future.cancel()
+            wait(list(pending))
+            raise
+
+        if not telemetry.live:
+            print()  # New line after progress
+        if skipped:
+            print(f"   ↻ Resumed: {skipped} of {batch_num} batches already loaded")
+        try:
+            inserted_total = self.sink.end_table(table_name, inserted_total)
+        except Exception as e:
+            error = str(e).strip()
+            self.failures.append((table_name, batch_num + 1, 1, error))
+            print(f"   ⚠️  Error finishing {table_name}: {error}")
+            inserted_total = 0
+        print(f"   ✓ Inserted: {inserted_total:,} of {rows_read:,} rows")
+        telemetry.finish_table(table_name, inserted_total)
+        return inserted_total
+
+    def run(self, tables, clear=False):
+        """Create, clear and load (table_name, csv_path) pairs.
+
+        The sink's end_load() hook runs even if a load fails or is
+        interrupted; LoadError is raised if it reports a failure (e.g. an
+        index that could not be rebuilt).
+        """
+        table_names = [table_name for table_name, _ in tables]
+        self.prepare_tables(tables, clear)
+        self.sink.begin_load(table_names)
+
+        print("\n" + "="*70)
+        print("LOADING DATA")
+        print("="*70)
+        try:
+            for table_name, csv_path in tables:
+                self.load_table(csv_path, table_name)
+        finally:
+            restored = self.sink.end_load(table_names)
+
+        if self.limit is not None:
+            print(f"   Concurrency: peak {self.peak_in_flight} in flight over "
+                  f"{len(self._worker_sinks)} connections, final limit "
+                  f"{self.limit.limit:.2f}, {self.throttled} throttled")
+        if not restored:
+            raise LoadError("Could not restore what the load changed (see above)")
+
+    def check_failures(self):
+        """Print the batches that were not loaded and raise LoadError if any"""
+        if not self.failures:
+            return
+        print("="*70)
+        print("FAILED BATCHES")
+        print("="*70)
+        for table_name, batch_num, attempts, error in self.failures:
+            print(f"  {table_name:22s} #{batch_num:<5d} {attempts} attempt(s): {error[:80]}")
+        print("="*70)
+        raise LoadError(f"{len(self.failures)} batch(es) were not loaded")
+
+    def verify(self, table_names):
+        """Print row counts per table"""
+        print("\n" + "="*70)
+        print("VERIFICATION SUMMARY")
+        print("="*70)
+
+        total_rows = 0
+        for table_name in table_names:
+            try:
+                count = self.sink.row_count(table_name)
+                total_rows += count
+                print(f"  {table_name:30s}: {count:>10,} rows")
+            except Exception:
+                print(f"  {table_name:30s}: {'ERROR':>10s}")
+
+        print("="*70)
+        print(f"  {'TOTAL RECORDS':30s}: {total_rows:>10,}")
+        print("="*70 + "\n")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        for sink in self._worker_sinks:
+            if sink is not self.sink:
+                sink.close()
+        self._worker_sinks = []
+
+
+def stream_tables(engine, frames, tables=None, clear=False, queue_depth=DEFAULT_QUEUE_DEPTH):
+    """Load (table_name, DataFrame) pairs while the iterator is still producing them.
+
+    The iterator runs on a background thread; at most queue_depth frames
+    wait in memory. Tables not in `tables` (if given) are generated but not
+    loaded. Returns (generate_s, load_s).
+    """
+    handoff = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    timings = {'generate_s': 0.0}
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            iterator = iter(frames)
+            while not stop.is_set():
+                start = time.perf_counter()
+                item = next(iterator, None)
+                timings['generate_s'] += time.perf_counter() - start
+                put(item)
+                if item is None:
+                    return
+        except Exception as e:
+            put(e)
+
+    producer = threading.Thread(target=produce, name='generator', daemon=True)
+    producer.start()
+
+    load_s = 0.0
+    try:
+        while True:
+            item = handoff.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            table_name, df = item
+            if tables is not None and table_name not in tables:
+                continue
+            start = time.perf_counter()
+            engine.prepare_table(table_name, list(df.columns), clear)
+            engine.load_frame(table_name, df)
+            load_s += time.perf_counter() - start
+    finally:
+        stop.set()
+        producer.join(timeout=1)
+
+    return timings['generate_s'], load_s
+
+
+def open_sink(target, database=None, method=None, workers=1):
+    """Build and connect the sink for a --target"""
+    sink_class = SINKS[target]
+    if target in LOCAL_DATABASES:
+        sink = sink_class(database or LOCAL_DATABASES[target])
+    elif target == 'postgres':
+        sink = sink_class(method=method or TARGET_METHODS[target][0], connections=workers)
+    elif target == 'databricks':
+        sink = sink_class(loader=method or TARGET_METHODS[target][0])
+    else:
+        sink = sink_class()
+    return sink.connect()
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Load NourishBox CSVs into any supported database')
+    parser.add_argument('--target', choices=sorted(SINKS), required=True,
+                       help='Database to load into')
+    parser.add_argument('--database', metavar='PATH',
+                       help='Database file for duckdb/sqlite '
+                            f"(default: {LOCAL_DATABASES['duckdb']} / {LOCAL_DATABASES['sqlite']})")
+    parser.add_argument('--method', choices=sorted(set().union(*TARGET_METHODS.values())),
+                       help='Bulk path: postgres copy (default), values or async; '
+                            'databricks insert (default) or copy (Parquet + COPY INTO)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Generate the data in-process and load it directly (no CSVs)')
+    parser.add_argument('--queue-depth', type=int, default=DEFAULT_QUEUE_DEPTH,
+                       help=f'Generated tables buffered ahead of the loader in --stream mode '
+                            f'(default: {DEFAULT_QUEUE_DEPTH})')
+    parser.add_argument('--tables', nargs='+', choices=list(TABLE_CONFIGS), metavar='TABLE',
+                       help='Load only these tables (default: all)')
+    parser.add_argument('--clear', action='store_true',
+                       help='Clear existing data before loading (fresh start)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                       help=f'Rows per batch (default: {DEFAULT_BATCH_ROWS})')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Batches in flight on separate connections (default: 1; '
+                            'sqlite always uses 1)')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                       help=f'Retries per failed batch (default: {DEFAULT_RETRIES})')
+    parser.add_argument('--report', metavar='DIR',
+                       help='Write per-table/per-batch load telemetry (JSON + CSV) to DIR')
+    parser.add_argument('--live', action='store_true',
+                       help='Print per-batch throughput while loading')
+    args = parser.parse_args()
+    if args.method and args.method not in TARGET_METHODS.get(args.target, ()):
+        valid = ', '.join(TARGET_METHODS.get(args.target, ())) or 'none'
+        parser.error(f"--method {args.method} is not available for --target {args.target} "
+                     f"(valid: {valid})")
+
+    print("\n" + "="*70)
+    print(f"NOURISHBOX → {args.target.upper()} LOAD")
+    print("="*70)
+
+    if args.stream and args.target in LOCAL_DATABASES and not args.database:
+        os.makedirs(DATA_DIR, exist_ok=True)
+    elif not args.stream and not os.path.exists(DATA_DIR):
+        print(f"\n❌ Data directory not found: {DATA_DIR}")
+        print("   Run 'python generate_nourishbox_data.py' first to generate data")
+        sys.exit(1)
+
+    wanted = args.tables or list(TABLE_CONFIGS)
+    tables = []
+    for csv_file in CSV_FILES:
+        table_name = csv_file.replace('.csv', '')
+        csv_path = os.path.join(DATA_DIR, csv_file)
+        if table_name not in wanted:
+            continue
+        if not args.stream and not os.path.exists(csv_path):
+            print(f"⚠️  Skipping {csv_file} (not found)")
+            continue
+        tables.append((table_name, csv_path))
+
+    try:
+        sink = open_sink(args.target, args.database, args.method, args.workers)
+    except Exception as e:
+        print(f"\n❌ Connection failed: {e}")
+        sys.exit(1)
+
+    print(f"\n🔌 Connected to {sink.describe()}")
+    telemetry = SyncTelemetry(args.target, live=args.live)
+    telemetry.measure_latency(sink.cursor)
+    engine = LoadEngine(sink, telemetry=telemetry, batch_rows=args.batch_rows,
+                        workers=args.workers, retries=args.retries)
+
+    try:
+        if args.stream:
+            # Imported here: the generator seeds its random state on import
+            from generate_nourishbox_data import generate_tables
+
+            print("\n" + "="*70)
+            print("STREAMING GENERATED DATA")
+            print("="*70)
+            wall_start = time.perf_counter()
+            generate_s, load_s = stream_tables(
+                engine, generate_tables(), tables=[name for name, _ in tables],
+                clear=args.clear, queue_depth=args.queue_depth
+            )
+            wall_s = time.perf_counter() - wall_start
+            print(f"\n⏱  Generate {generate_s:.1f}s, load {load_s:.1f}s, wall {wall_s:.1f}s "
+                  f"(sequential: {generate_s + load_s:.1f}s)")
+        else:
+            engine.run(tables, clear=args.clear)
+
+        telemetry.print_summary()
+        if args.report:
+            telemetry.write_reports(args.report)
+
+        engine.verify([table_name for table_name, _ in tables])
+        engine.check_failures()
+
+        print("✅ Load completed successfully!")
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Load interrupted by user")
+        sys.exit(1)
+
+    except LoadError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+
+    finally:
+        engine.close()
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
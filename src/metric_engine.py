@@ -0,0 +1,203 @@
+"""
+NourishBox Metric Engine
+Compute many table metrics from declarative specs, one pass per dimension
+
+Analyses list the numbers they need as Metric specs instead of scanning
+the frames themselves:
+
+    Metric('revenue', 'orders', 'sum', 'order_total')
+    Metric('revenue_by_status', 'orders', 'sum', 'order_total', by='delivery_status')
+    Metric('plans', 'subscriptions', 'value_counts', 'plan_name')
+
+compute() plans and runs them:
+
+1. Metrics are grouped per table, then per dimension (a value_counts of a
+   column is a count by that column, so it shares the pass of every other
+   metric grouped by that column)
+2. Each (table, dimension) is one pass: ungrouped metrics are column
+   reductions, grouped metrics share one groupby whose keys are factorized
+   once
+3. Tables are independent, so they run concurrently in a thread pool
+   (pandas releases the GIL in its groupby and reduction kernels)
+
+It returns a MetricResults that maps metric names to scalars or Series;
+the printing layer only formats them.
+
+A dimension is a column name, 'column:month' for the calendar month of a
+date column, or a tuple of those for a multi-level group. Grouped results
+are in key order and only contain observed keys; value_counts results are
+in the order Series.value_counts() gives for the column with object dtype
+(as pandas reads it from the CSV), ties included.
+
+Usage:
+    from metric_engine import Metric, compute
+    results = compute(metrics, {'orders': load('orders'), ...})
+    results['revenue_by_status']['delivered']
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from cohort_engine import period_index, period_labels
+
+AGGREGATIONS = ('count', 'sum', 'mean', 'median', 'min', 'max', 'value_counts')
+
+# 'column:<period>' dimensions
+PERIODS = ('week', 'month', 'quarter')
+
+
+class Metric:
+    """One number (or one Series when grouped) computed from a table.
+
+    agg 'count' counts rows, or the non-null values of column;
+    'value_counts' counts rows per value of column (and of by, if given).
+    """
+
+    def __init__(self, name, table, agg, column=None, by=None):
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"agg must be one of {AGGREGATIONS}, not {agg!r}")
+        if column is None and agg != 'count':
+            raise ValueError(f"metric {name!r}: agg {agg!r} needs a column")
+        self.name = name
+        self.table = table
+        self.agg = agg
+        self.column = column
+        self.by = _dimension(by)
+        if agg == 'value_counts':
+            # A count grouped by the column (after any explicit dimension)
+            self.by = (self.by or ()) + (column,)
+
+    def __repr__(self):
+        by = f", by={self.by!r}" if self.by else ''
+        return f"Metric({self.name!r}, {self.table!r}, {self.agg!r}, {self.column!r}{by})"
+
+
+def _dimension(by):
+    """Normalize by to a tuple of keys (or None)"""
+    if by is None:
+        return None
+    return (by,) if isinstance(by, str) else tuple(by)
+
+
+class MetricResults:
+    """Result of compute(): metric name -> scalar or Series, plus the plan"""
+
+    def __init__(self, values, passes, seconds):
+        self.values = values
+        self.passes = passes
+        self.seconds = seconds
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def tables(self):
+        return sorted({table for table, _, _ in self.passes})
+
+    def summary(self):
+        return (f"{len(self.values)} metrics in {len(self.passes)} passes over "
+                f"{len(self.tables)} tables ({self.seconds:.2f}s)")
+
+
+def plan(metrics):
+    """{table: {dimension: [metrics]}}, one entry per pass, in spec order"""
+    names = set()
+    passes = {}
+    for metric in metrics:
+        if metric.name in names:
+            raise ValueError(f"duplicate metric name {metric.name!r}")
+        names.add(metric.name)
+        passes.setdefault(metric.table, {}).setdefault(metric.by, []).append(metric)
+    return passes
+
+
+def _group_key(df, key):
+    """Column name, or a derived Series for 'column:period' keys"""
+    column, _, period = key.partition(':')
+    if not period:
+        return column
+    if period not in PERIODS:
+        raise ValueError(f"unknown period {period!r} in dimension {key!r}; use one of {PERIODS}")
+    labels = period_labels(period_index(df[column], period), period)
+    return pd.Series(labels, index=df.index, name=column)
+
+
+def _reduce(df, metric):
+    """Ungrouped metric: one column reduction"""
+    if metric.agg == 'count':
+        return len(df) if metric.column is None else int(df[metric.column].count())
+    return getattr(df[metric.column], metric.agg)()
+
+
+def _by_count(grouped, sizes):
+    """Group sizes in the order Series.value_counts() gives for the column as
+    read from the CSV: values in order of first appearance, then pandas'
+    default (not stable) sort by count. With a leading dimension, each of its
+    groups is sorted on its own, like value_counts() of that subset."""
+    sizes = sizes.iloc[pd.unique(grouped.ngroup().dropna().astype('int64'))]
+    if sizes.index.nlevels == 1:
+        return sizes.sort_values(ascending=False)
+    outer = list(range(sizes.index.nlevels - 1))
+    return sizes.groupby(level=outer, observed=True, sort=True, group_keys=False).apply(
+        lambda group: group.sort_values(ascending=False))
+
+
+def _grouped(df, dimension, metrics):
+    """Every metric sharing a dimension from one groupby"""
+    keys = [_group_key(df, key) for key in dimension]
+    grouped = df.groupby(keys if len(keys) > 1 else keys[0], observed=True, sort=True)
+    results = {}
+    sizes = None
+    for metric in metrics:
+        if metric.agg == 'value_counts' or (metric.agg == 'count' and metric.column is None):
+            if sizes is None:
+                sizes = grouped.size()
+            if metric.agg == 'value_counts':
+                results[metric.name] = _by_count(grouped, sizes).rename('count')
+            else:
+                results[metric.name] = sizes.rename(metric.name)
+        else:
+            results[metric.name] = getattr(grouped[metric.column], metric.agg)().rename(metric.name)
+    return results
+
+
+def _compute_table(df, dimensions):
+    results = {}
+    for dimension, metrics in dimensions.items():
+        if dimension is None:
+            for metric in metrics:
+                results[metric.name] = _reduce(df, metric)
+        else:
+            results.update(_grouped(df, dimension, metrics))
+    return results
+
+
+def compute(metrics, tables, workers=None):
+    """Run metric specs against {table name: DataFrame}; returns MetricResults"""
+    start = time.perf_counter()
+    passes = plan(metrics)
+    missing = sorted(set(passes) - set(tables))
+    if missing:
+        raise KeyError(f"metrics need tables that were not provided: {missing}")
+
+    workers = min(workers or os.cpu_count() or 1, len(passes)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {table: pool.submit(_compute_table, tables[table], dimensions)
+                   for table, dimensions in passes.items()}
+        computed = {table: future.result() for table, future in futures.items()}
+
+    # Results in spec order, whatever order the tables finished in
+    values = {metric.name: computed[metric.table][metric.name] for metric in metrics}
+    pass_list = [(table, dimension, [metric.name for metric in group])
+                 for table, dimensions in passes.items()
+                 for dimension, group in dimensions.items()]
+    return MetricResults(values, pass_list, time.perf_counter() - start)
@@ -0,0 +1,366 @@
+"""
+NourishBox Metrics Cube
+Monthly aggregates at plan x channel x status x cohort grain, refreshed incrementally
+
+The cube (data/nourishbox/metrics_cube.csv) has one row per
+
+    year_month x plan_type x acquisition_channel x status x cohort
+
+where plan_type and status are the subscription's state that month (from
+subscription_monthly; the subscription's own plan and 'unknown' when it has
+no snapshot), acquisition_channel and cohort (signup month) come from the
+customer. Every measure is additive, so any roll-up is a plain sum:
+
+    orders, revenue, realized_revenue, discounts     orders
+    mrr, active_subscriptions                        subscription_monthly
+    churns                                           churn_events
+    reviews, rating_total                            reviews (avg = total / reviews)
+
+Refreshes fold in only what changed. metrics_cube.json stores, per source
+table, the file's SHA-256 and a digest (row count + sum of row hashes) of
+every month, plus per-cohort digests of the customer attributes:
+
+1. Tables whose file is unchanged are not read at all
+2. For a changed table, months whose digest differs (new, edited or removed
+   rows) are marked dirty; a changed cohort marks every month in which its
+   customers have activity
+3. Only the dirty months are re-aggregated and replace their slices of the
+   cube: the tables are cut down to the rows dated in those months (and the
+   customers and subscriptions they refer to) before any fact is built, so a
+   new month of data costs one month of aggregation
+
+Usage:
+    python src/metrics_cube.py            # build, or fold in changed months
+    python src/metrics_cube.py --full     # rebuild from scratch
+
+    from metrics_cube import load_cube
+    cube = load_cube()
+    cube.groupby('year_month')[['revenue', 'mrr']].sum()
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_ledger import file_fingerprint
+from mrr_engine import ACTIVE_STATUSES, REALIZED_STATUSES, month_index, month_starts
+from nourishbox import load
+from table_schemas import DATA_DIR
+
+CUBE_FILE = 'metrics_cube.csv'
+STATE_FILE = 'metrics_cube.json'
+
+# Bump when the grain or the measures change (forces a full rebuild)
+CUBE_VERSION = 1
+
+DIMENSIONS = ['year_month', 'plan_type', 'acquisition_channel', 'status', 'cohort']
+MEASURES = ['orders', 'revenue', 'realized_revenue', 'discounts', 'mrr',
+            'active_subscriptions', 'churns', 'reviews', 'rating_total']
+INTEGER_MEASURES = ['orders', 'active_subscriptions', 'churns', 'reviews', 'rating_total']
+
+# Fact table -> the date that places a row in a month
+FACT_DATES = {
+    'subscription_monthly': 'month_start',
+    'orders': 'order_date',
+    'churn_events': 'churn_date',
+    'reviews': 'review_date',
+}
+
+# Attributes the cube takes from dimension tables
+DIMENSION_COLUMNS = {
+    'customers': ['customer_id', 'registration_date', 'acquisition_channel'],
+    'subscriptions': ['subscription_id', 'customer_id', 'plan_type'],
+}
+
+# Status of a fact whose subscription has no snapshot that month
+UNKNOWN_STATUS = 'unknown'
+
+
+def year_month(dates):
+    """'YYYY-MM' per date (None for NaT), via one label per distinct month"""
+    months = month_index(dates)
+    present = ~np.isnat(np.asarray(dates, dtype='datetime64[ns]'))
+    labels = np.full(len(months), None, dtype=object)
+    if present.any():
+        first, last = months[present].min(), months[present].max()
+        names = month_starts(first, last).strftime('%Y-%m').to_numpy(dtype=object)
+        labels[present] = names[months[present] - first]
+    return labels
+
+
+def group_digests(df, keys):
+    """{key: 'rows:hash-sum'} for the rows of df grouped by keys. Order-free,
+    and any edited, added or removed row changes its group's digest."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    codes, labels = pd.factorize(pd.Series(keys).fillna(''), sort=True)
+    if len(codes) == 0:
+        return {}
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    # uint64 sums wrap around, which is fine for a digest
+    sums = np.add.reduceat(hashes[order], starts)
+    counts = np.diff(np.r_[starts, len(codes)])
+    return {str(label): f"{count}:{total}" for label, count, total in zip(labels, counts, sums)}
+
+
+def _cohort_digests(customers, subscriptions):
+    """Digests of the customer attributes (and subscription plans) per cohort"""
+    cohorts = pd.Series(year_month(customers['registration_date']), index=customers['customer_id'])
+    digests = group_digests(customers[DIMENSION_COLUMNS['customers']], cohorts.to_numpy())
+    plan_digests = group_digests(subscriptions[DIMENSION_COLUMNS['subscriptions']],
+                                 subscriptions['customer_id'].map(cohorts).to_numpy())
+    for cohort, digest in plan_digests.items():
+        digests[cohort] = digests.get(cohort, '') + '|' + digest
+    return digests
+
+
+def _facts(tables):
+    """Per fact table: DataFrame of year_month, subscription_id, customer_id
+    and that table's measures"""
+    snapshots = tables['subscription_monthly']
+    orders = tables['orders']
+    churn_events = tables['churn_events']
+    reviews = tables['reviews']
+
+    def fact(df, date_column, **measures):
+        columns = {
+            'year_month': year_month(df[date_column]),
+            'subscription_id': df['subscription_id'].to_numpy(),
+            'customer_id': df['customer_id'].to_numpy(),
+        }
+        columns.update(measures)
+        return pd.DataFrame(columns)
+
+    realized = orders['delivery_status'].isin(REALIZED_STATUSES).to_numpy()
+    order_total = orders['order_total'].to_numpy(dtype=float)
+    return {
+        'subscription_monthly': fact(
+            snapshots, 'month_start',
+            mrr=snapshots['mrr'].to_numpy(dtype=float),
+            active_subscriptions=snapshots['status'].isin(ACTIVE_STATUSES).to_numpy().astype(np.int64)),
+        'orders': fact(
+            orders, 'order_date',
+            orders=np.ones(len(orders), dtype=np.int64),
+            revenue=order_total,
+            realized_revenue=np.where(realized, order_total, 0.0),
+            discounts=orders['discount_applied'].fillna(0).to_numpy(dtype=float)),
+        'churn_events': fact(churn_events, 'churn_date', churns=np.ones(len(churn_events), dtype=np.int64)),
+        'reviews': fact(
+            reviews, 'review_date',
+            reviews=np.ones(len(reviews), dtype=np.int64),
+            rating_total=reviews['rating'].fillna(0).to_numpy(dtype=np.int64)),
+    }
+
+
+def _restrict(tables, months):
+    """The rows that feed the given year_months: facts dated in them, and the
+    customers and subscriptions those facts refer to"""
+    wanted = np.array([(int(month[:4]) - 1970) * 12 + int(month[5:7]) - 1 for month in months],
+                      dtype=np.int64)
+    restricted = {}
+    for table_name, date_column in FACT_DATES.items():
+        df = tables[table_name]
+        restricted[table_name] = df[np.isin(month_index(df[date_column]), wanted)]
+    customer_ids = pd.unique(np.concatenate(
+        [restricted[name]['customer_id'].to_numpy(dtype=object) for name in FACT_DATES]))
+    subscription_ids = pd.unique(np.concatenate(
+        [restricted[name]['subscription_id'].to_numpy(dtype=object) for name in FACT_DATES]))
+    restricted['customers'] = tables['customers'][tables['customers']['customer_id'].isin(customer_ids)]
+    restricted['subscriptions'] = tables['subscriptions'][
+        tables['subscriptions']['subscription_id'].isin(subscription_ids)]
+    return restricted
+
+
+def compute_cube(tables, months=None):
+    """Cube rows from the tables, for the given year_months (all when None)"""
+    if months is not None:
+        tables = _restrict(tables, set(months))
+    facts = _facts(tables)
+
+    # Subscription state per (subscription, month), with fallbacks
+    snapshots = tables['subscription_monthly']
+    state = pd.DataFrame({
+        'subscription_id': snapshots['subscription_id'].to_numpy(),
+        'year_month': year_month(snapshots['month_start']),
+        'plan_type': snapshots['plan_type'].astype(object).to_numpy(),
+        'status': snapshots['status'].astype(object).to_numpy(),
+    }).drop_duplicates(['subscription_id', 'year_month'])
+    plans = tables['subscriptions'].set_index('subscription_id')['plan_type'].astype(object)
+    customers = tables['customers'].set_index('customer_id')
+    channels = customers['acquisition_channel'].astype(object)
+    cohorts = pd.Series(year_month(customers['registration_date']), index=customers.index)
+
+    parts = []
+    for df in facts.values():
+        if not len(df):
+            continue
+        df = df.merge(state, on=['subscription_id', 'year_month'], how='left')
+        df['plan_type'] = df['plan_type'].fillna(df['subscription_id'].map(plans))
+        df['status'] = df['status'].fillna(UNKNOWN_STATUS)
+        df['acquisition_channel'] = df['customer_id'].map(channels)
+        df['cohort'] = df['customer_id'].map(cohorts)
+        measures = [col for col in MEASURES if col in df.columns]
+        parts.append(df.groupby(DIMENSIONS, dropna=False)[measures].sum())
+
+    if not parts:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+    cube = pd.concat(parts, axis=1).groupby(level=DIMENSIONS, dropna=False).sum(min_count=1)
+    cube = cube.reindex(columns=MEASURES).fillna(0)
+    cube[INTEGER_MEASURES] = cube[INTEGER_MEASURES].astype(np.int64)
+    # Money is in cents; rounding keeps rebuilt and folded-in slices identical
+    money = [col for col in MEASURES if col not in INTEGER_MEASURES]
+    cube[money] = cube[money].round(2)
+    return cube.reset_index()
+
+
+def cube_paths(data_dir=DATA_DIR):
+    return os.path.join(data_dir, CUBE_FILE), os.path.join(data_dir, STATE_FILE)
+
+
+def load_cube(data_dir=DATA_DIR):
+    """The persisted cube (run refresh() first)"""
+    cube_path, _ = cube_paths(data_dir)
+    if not os.path.exists(cube_path):
+        raise FileNotFoundError(f"{cube_path} not found - run metrics_cube.py first")
+    return pd.read_csv(cube_path, dtype={col: str for col in DIMENSIONS}, keep_default_na=False,
+                       na_values={col: [''] for col in DIMENSIONS})
+
+
+def _read_state(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == CUBE_VERSION else None
+
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_state(path, sources):
+    with open(path, 'w') as f:
+        json.dump({'version': CUBE_VERSION, 'sources': sources}, f, indent=1)
+
+
+def _sort(cube):
+    return cube.sort_values(DIMENSIONS, na_position='last', kind='stable').reset_index(drop=True)
+
+
+def refresh(data_dir=DATA_DIR, full=False):
+    """Build or incrementally update the cube; returns a summary dict"""
+    start = time.time()
+    cube_path, state_path = cube_paths(data_dir)
+    state = None if full or not os.path.exists(cube_path) else _read_state(state_path)
+    old_sources = state['sources'] if state else {}
+
+    # 1. Which source files changed since the last refresh
+    fingerprints = {}
+    for table_name in list(FACT_DATES) + list(DIMENSION_COLUMNS):
+        csv_path = os.path.join(data_dir, f'{table_name}.csv')
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"{csv_path} not found - run generate_nourishbox_data.py first")
+        fingerprints[table_name] = file_fingerprint(csv_path)
+    changed = [name for name, sha in fingerprints.items()
+               if old_sources.get(name, {}).get('sha256') != sha]
+
+    # 2. Which months changed within those files
+    sources = {name: old_sources[name] for name in fingerprints if name not in changed}
+    dirty = set()
+    for table_name in changed:
+        if table_name in FACT_DATES:
+            df = load(table_name, data_dir=data_dir)
+            digests = group_digests(df, year_month(df[FACT_DATES[table_name]]))
+            old = old_sources.get(table_name, {}).get('months', {})
+            dirty |= {month for month in set(digests) | set(old) if digests.get(month) != old.get(month)}
+            sources[table_name] = {'sha256': fingerprints[table_name], 'months': digests}
+
+    dimensions_changed = [name for name in changed if name in DIMENSION_COLUMNS]
+    if dimensions_changed:
+        digests = _cohort_digests(load('customers', DIMENSION_COLUMNS['customers'], data_dir),
+                                  load('subscriptions', DIMENSION_COLUMNS['subscriptions'], data_dir))
+        old = old_sources.get('customers', {}).get('cohorts', {})
+        changed_cohorts = {cohort for cohort in set(digests) | set(old) if digests.get(cohort) != old.get(cohort)}
+        for table_name in DIMENSION_COLUMNS:
+            sources[table_name] = {'sha256': fingerprints[table_name]}
+        sources['customers']['cohorts'] = digests
+        if state and changed_cohorts:
+            # Every month in which customers of a changed cohort are active
+            customers = load('customers', DIMENSION_COLUMNS['customers'], data_dir)
+            cohorts = pd.Series(year_month(customers['registration_date']),
+                                index=customers['customer_id']).fillna('')
+            for table_name, date_column in FACT_DATES.items():
+                df = load(table_name, ['customer_id', date_column], data_dir)
+                affected = df['customer_id'].map(cohorts).isin(changed_cohorts).to_numpy()
+                dirty |= {month for month in year_month(df[date_column][affected]) if month is not None}
+
+    # 3. Re-aggregate only the dirty months
+    dirty.discard('')
+    if state is None:
+        cube = None
+    elif dirty:
+        cube = load_cube(data_dir)
+        cube = cube[~cube['year_month'].isin(dirty)]
+    else:
+        cube = load_cube(data_dir)
+
+    rebuilt = state is None
+    if rebuilt or dirty:
+        tables = {name: load(name, data_dir=data_dir) for name in list(FACT_DATES) + list(DIMENSION_COLUMNS)}
+        fresh = compute_cube(tables, None if rebuilt else dirty)
+        cube = fresh if rebuilt else pd.concat([cube, fresh], ignore_index=True)
+        cube = _sort(cube)
+        _write_atomic(cube_path, lambda path: cube.to_csv(path, index=False))
+
+    _write_atomic(state_path, lambda path: _write_state(path, sources))
+    return {
+        'rebuilt': rebuilt,
+        'changed_tables': changed,
+        'months': sorted(dirty) if not rebuilt else sorted(cube['year_month'].dropna().unique()),
+        'rows': len(cube),
+        'seconds': time.time() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or refresh the NourishBox metrics cube')
+    parser.add_argument('--full', action='store_true', help='Rebuild the whole cube')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'CSV directory (default: {DATA_DIR})')
+    parser.add_argument('--months', type=int, default=6, help='Recent months to print (default: 6)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("NOURISHBOX METRICS CUBE")
+    print("="*70)
+    summary = refresh(args.data_dir, full=args.full)
+    cube_path, _ = cube_paths(args.data_dir)
+
+    if summary['rebuilt']:
+        print(f"\n✓ Built {cube_path} from scratch ({len(summary['months'])} months)")
+    elif summary['months']:
+        print(f"\n✓ Folded in {len(summary['months'])} changed months: {', '.join(summary['months'])}")
+    else:
+        print(f"\n✓ Up to date - no source changes")
+    if summary['changed_tables']:
+        print(f"   Changed sources: {', '.join(summary['changed_tables'])}")
+    print(f"   {summary['rows']:,} cube rows, {summary['seconds']:.2f}s")
+
+    cube = load_cube(args.data_dir)
+    monthly = cube.groupby('year_month')[['orders', 'revenue', 'mrr', 'active_subscriptions',
+                                          'churns', 'reviews']].sum().tail(args.months)
+    print(f"\n{'Month':8s} {'Orders':>8s} {'Revenue':>12s} {'MRR':>11s} {'Active':>7s} {'Churns':>7s} {'Reviews':>8s}")
+    for month, row in monthly.iterrows():
+        print(f"{month:8s} {row['orders']:>8,.0f} {row['revenue']:>12,.2f} {row['mrr']:>11,.2f} "
+              f"{row['active_subscriptions']:>7,.0f} {row['churns']:>7,.0f} {row['reviews']:>8,.0f}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
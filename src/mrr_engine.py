@@ -0,0 +1,217 @@
+"""
+NourishBox MRR Engine
+Monthly recurring revenue and its month-over-month movements in one pass
+
+monthly_mrr() reduces the snapshot and order tables with one grouped
+reduction each (no per-month filtering):
+
+    mrr                 sum of subscription_monthly.mrr per month
+    active_subscribers  distinct subscriptions with status active/upgraded
+    actual_revenue      order_total of delivered/pending/delayed orders
+    growth_rate         month-over-month MRR change (%)
+
+mrr_movements() splits each month's change in MRR into the standard bridge,
+per customer (or per subscription with key='subscription_id'):
+
+    new           first month the key pays anything
+    expansion     paid last month, pays more this month
+    contraction   paid last month, pays less (but something) this month
+    churned       paid last month, pays nothing this month
+    reactivation  paid before, nothing last month, pays again this month
+
+    starting_mrr + new + expansion + reactivation - contraction - churned
+        = ending_mrr
+
+The lag join works on integer (key, month) ids: each (key, month) total is
+looked up against the same key's previous and next month with one
+searchsorted over the sorted ids, and the movements are summed per month
+with np.bincount. Memory and time are linear in the number of snapshot
+rows, so 10M-row snapshot tables take seconds. The definitions match
+rollup_mrr_movements in export_duckdb.py.
+
+Usage:
+    from mrr_engine import monthly_mrr, mrr_movements
+    mrr_df = monthly_mrr(subscription_monthly, orders)
+    bridge = mrr_movements(subscription_monthly)
+
+    python src/mrr_engine.py                        # customer-level bridge
+    python src/mrr_engine.py --key subscription_id  # plan changes count as churn + new
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Snapshot statuses counted as active subscribers
+ACTIVE_STATUSES = ['active', 'upgraded']
+
+# Orders that bring in revenue (cancelled deliveries do not)
+REALIZED_STATUSES = ['delivered', 'pending', 'delayed']
+
+MOVEMENTS = ['new_mrr', 'expansion_mrr', 'contraction_mrr', 'churned_mrr', 'reactivation_mrr']
+
+
+def month_index(dates):
+    """Months since 1970-01 for a datetime64 Series/array (NaT -> very negative)"""
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_range(subscription_monthly):
+    """First month index and the month starts covered by the snapshot table"""
+    months = month_index(subscription_monthly['month_start'])
+    first, last = months.min(), months.max()
+    return first, month_starts(first, last)
+
+
+def month_starts(first, last):
+    """DatetimeIndex of month starts for month indices first..last"""
+    return pd.DatetimeIndex(np.arange(first, last + 1).astype('datetime64[M]').astype('datetime64[ns]'))
+
+
+def _sum_by_month(months, values, first, n_months):
+    """Sum values per month slot (months outside the range are ignored)"""
+    slot = months - first
+    keep = (slot >= 0) & (slot < n_months)
+    return np.bincount(slot[keep], weights=values[keep], minlength=n_months)
+
+
+def monthly_mrr(subscription_monthly, orders):
+    """One row per snapshot month: date, mrr, active_subscribers,
+    actual_revenue, year_month, growth_rate"""
+    first, dates = month_range(subscription_monthly)
+    n_months = len(dates)
+
+    snapshot_months = month_index(subscription_monthly['month_start'])
+    mrr = _sum_by_month(snapshot_months, subscription_monthly['mrr'].to_numpy(dtype=float),
+                        first, n_months)
+
+    active = subscription_monthly['status'].isin(ACTIVE_STATUSES).to_numpy()
+    active_pairs = pd.DataFrame({
+        'month': snapshot_months[active],
+        'subscription_id': subscription_monthly['subscription_id'].to_numpy()[active],
+    }).drop_duplicates()
+    active_subscribers = np.bincount(active_pairs['month'].to_numpy() - first,
+                                     minlength=n_months)
+
+    realized = orders['delivery_status'].isin(REALIZED_STATUSES).to_numpy()
+    actual_revenue = _sum_by_month(month_index(orders['order_date'])[realized],
+                                   orders['order_total'].to_numpy(dtype=float)[realized],
+                                   first, n_months)
+
+    return mrr_frame(dates, mrr, active_subscribers, actual_revenue)
+
+
+def mrr_frame(dates, mrr, active_subscribers, actual_revenue):
+    """monthly_mrr() result from per-month arrays aligned with dates"""
+    mrr_df = pd.DataFrame({
+        'date': dates,
+        'mrr': mrr,
+        'active_subscribers': np.asarray(active_subscribers).astype(int),
+        'actual_revenue': actual_revenue,
+        'year_month': dates.strftime('%Y-%m'),
+    })
+    mrr_df['growth_rate'] = mrr_df['mrr'].pct_change() * 100
+    return mrr_df
+
+
+def mrr_movements(subscription_monthly, key='customer_id'):
+    """MRR bridge per snapshot month (see module docstring)"""
+    first, dates = month_range(subscription_monthly)
+    n_months = len(dates)
+
+    # Total MRR per (key, month), as sorted integer ids key_code * n_months + slot
+    key_codes, _ = pd.factorize(subscription_monthly[key], sort=False)
+    slots = month_index(subscription_monthly['month_start']) - first
+    cell_ids = key_codes.astype(np.int64) * n_months + slots
+    ids, inverse = np.unique(cell_ids, return_inverse=True)
+    mrr = np.bincount(inverse, weights=subscription_monthly['mrr'].to_numpy(dtype=float))
+    id_keys, id_slots = np.divmod(ids, n_months)
+
+    def lookup(target_ids, valid):
+        """(MRR of the target cells, whether they exist); 0 where missing"""
+        pos = np.minimum(np.searchsorted(ids, target_ids), len(ids) - 1)
+        hit = valid & (ids[pos] == target_ids)
+        return np.where(hit, mrr[pos], 0.0), hit
+
+    previous_mrr, _ = lookup(ids - 1, id_slots > 0)
+    _, has_next = lookup(ids + 1, id_slots < n_months - 1)
+
+    # First paying month per key (ids are sorted by key, then month)
+    paying = mrr > 0
+    first_paying = np.full(id_keys.max() + 1 if len(ids) else 0, n_months, dtype=np.int64)
+    np.minimum.at(first_paying, id_keys[paying], id_slots[paying])
+    first_slot = first_paying[id_keys]
+
+    is_new = paying & (id_slots == first_slot)
+    had_mrr = previous_mrr > 0
+    expansion = had_mrr & (mrr > previous_mrr)
+    contraction = had_mrr & paying & (mrr < previous_mrr)
+    churn_in_place = had_mrr & ~paying
+    reactivation = paying & ~had_mrr & (id_slots > first_slot)
+    # A paying cell whose next month has no row at all churns next month
+    churn_next = paying & ~has_next & (id_slots < n_months - 1)
+
+    def per_month(mask, values, shift=0):
+        # bincount returns ints (not floats) when nothing is selected
+        return np.bincount(id_slots[mask] + shift, weights=values[mask],
+                           minlength=n_months).astype(float, copy=False)
+
+    bridge = pd.DataFrame({
+        'month_start': dates,
+        'new_mrr': per_month(is_new, mrr),
+        'expansion_mrr': per_month(expansion, mrr - previous_mrr),
+        'contraction_mrr': per_month(contraction, previous_mrr - mrr),
+        'churned_mrr': per_month(churn_in_place, previous_mrr) + per_month(churn_next, mrr, 1),
+        'reactivation_mrr': per_month(reactivation, mrr),
+        'ending_mrr': per_month(paying, mrr),
+        'paying_customers': np.bincount(id_slots[paying], minlength=n_months).astype(int),
+    })
+    bridge.insert(1, 'starting_mrr', bridge['ending_mrr'].shift(1, fill_value=0.0))
+    bridge['net_change'] = bridge['ending_mrr'] - bridge['starting_mrr']
+    return bridge
+
+
+def check_bridge(bridge, tolerance=0.01):
+    """Months where starting + movements != ending (should be empty)"""
+    expected = (bridge['starting_mrr'] + bridge['new_mrr'] + bridge['expansion_mrr']
+                + bridge['reactivation_mrr'] - bridge['contraction_mrr'] - bridge['churned_mrr'])
+    return bridge[(expected - bridge['ending_mrr']).abs() > tolerance]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NourishBox MRR bridge')
+    parser.add_argument('--key', choices=['customer_id', 'subscription_id'], default='customer_id',
+                        help='Level at which movements are measured (default: customer_id)')
+    parser.add_argument('--months', type=int, default=12, help='Months to print (default: 12)')
+    args = parser.parse_args()
+
+    from nourishbox import load
+
+    subscription_monthly = load('subscription_monthly')
+    bridge = mrr_movements(subscription_monthly, key=args.key)
+
+    print("="*70)
+    print(f"MRR MOVEMENTS (by {args.key})")
+    print("="*70)
+    print(f"{'Month':8s} {'Start':>10s} {'New':>9s} {'Expand':>9s} {'Contract':>9s} "
+          f"{'Churned':>9s} {'React':>9s} {'End':>10s}")
+    for _, row in bridge.tail(args.months).iterrows():
+        print(f"{row['month_start']:%Y-%m}  {row['starting_mrr']:>10,.0f} {row['new_mrr']:>9,.0f} "
+              f"{row['expansion_mrr']:>9,.0f} {row['contraction_mrr']:>9,.0f} "
+              f"{row['churned_mrr']:>9,.0f} {row['reactivation_mrr']:>9,.0f} {row['ending_mrr']:>10,.0f}")
+
+    totals = bridge[MOVEMENTS].sum()
+    print("-"*70)
+    print("Totals: " + ", ".join(f"{name.replace('_mrr', '')} ${value:,.0f}"
+                                 for name, value in totals.items()))
+    broken = check_bridge(bridge)
+    if len(broken):
+        print(f"⚠️  Bridge does not reconcile in {len(broken)} months")
+    else:
+        print("✓ Bridge reconciles: start + movements = end in every month")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
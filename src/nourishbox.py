@@ -0,0 +1,270 @@
+"""
+NourishBox Data Access
+Load each generated table once, with registry types, through a binary cache
+
+Every analysis script gets its tables from here instead of calling
+pd.read_csv itself:
+
+1. The first load of a table parses its CSV with the registry's dtypes,
+   parsed dates and categoricals (table_schemas.read_table)
+2. The typed frame is written to data/nourishbox/.cache/<table>.feather
+   together with the source file's size, mtime and SHA-256
+3. Later loads (in any process) read the Feather file instead of the CSV.
+   A changed size or hash rebuilds it; a changed mtime alone (same bytes,
+   e.g. a fresh checkout) only re-hashes the CSV
+4. Within a process each table is read once; callers receive read-only
+   views that share its memory
+
+Views behave like normal DataFrames: adding or replacing columns only
+affects the caller's view, while writing into the shared arrays in place
+(df.loc[..., 'col'] = x on an existing column) raises
+"ValueError: assignment destination is read-only". Take .copy() first when
+a script needs to edit values.
+
+The Feather cache needs pyarrow; without it tables are still read once per
+process, straight from the CSV.
+
+Usage:
+    from nourishbox import load
+    orders = load('orders')
+    items = load('order_items', columns=['order_id', 'product_type', 'line_price'])
+
+    python src/nourishbox.py            # show cache status
+    python src/nourishbox.py --warm     # build the cache for every table
+    python src/nourishbox.py --clear    # delete the cache
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_ledger import file_fingerprint
+from table_schemas import CSV_FILES, DATA_DIR, read_table
+
+CACHE_DIRNAME = '.cache'
+
+# Bump when the cached representation changes (e.g. new registry types)
+CACHE_VERSION = 1
+
+# (data_dir, table_name) -> read-only DataFrame shared by every view
+_frames = {}
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401  Optional dependency for the Feather cache
+        return True
+    except ImportError:
+        return False
+
+
+def cache_paths(table_name, data_dir=DATA_DIR):
+    """(feather file, key file) for a table's cache entry"""
+    cache_dir = os.path.join(data_dir, CACHE_DIRNAME)
+    return (os.path.join(cache_dir, f'{table_name}.feather'),
+            os.path.join(cache_dir, f'{table_name}.json'))
+
+
+def _read_key(key_path):
+    try:
+        with open(key_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_key(key_path, key):
+    tmp_path = key_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(key, f, indent=2)
+    os.replace(tmp_path, key_path)
+
+
+def _cache_is_fresh(csv_path, feather_path, key_path):
+    """True if the Feather file was built from the CSV as it is now"""
+    key = _read_key(key_path)
+    if key is None or key.get('version') != CACHE_VERSION or not os.path.exists(feather_path):
+        return False
+    stat = os.stat(csv_path)
+    if stat.st_size != key['size']:
+        return False
+    if stat.st_mtime_ns == key['mtime_ns']:
+        return True
+    # Same size, new mtime: only the hash can tell
+    if file_fingerprint(csv_path) != key['sha256']:
+        return False
+    key['mtime_ns'] = stat.st_mtime_ns
+    _write_key(key_path, key)
+    return True
+
+
+def _build_cache(table_name, csv_path, feather_path, key_path):
+    """Parse the CSV and write its Feather copy; returns the frame"""
+    stat = os.stat(csv_path)
+    sha256 = file_fingerprint(csv_path)
+    df = read_table(table_name, os.path.dirname(csv_path))
+
+    os.makedirs(os.path.dirname(feather_path), exist_ok=True)
+    tmp_path = feather_path + '.tmp'
+    df.to_feather(tmp_path)
+    os.replace(tmp_path, feather_path)
+    _write_key(key_path, {
+        'version': CACHE_VERSION,
+        'table': table_name,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+        'rows': len(df),
+    })
+    return df
+
+
+def _read_only(df):
+    """Copy of df whose column arrays refuse in-place writes"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        values = series.array
+        if isinstance(values, pd.Categorical):
+            codes = values.codes.copy()
+            codes.flags.writeable = False
+            values = pd.Categorical.from_codes(codes, dtype=values.dtype)
+        else:
+            values = series.to_numpy(copy=True)
+            values.flags.writeable = False
+        columns[col] = pd.Series(values, index=df.index, name=col, dtype=series.dtype, copy=False)
+    # copy=False keeps one block per column, so the flags survive
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _view(frame, columns=None):
+    """New DataFrame sharing frame's (read-only) column arrays"""
+    columns = list(frame.columns) if columns is None else list(columns)
+    missing = [col for col in columns if col not in frame.columns]
+    if missing:
+        raise KeyError(f"unknown columns: {missing}")
+    return pd.DataFrame({col: frame[col] for col in columns}, index=frame.index, copy=False)
+
+
+def _load_frame(table_name, data_dir):
+    csv_path = os.path.join(data_dir, f'{table_name}.csv')
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"{csv_path} not found - run generate_nourishbox_data.py first")
+    if not _has_pyarrow():
+        return read_table(table_name, data_dir)
+
+    feather_path, key_path = cache_paths(table_name, data_dir)
+    if _cache_is_fresh(csv_path, feather_path, key_path):
+        df = pd.read_feather(feather_path)
+        # Arrow hands back missing strings as None; read_csv gives NaN
+        for col in df.columns[df.dtypes == object]:
+            if df[col].isna().any():
+                df[col] = df[col].where(df[col].notna(), np.nan)
+        return df
+    return _build_cache(table_name, csv_path, feather_path, key_path)
+
+
+def load(table_name, columns=None, data_dir=DATA_DIR):
+    """Read-only view of a table, typed per table_schemas.py.
+
+    The table is read once per process (from the Feather cache when it is
+    current, otherwise from the CSV); every call returns a new view, so
+    adding columns to it never affects other callers.
+    """
+    memo_key = (os.path.abspath(data_dir), table_name)
+    frame = _frames.get(memo_key)
+    if frame is None:
+        frame = _read_only(_load_frame(table_name, data_dir))
+        _frames[memo_key] = frame
+    return _view(frame, columns)
+
+
+def forget(table_name=None):
+    """Drop tables from the in-process memo (all tables by default)"""
+    for memo_key in list(_frames):
+        if table_name is None or memo_key[1] == table_name:
+            del _frames[memo_key]
+
+
+def clear_cache(data_dir=DATA_DIR):
+    """Delete the Feather cache and the in-process memo"""
+    forget()
+    cache_dir = os.path.join(data_dir, CACHE_DIRNAME)
+    removed = 0
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+        os.rmdir(cache_dir)
+    return removed
+
+
+def table_names():
+    return [os.path.splitext(csv_file)[0] for csv_file in CSV_FILES]
+
+
+def cache_status(data_dir=DATA_DIR):
+    """[(table, state, rows)] with state one of: fresh, stale, missing, no csv"""
+    status = []
+    for table_name in table_names():
+        csv_path = os.path.join(data_dir, f'{table_name}.csv')
+        feather_path, key_path = cache_paths(table_name, data_dir)
+        key = _read_key(key_path)
+        if not os.path.exists(csv_path):
+            state = 'no csv'
+        elif key is None:
+            state = 'missing'
+        elif _cache_is_fresh(csv_path, feather_path, key_path):
+            state = 'fresh'
+        else:
+            state = 'stale'
+        status.append((table_name, state, key.get('rows') if key else None))
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the NourishBox table cache')
+    parser.add_argument('--warm', action='store_true', help='Build the cache for every table')
+    parser.add_argument('--clear', action='store_true', help='Delete the cache')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'CSV directory (default: {DATA_DIR})')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("NOURISHBOX TABLE CACHE")
+    print("="*70)
+    cache_dir = os.path.join(args.data_dir, CACHE_DIRNAME)
+    print(f"Cache: {cache_dir}/")
+
+    if not _has_pyarrow():
+        print("\n⚠️  pyarrow is not installed: tables are read from CSV every run")
+        print("   pip install pyarrow")
+        return
+
+    if args.clear:
+        removed = clear_cache(args.data_dir)
+        print(f"\n✓ Removed {removed} cache files")
+
+    if args.warm:
+        print()
+        for table_name in table_names():
+            if not os.path.exists(os.path.join(args.data_dir, f'{table_name}.csv')):
+                print(f"   - {table_name:24s} no CSV, skipped")
+                continue
+            start = time.time()
+            df = load(table_name, data_dir=args.data_dir)
+            print(f"   ✓ {table_name:24s} {len(df):>10,} rows  {time.time() - start:6.2f}s")
+
+    print()
+    for table_name, state, rows in cache_status(args.data_dir):
+        icon = '✓' if state == 'fresh' else '✗'
+        rows_text = f"{rows:,} rows" if rows is not None else ''
+        print(f"   {icon} {table_name:24s} {state:8s} {rows_text}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
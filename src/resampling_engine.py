@@ -0,0 +1,270 @@
+"""
+NourishBox Resampling Engine
+Bootstrap confidence intervals and permutation tests for the seasonality
+and churn comparisons of analyze_seasonality.py
+
+The unit of resampling is the customer: orders and churns of one customer
+are not independent, so resampling single orders would understate the
+noise. customer_matrix() reduces the tables to one row per customer:
+
+    customers              1 per customer
+    churns, quick_churns   churn events (within QUICK_CHURN_DAYS)
+    orders_<Month>         orders placed in each calendar month
+    revenue_<Month>        order value per calendar month
+
+and every statistic is a function of column totals, so a replicate is
+just a weighted sum of those rows:
+
+1. Each chunk of replicates draws a (replicates x customers) matrix of
+   resample indices with its own generator, stratified by New Year
+   signup so both groups keep their size
+2. np.bincount turns the indices into per-customer weights, and one
+   matrix product (weights @ rows) gives the totals of every replicate
+3. The statistics are evaluated on all replicates at once
+
+Permutation tests shuffle the New Year label across customers (one
+rng.permuted call per chunk) and compare group churn rates.
+
+Chunks run in a process pool (fork, like chart_renderer.py). Chunk sizes
+depend only on the data and the number of replicates, and chunk k always
+uses child k of SeedSequence(seed), so results are identical for any
+number of workers.
+
+Usage:
+    from resampling_engine import customer_matrix, seasonality_intervals
+    rows, new_year = customer_matrix(customers, orders, churn_events)
+    intervals = seasonality_intervals(rows, new_year, replicates=10_000)
+
+    python src/resampling_engine.py                       # 10,000 replicates
+    python src/resampling_engine.py --replicates 2000 --workers 4 --seed 7
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis_backends import QUICK_CHURN_DAYS
+from table_schemas import DATA_DIR, MONTH_NAMES
+
+DEFAULT_REPLICATES = 10_000
+CONFIDENCE = 0.95
+
+# Resample indices per chunk (replicates x customers) and replicates per
+# chunk: bounds the memory of a worker and spreads work over the pool
+CHUNK_CELLS = 2**23
+MAX_CHUNK_REPLICATES = 500
+
+COLUMNS = (['customers', 'churns', 'quick_churns']
+           + [f'orders_{month}' for month in MONTH_NAMES]
+           + [f'revenue_{month}' for month in MONTH_NAMES])
+_ORDERS = slice(3, 15)
+_REVENUE = slice(15, 27)
+
+
+def customer_matrix(customers, orders, churn_events):
+    """(rows, new_year): one row of COLUMNS per customer and the customer's
+    New Year signup flag. Orders and churns of unknown customers are
+    dropped."""
+    index = pd.Index(customers['customer_id'])
+    n = len(index)
+    rows = np.zeros((n, len(COLUMNS)))
+    rows[:, 0] = 1
+
+    churner = index.get_indexer(churn_events['customer_id'])
+    known = churner >= 0
+    quick = churn_events['subscription_length_days'].to_numpy() <= QUICK_CHURN_DAYS
+    rows[:, 1] = np.bincount(churner[known], minlength=n)
+    rows[:, 2] = np.bincount(churner[known & quick], minlength=n)
+
+    buyer = index.get_indexer(orders['customer_id'])
+    known = buyer >= 0
+    month = orders['order_date'].dt.month.to_numpy()[known] - 1
+    cell = buyer[known] * 12 + month
+    rows[:, _ORDERS] = np.bincount(cell, minlength=n * 12).reshape(n, 12)
+    rows[:, _REVENUE] = np.bincount(cell, weights=orders['order_total'].to_numpy(dtype=float)[known],
+                                    minlength=n * 12).reshape(n, 12)
+    return rows, customers['is_new_year_signup'].to_numpy(dtype=bool)
+
+
+def seasonality_statistics(new_year_totals, other_totals):
+    """Statistics per replicate from (replicates x COLUMNS) group totals.
+
+    Returns {name: array}: New Year and other churn rates (%), their
+    difference (percentage points), the share of New Year churns within
+    QUICK_CHURN_DAYS (%) and each month's order and revenue deviation
+    from the monthly average (%).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new_year_rate = new_year_totals[:, 1] / new_year_totals[:, 0] * 100
+        other_rate = other_totals[:, 1] / other_totals[:, 0] * 100
+        statistics = {
+            'churn_rate_new_year': new_year_rate,
+            'churn_rate_other': other_rate,
+            'churn_rate_difference': new_year_rate - other_rate,
+            'quick_churn_share_new_year': new_year_totals[:, 2] / new_year_totals[:, 1] * 100,
+        }
+        totals = new_year_totals + other_totals
+        for name, columns in (('orders', _ORDERS), ('revenue', _REVENUE)):
+            by_month = totals[:, columns]
+            deviation = (by_month / by_month.mean(axis=1, keepdims=True) - 1) * 100
+            for month, values in zip(MONTH_NAMES, deviation.T):
+                statistics[f'{name}_deviation_{month}'] = values
+    return statistics
+
+
+def _chunks(replicates, n_units):
+    """Replicates per chunk, a function of the data size only"""
+    size = max(1, min(MAX_CHUNK_REPLICATES, CHUNK_CELLS // max(n_units, 1)))
+    counts = [size] * (replicates // size)
+    if replicates % size:
+        counts.append(replicates % size)
+    return counts
+
+
+def _weights(rng, n_replicates, n_units):
+    """(replicates x units) bootstrap weights: how often each unit is drawn"""
+    draws = rng.integers(0, n_units, size=(n_replicates, n_units))
+    draws += np.arange(n_replicates)[:, None] * n_units
+    return np.bincount(draws.ravel(), minlength=n_replicates * n_units).reshape(n_replicates, n_units)
+
+
+# Set in the parent before forking, so workers inherit the rows instead of
+# receiving a pickled copy with every chunk
+_shared = {}
+
+
+def _bootstrap_chunk(seed, n_replicates):
+    rows, new_year = _shared['rows'], _shared['new_year']
+    rng = np.random.default_rng(seed)
+    groups = []
+    for mask in (new_year, ~new_year):
+        units = rows[mask]
+        groups.append(_weights(rng, n_replicates, len(units)) @ units)
+    return seasonality_statistics(*groups)
+
+
+def _permutation_chunk(seed, n_replicates):
+    rows, new_year = _shared['rows'], _shared['new_year']
+    rng = np.random.default_rng(seed)
+    churn_rows = rows[:, :2]
+    labels = rng.permuted(np.broadcast_to(new_year, (n_replicates, len(new_year))), axis=1)
+    new_year_totals = labels.astype(float) @ churn_rows
+    other_totals = churn_rows.sum(axis=0) - new_year_totals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (new_year_totals[:, 1] / new_year_totals[:, 0]
+                - other_totals[:, 1] / other_totals[:, 0]) * 100
+
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        return None
+
+
+def _run(task, rows, new_year, replicates, seed, workers):
+    """task(seed, n) over all chunks, in a pool when workers > 1"""
+    counts = _chunks(replicates, len(rows))
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    _shared.update(rows=rows, new_year=new_year)
+    try:
+        workers = min(workers or os.cpu_count() or 1, len(counts))
+        context = _fork_context()
+        if workers > 1 and context is not None:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                return list(pool.map(task, seeds, counts))
+        return [task(chunk_seed, count) for chunk_seed, count in zip(seeds, counts)]
+    finally:
+        _shared.clear()
+
+
+def seasonality_intervals(rows, new_year, replicates=DEFAULT_REPLICATES, seed=0, workers=None,
+                          confidence=CONFIDENCE, permutations=None):
+    """Point estimate, bootstrap percentile interval and standard error of
+    every seasonality_statistics() value; churn_rate_difference also gets
+    a two-sided permutation p-value (permutations defaults to replicates).
+    """
+    new_year = np.asarray(new_year, dtype=bool)
+    observed = seasonality_statistics(rows[new_year].sum(axis=0)[None], rows[~new_year].sum(axis=0)[None])
+
+    chunks = _run(_bootstrap_chunk, rows, new_year, replicates, seed, workers)
+    tail = (1 - confidence) / 2 * 100
+    result = pd.DataFrame(index=pd.Index(list(observed), name='statistic'),
+                          columns=['estimate', 'ci_low', 'ci_high', 'std_error', 'p_value'], dtype=float)
+    for name, estimate in observed.items():
+        samples = np.concatenate([chunk[name] for chunk in chunks])
+        samples = samples[np.isfinite(samples)]
+        low, high = np.percentile(samples, [tail, 100 - tail]) if len(samples) else (np.nan, np.nan)
+        result.loc[name, ['estimate', 'ci_low', 'ci_high', 'std_error']] = [
+            estimate[0], low, high, samples.std(ddof=1) if len(samples) > 1 else np.nan]
+
+    permutations = replicates if permutations is None else permutations
+    if permutations:
+        null = np.concatenate(_run(_permutation_chunk, rows, new_year, permutations, seed + 1, workers))
+        difference = observed['churn_rate_difference'][0]
+        extreme = np.count_nonzero(np.abs(null) >= abs(difference) - 1e-12)
+        result.loc['churn_rate_difference', 'p_value'] = (extreme + 1) / (len(null) + 1)
+    result.attrs.update(replicates=replicates, permutations=permutations, confidence=confidence, seed=seed)
+    return result
+
+
+def load_intervals(replicates=DEFAULT_REPLICATES, seed=0, workers=None, data_dir=DATA_DIR):
+    """seasonality_intervals() for the generated tables"""
+    from nourishbox import load
+    customers = load('customers', ['customer_id', 'is_new_year_signup'], data_dir=data_dir)
+    orders = load('orders', ['customer_id', 'order_date', 'order_total'], data_dir=data_dir)
+    churn_events = load('churn_events', ['customer_id', 'subscription_length_days'], data_dir=data_dir)
+    rows, new_year = customer_matrix(customers, orders, churn_events)
+    return seasonality_intervals(rows, new_year, replicates=replicates, seed=seed, workers=workers)
+
+
+def print_intervals(intervals):
+    """Seasonality estimates with their intervals, in analyze_seasonality.py's layout"""
+    level = intervals.attrs['confidence']
+    print(f"\n{intervals.attrs['replicates']:,} bootstrap replicates over customers "
+          f"(stratified by New Year signup), {level:.0%} percentile intervals")
+
+    print("\nChurn rates:")
+    labels = [('churn_rate_new_year', 'New Year signups'), ('churn_rate_other', 'Other signups'),
+              ('churn_rate_difference', 'Difference (pp)'),
+              ('quick_churn_share_new_year', f'NY churns <= {QUICK_CHURN_DAYS} days')]
+    for name, label in labels:
+        row = intervals.loc[name]
+        print(f"  {label:22s}: {row['estimate']:6.1f}  [{row['ci_low']:6.1f}, {row['ci_high']:6.1f}]")
+    p_value = intervals.loc['churn_rate_difference', 'p_value']
+    if pd.notna(p_value):
+        print(f"  Permutation test ({intervals.attrs['permutations']:,} shuffles): p = {p_value:.4f}")
+
+    for name, title in (('orders', 'Order volume'), ('revenue', 'Revenue')):
+        print(f"\n{title} deviation from the monthly average (%):")
+        for month in MONTH_NAMES:
+            row = intervals.loc[f'{name}_deviation_{month}']
+            noise = '' if row['ci_low'] > 0 or row['ci_high'] < 0 else '  (within noise)'
+            print(f"  {month:12s}: {row['estimate']:+6.1f}  [{row['ci_low']:+6.1f}, {row['ci_high']:+6.1f}]{noise}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bootstrap intervals for the NourishBox seasonality analysis')
+    parser.add_argument('--replicates', type=int, default=DEFAULT_REPLICATES,
+                        help=f'Bootstrap replicates and permutations (default: {DEFAULT_REPLICATES:,})')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--workers', type=int, help='Processes (default: one per core)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("SEASONALITY CONFIDENCE INTERVALS")
+    print("="*70)
+    start = time.time()
+    intervals = load_intervals(replicates=args.replicates, seed=args.seed, workers=args.workers)
+    print_intervals(intervals)
+    print(f"\nDone in {time.time() - start:.2f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+NourishBox RFM Engine
+Recency, frequency and monetary segmentation of customers, as of any date
+
+Per customer, from the revenue-bearing orders (delivered/pending/delayed)
+placed on or before the as-of date:
+
+    recency_days   days since the last order
+    frequency      number of orders
+    monetary       total order value
+
+Each measure is scored 1-5 by quintile (5 = most recent, most frequent,
+highest spend), and the R and F scores map to the usual segments
+(Champions, Loyal Customers, At Risk, Hibernating, ...).
+
+OrderIndex sorts the orders by (customer, date) once. RFM as of any date
+is then one binary search per customer in the sorted keys plus
+prefix-sum lookups, so a monthly history for millions of customers reuses
+the same index instead of re-filtering and re-grouping the orders.
+
+Quintile edges come from QuantileSketch, a mergeable log-bucket histogram
+with 1% relative accuracy (as in DDSketch). Values are scored by their
+sketch bucket, so customers with equal values always share a score. Sketches
+can be filled chunk by chunk, and stream_rfm() reads orders.csv in chunks,
+so neither the orders nor a sorted copy of them has to fit in memory.
+
+Results are written to data/nourishbox/customer_rfm.csv (one row per
+customer) and, for --history, customer_rfm_history.csv (one row per
+customer and month end).
+
+Usage:
+    from rfm_engine import OrderIndex, score_rfm
+    index = OrderIndex(load('orders'))
+    rfm = score_rfm(index.snapshot('2024-12-31'))
+
+    python src/rfm_engine.py                  # as of the latest order
+    python src/rfm_engine.py --as-of 2024-06-30
+    python src/rfm_engine.py --history 12     # segments at the last 12 month ends
+    python src/rfm_engine.py --stream --chunksize 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from mrr_engine import REALIZED_STATUSES
+from table_schemas import DATA_DIR, csv_read_options
+
+RFM_FILE = 'customer_rfm.csv'
+HISTORY_FILE = 'customer_rfm_history.csv'
+
+SCORES = 5
+
+# Segment per (R score, F score), both 1-5
+SEGMENT_RULES = [
+    ('Hibernating', [1, 2], [1, 2]),
+    ('At Risk', [1, 2], [3, 4]),
+    ("Can't Lose Them", [1, 2], [5]),
+    ('About to Sleep', [3], [1, 2]),
+    ('Need Attention', [3], [3]),
+    ('Loyal Customers', [3, 4], [4, 5]),
+    ('Promising', [4], [1]),
+    ('New Customers', [5], [1]),
+    ('Potential Loyalists', [4, 5], [2, 3]),
+    ('Champions', [5], [4, 5]),
+]
+SEGMENTS = [name for name, _, _ in SEGMENT_RULES]
+
+_SEGMENT_GRID = np.zeros((SCORES + 1, SCORES + 1), dtype=np.int64)
+for _code, (_, _r_scores, _f_scores) in enumerate(SEGMENT_RULES):
+    _SEGMENT_GRID[np.ix_(_r_scores, _f_scores)] = _code
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _date(day):
+    return pd.Timestamp(day * _NS_PER_DAY).date().isoformat()
+
+
+def day_number(dates):
+    """Days since 1970-01-01 for datetime64 values or a date string"""
+    if isinstance(dates, str) or not hasattr(dates, '__len__'):
+        return pd.Timestamp(dates).value // _NS_PER_DAY
+    return np.asarray(dates, dtype='datetime64[ns]').view(np.int64) // _NS_PER_DAY
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch for non-negative values.
+
+    Values fall in log-spaced buckets (bucket k holds gamma^(k-1) < x <=
+    gamma^k), so any quantile is returned within relative_accuracy of the
+    true value. update() takes arrays of any size and merge() combines
+    sketches built from separate chunks.
+    """
+
+    ZERO_KEY = np.iinfo(np.int64).min
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.zero_count = 0
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def count(self):
+        return self.zero_count + int(self.counts.sum())
+
+    def key(self, values):
+        """Bucket key per value (ZERO_KEY for values <= 0)"""
+        values = np.asarray(values, dtype=float)
+        keys = np.full(len(values), self.ZERO_KEY, dtype=np.int64)
+        positive = values > 0
+        keys[positive] = np.ceil(np.log(values[positive]) / self.log_gamma).astype(np.int64)
+        return keys
+
+    def _add(self, keys, counts):
+        """Add counts for consecutive keys starting at keys"""
+        low = min(self.offset, keys) if len(self.counts) else keys
+        high = max(self.offset + len(self.counts), keys + len(counts))
+        if low != self.offset or high - low != len(self.counts):
+            grown = np.zeros(high - low, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.counts, self.offset = grown, low
+        self.counts[keys - self.offset:keys - self.offset + len(counts)] += counts
+
+    def update(self, values):
+        keys = self.key(values)
+        positive = keys != self.ZERO_KEY
+        self.zero_count += int((~positive).sum())
+        if positive.any():
+            keys = keys[positive]
+            first = int(keys.min())
+            self._add(first, np.bincount(keys - first))
+        return self
+
+    def merge(self, other):
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._add(other.offset, other.counts)
+        return self
+
+    def quantile_keys(self, quantiles):
+        """Bucket key of each quantile (nearest rank)"""
+        if self.count == 0:
+            raise ValueError("empty sketch")
+        cumulative = self.zero_count + np.cumsum(self.counts)
+        ranks = np.floor(np.asarray(quantiles, dtype=float) * (self.count - 1)).astype(np.int64)
+        bucket = np.searchsorted(cumulative, ranks, side='right')
+        keys = self.offset + bucket
+        return np.where(ranks < self.zero_count, self.ZERO_KEY, keys)
+
+    def quantiles(self, quantiles):
+        """Approximate values of the quantiles"""
+        keys = self.quantile_keys(quantiles)
+        values = 2 * self.gamma ** keys.astype(float) / (self.gamma + 1)
+        return np.where(keys == self.ZERO_KEY, 0.0, values)
+
+
+class OrderIndex:
+    """Revenue-bearing orders sorted by (customer, date), for RFM as of any date"""
+
+    def __init__(self, orders, statuses=REALIZED_STATUSES):
+        if statuses is not None:
+            orders = orders[orders['delivery_status'].isin(statuses)]
+        codes, self.customers = pd.factorize(orders['customer_id'], sort=True)
+        days = day_number(orders['order_date'])
+        amounts = orders['order_total'].to_numpy(dtype=float)
+        self.first_day = int(days.min()) if len(days) else 0
+        self.last_day = int(days.max()) if len(days) else 0
+        self.span = self.last_day - self.first_day + 1
+
+        keys = codes.astype(np.int64) * self.span + (days - self.first_day)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.days = days[order]
+        self.cumulative = np.concatenate([[0.0], np.cumsum(amounts[order])])
+        n_customers = len(self.customers)
+        self._customer_base = np.arange(n_customers, dtype=np.int64) * self.span
+        self.starts = np.searchsorted(self.keys, self._customer_base)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def snapshot(self, as_of=None):
+        """recency_days, frequency and monetary per customer with an order
+        on or before as_of (default: the last order date)"""
+        day = self.last_day if as_of is None else day_number(as_of)
+        offset = min(max(day - self.first_day, -1), self.span - 1)
+        ends = np.searchsorted(self.keys, self._customer_base + offset, side='right')
+        frequency = ends - self.starts
+        buyers = frequency > 0
+        ends, starts = ends[buyers], self.starts[buyers]
+        rfm = pd.DataFrame({
+            'customer_id': self.customers[buyers],
+            'recency_days': day - self.days[ends - 1],
+            'frequency': frequency[buyers],
+            'monetary': (self.cumulative[ends] - self.cumulative[starts]).round(2),
+        })
+        rfm.attrs['as_of'] = _date(day)
+        return rfm
+
+    def history(self, as_of_dates):
+        """Scored snapshots for several dates, one after another"""
+        for as_of in as_of_dates:
+            yield pd.Timestamp(as_of), score_rfm(self.snapshot(as_of))
+
+
+def sketches(rfm_chunks, relative_accuracy=0.01):
+    """{measure: QuantileSketch} over one or more RFM frames"""
+    result = {column: QuantileSketch(relative_accuracy)
+              for column in ('recency_days', 'frequency', 'monetary')}
+    for chunk in rfm_chunks:
+        for column, sketch in result.items():
+            sketch.update(chunk[column].to_numpy())
+    return result
+
+
+def _score(sketch, values, reverse=False):
+    """1-5 by quintile of the sketch (reverse: low values score 5)"""
+    edges = sketch.quantile_keys(np.arange(1, SCORES) / SCORES)
+    scores = 1 + np.searchsorted(edges, sketch.key(values), side='left')
+    return SCORES + 1 - scores if reverse else scores
+
+
+def score_rfm(rfm, measure_sketches=None):
+    """Add r_score, f_score, m_score, rfm_score (e.g. 545) and segment to an
+    RFM frame.
+
+    measure_sketches: sketches() of the whole population when rfm is one
+    chunk of it (default: sketched from rfm itself).
+    """
+    if measure_sketches is None:
+        measure_sketches = sketches([rfm])
+    scored = rfm.copy()
+    if len(scored) == 0:
+        for column in ('r_score', 'f_score', 'm_score', 'rfm_score'):
+            scored[column] = np.zeros(0, dtype=np.int64)
+        scored['segment'] = pd.Categorical([], categories=SEGMENTS)
+        return scored
+    scored['r_score'] = _score(measure_sketches['recency_days'], rfm['recency_days'], reverse=True)
+    scored['f_score'] = _score(measure_sketches['frequency'], rfm['frequency'])
+    scored['m_score'] = _score(measure_sketches['monetary'], rfm['monetary'])
+    scored['rfm_score'] = scored['r_score'] * 100 + scored['f_score'] * 10 + scored['m_score']
+    codes = _SEGMENT_GRID[scored['r_score'].to_numpy(), scored['f_score'].to_numpy()]
+    scored['segment'] = pd.Categorical.from_codes(codes, categories=SEGMENTS)
+    return scored
+
+
+def stream_rfm(path, as_of=None, chunksize=1_000_000, statuses=REALIZED_STATUSES):
+    """RFM frame from an orders CSV read in chunks.
+
+    Each chunk is reduced to per-customer (count, sum, last date) with a
+    sorted groupby; the partial results are combined the same way, so only
+    one chunk plus one row per customer is in memory at a time.
+    """
+    columns = ['customer_id', 'order_date', 'order_total', 'delivery_status']
+    options = csv_read_options('orders', columns)
+    as_of_day = None if as_of is None else day_number(as_of)
+    partials = []
+    for chunk in pd.read_csv(path, chunksize=chunksize, **options):
+        if statuses is not None:
+            chunk = chunk[chunk['delivery_status'].isin(statuses)]
+        days = day_number(chunk['order_date'])
+        if as_of_day is not None:
+            chunk, days = chunk[days <= as_of_day], days[days <= as_of_day]
+        grouped = pd.DataFrame({'customer_id': chunk['customer_id'].to_numpy(), 'day': days,
+                                'order_total': chunk['order_total'].to_numpy()}).groupby('customer_id', sort=True)
+        partials.append(pd.DataFrame({'frequency': grouped.size(),
+                                      'monetary': grouped['order_total'].sum(),
+                                      'last_day': grouped['day'].max()}))
+    if not partials:
+        raise ValueError(f"{path} has no orders")
+    combined = pd.concat(partials).groupby(level=0, sort=True).agg(
+        {'frequency': 'sum', 'monetary': 'sum', 'last_day': 'max'})
+    day = as_of_day if as_of_day is not None else int(combined['last_day'].max())
+    rfm = pd.DataFrame({
+        'customer_id': combined.index.to_numpy(),
+        'recency_days': day - combined['last_day'].to_numpy(),
+        'frequency': combined['frequency'].to_numpy(),
+        'monetary': combined['monetary'].to_numpy().round(2),
+    })
+    rfm.attrs['as_of'] = _date(day)
+    return rfm
+
+
+def month_ends(last_day, months):
+    """The last `months` month-end dates up to (and including) last_day's month"""
+    last = pd.Timestamp(last_day * _NS_PER_DAY)
+    return list(pd.date_range(end=last + pd.offsets.MonthEnd(0), periods=months, freq='ME'))
+
+
+def write_table(frame, path):
+    """Write a result table atomically"""
+    tmp_path = path + '.tmp'
+    frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def print_segments(scored, title):
+    print(f"\n{title}")
+    counts = scored['segment'].value_counts(sort=False)
+    grouped = scored.groupby('segment', observed=False)
+    recency = grouped['recency_days'].mean()
+    frequency = grouped['frequency'].mean()
+    monetary = grouped['monetary'].mean()
+    print(f"  {'Segment':20s} {'Customers':>10s} {'Share':>6s} {'Recency':>8s} {'Orders':>7s} {'Spend':>10s}")
+    for segment in SEGMENTS:
+        count = counts[segment]
+        if count == 0:
+            continue
+        print(f"  {segment:20s} {count:>10,} {count / len(scored):>6.1%} {recency[segment]:>7.0f}d "
+              f"{frequency[segment]:>7.1f} ${monetary[segment]:>9,.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NourishBox RFM segmentation')
+    parser.add_argument('--as-of', help='Score as of this date (default: latest order)')
+    parser.add_argument('--history', type=int, metavar='MONTHS',
+                        help=f'Also score the last MONTHS month ends into {HISTORY_FILE}')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read orders.csv in chunks instead of loading it (out of core)')
+    parser.add_argument('--chunksize', type=int, default=1_000_000,
+                        help='Rows per chunk with --stream (default: 1,000,000)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f'CSV directory (default: {DATA_DIR})')
+    args = parser.parse_args()
+
+    if args.stream and args.history:
+        print("❌ --history needs the in-memory order index; drop --stream")
+        sys.exit(1)
+
+    print("="*70)
+    print("RFM SEGMENTATION")
+    print("="*70)
+
+    start = time.time()
+    orders_path = os.path.join(args.data_dir, 'orders.csv')
+    if not os.path.exists(orders_path):
+        print(f"❌ {orders_path} not found - generate the data first")
+        sys.exit(1)
+
+    if args.stream:
+        rfm = stream_rfm(orders_path, as_of=args.as_of, chunksize=args.chunksize)
+        index = None
+    else:
+        from nourishbox import load
+        orders = load('orders', columns=['customer_id', 'order_date', 'order_total', 'delivery_status'],
+                      data_dir=args.data_dir)
+        index = OrderIndex(orders)
+        print(f"✓ Indexed {len(index):,} orders of {len(index.customers):,} customers "
+              f"({time.time() - start:.2f}s)")
+        rfm = index.snapshot(args.as_of)
+    if len(rfm) == 0:
+        print("❌ No orders on or before the as-of date")
+        sys.exit(1)
+
+    scored = score_rfm(rfm)
+    as_of = rfm.attrs['as_of']
+    rfm_path = os.path.join(args.data_dir, RFM_FILE)
+    write_table(scored.assign(as_of_date=as_of), rfm_path)
+    print_segments(scored, f"Segments as of {as_of} ({len(scored):,} customers):")
+    print(f"\n✓ Segments saved to: {rfm_path}")
+
+    if args.history:
+        history_start = time.time()
+        frames = []
+        for _, month in index.history(month_ends(index.last_day, args.history)):
+            frames.append(month.assign(as_of_date=month.attrs['as_of']))
+        history = pd.concat(frames, ignore_index=True)
+        history_path = os.path.join(args.data_dir, HISTORY_FILE)
+        write_table(history, history_path)
+
+        mix = pd.crosstab(history['as_of_date'], history['segment'], normalize='index')
+        print(f"\nSegment mix by month end (% of customers with an order so far):")
+        shown = [segment for segment in SEGMENTS if segment in mix.columns]
+        print("  " + "Month end  " + " ".join(f"{segment[:9]:>9s}" for segment in shown))
+        for as_of_date, row in mix.iterrows():
+            print(f"  {as_of_date} " + " ".join(f"{row[segment]:>9.1%}" for segment in shown))
+        print(f"\n✓ {args.history} monthly snapshots ({len(history):,} rows) in "
+              f"{time.time() - history_start:.2f}s saved to: {history_path}")
+
+    print(f"\nDone in {time.time() - start:.2f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
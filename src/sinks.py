@@ -0,0 +1,656 @@
+"""
+NourishBox Load Sinks
+Target databases for load_engine.py behind one small interface
+
+A sink knows how to talk to one kind of database; everything else (chunked
+CSV reads, type conversion, batching, parallelism, retries, telemetry) lives
+in LoadEngine. Every sink implements:
+
+    connect() / close()
+    worker()                      a new, connected sink for a worker thread
+    create_table(table, column_types, primary_key)
+    clear_table(table)
+    write_batch(table, df, column_types) -> rows inserted
+    row_count(table)
+
+column_types maps column -> declared SQL type (see table_schemas.py); each
+sink translates it with its TYPE_NAMES. Batches arrive as typed DataFrames
+(dates as datetime64, booleans, nullable integers, floats, strings).
+
+Target-specific steps hook into the load; the defaults do nothing:
+
+    begin_load(tables)            before the first table (bulk mode drops indexes)
+    begin_table(table, source, batch_rows)
+                                  before a table's first batch (MERGE staging)
+    skip_batch(table, batch_number, row_start, df) -> True if already loaded
+    batch_finished(table, batch_number, inserted, retries, error)
+    end_table(table, inserted)    after its last batch -> rows inserted (MERGE)
+    end_load(tables)              after the last table, even if a load failed
+                                  (bulk mode rebuilds indexes) -> False on failure
+    finish(tables)                after a successful load (views, OPTIMIZE)
+
+A sink given a BatchLedger (ledger=...) records every batch of a CSV load
+in it, and skip_batch() skips the batches a previous run already committed,
+so an interrupted load resumes where it stopped.
+
+Backends:
+    PostgresSink    COPY into a temp table, then INSERT ... ON CONFLICT DO NOTHING
+                    (method='values': execute_values; method='async': binary COPY
+                    over an asyncpg pool); SUPABASE_* environment variables
+    DatabricksSink  INSERT ... VALUES literals, or (loader='copy') Parquet staged in
+                    a volume + COPY INTO; mode='merge' upserts through a staging
+                    table with MERGE INTO; DATABRICKS_* environment variables
+    DuckDBSink      local DuckDB file (pip install duckdb)
+    SQLiteSink      local SQLite file (standard library)
+
+The local sinks need no remote service, so they are handy for benchmarking
+the engine itself.
+"""
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from table_schemas import TABLE_CONFIGS, logical_type
+from sql_literals import encode_rows
+from databricks_staging import ParquetCopyLoader, VolumeStager
+from batch_ledger import file_fingerprint, frame_checksum
+
+# Merge mode stages rows in <table>__merge_staging before MERGE INTO
+MERGE_STAGING_SUFFIX = '__merge_staging'
+
+
+def python_rows(df, column_types, date_format=None):
+    """Rows of df as tuples of plain Python values (None for missing).
+
+    Dates become datetime.date, or strings when date_format is given.
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        kind = logical_type(column_types.get(col, 'TEXT'))
+        if kind == 'date':
+            if date_format:
+                values = series.dt.strftime(date_format)
+            else:
+                values = pd.Series(series.dt.date, index=series.index)
+        else:
+            values = series.astype(object)
+        columns.append(values.where(series.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+class Sink:
+    """Base class: shared helpers for SQL sinks"""
+
+    name = 'sink'
+    # logical type -> column type; None keeps the declared type
+    TYPE_NAMES = {}
+    # False if the database allows only one writer at a time
+    parallel_writes = True
+    # 'append', or 'merge' for sinks that upsert through a staging table
+    mode = 'append'
+
+    def __init__(self):
+        self.conn = None
+        self.cursor = None
+        self.ledger = None
+        # table -> (load id, {batch: (status, checksum)}) while a CSV loads
+        self._ledger_loads = {}
+
+    def column_type(self, declared):
+        return self.TYPE_NAMES.get(logical_type(declared)) or declared
+
+    def quote(self, identifier):
+        return f'"{identifier}"'
+
+    def table_name(self, table):
+        return self.quote(table)
+
+    def column_list(self, columns):
+        return ', '.join(self.quote(col) for col in columns)
+
+    def create_table_sql(self, table, column_types, primary_key):
+        columns = [f"{self.quote(col)} {self.column_type(sql_type)}"
+                   for col, sql_type in column_types.items()]
+        if primary_key and primary_key in column_types:
+            columns.append(f"PRIMARY KEY ({self.quote(primary_key)})")
+        columns_sql = ',\n    '.join(columns)
+        return f"CREATE TABLE IF NOT EXISTS {self.table_name(table)} (\n    {columns_sql}\n)"
+
+    def create_table(self, table, column_types, primary_key):
+        self.cursor.execute(self.create_table_sql(table, column_types, primary_key))
+        self.commit()
+
+    def clear_table_sql(self, table):
+        return f"DELETE FROM {self.table_name(table)}"
+
+    def clear_table(self, table):
+        self.cursor.execute(self.clear_table_sql(table))
+        self.commit()
+        if self.ledger is not None:
+            self.ledger.reset(table)
+
+    def row_count(self, table):
+        try:
+            self.cursor.execute(f"SELECT COUNT(*) FROM {self.table_name(table)}")
+            return self.cursor.fetchone()[0]
+        except Exception:
+            self.rollback()
+            raise
+
+    def describe_table(self, table):
+        """Extra detail for the 'table ready' line (e.g. its layout)"""
+        return ''
+
+    # ------------------------------------------------------------------
+    # Load hooks
+    # ------------------------------------------------------------------
+
+    def begin_load(self, tables):
+        pass
+
+    def end_load(self, tables):
+        return True
+
+    def finish(self, tables):
+        pass
+
+    def begin_table(self, table, source=None, batch_rows=None):
+        """Start a ledger load for the source file (streamed frames have none)"""
+        if self.ledger is None or source is None:
+            self._ledger_loads.pop(table, None)
+            return
+        if self.mode == 'merge':
+            # The staging table is rebuilt every run, so nothing can be skipped
+            self.ledger.reset(table)
+        load_id = self.ledger.begin_load(table, file_fingerprint(source), batch_rows, self.mode)
+        self._ledger_loads[table] = (load_id, self.ledger.batch_status(table, load_id))
+
+    def skip_batch(self, table, batch_number, row_start, df):
+        """True if the ledger records this exact batch as committed"""
+        if table not in self._ledger_loads:
+            return False
+        load_id, previous = self._ledger_loads[table]
+        checksum = frame_checksum(df)
+        status, recorded_checksum = previous.get(batch_number, (None, None))
+        if status == 'done' and recorded_checksum == checksum:
+            return True
+        if status == 'sending':
+            print(f"\n   ⚠️  Batch {batch_number} was in flight when the last run stopped; "
+                  f"resending")
+        self.ledger.mark_sending(table, load_id, batch_number, row_start, len(df), checksum)
+        return False
+
+    def batch_finished(self, table, batch_number, inserted, retries, error):
+        if table not in self._ledger_loads:
+            return
+        load_id = self._ledger_loads[table][0]
+        if error:
+            self.ledger.mark_failed(table, load_id, batch_number, error, retries)
+        else:
+            self.ledger.mark_done(table, load_id, batch_number, inserted, retries)
+
+    def end_table(self, table, inserted):
+        self._ledger_loads.pop(table, None)
+        return inserted
+
+    def commit(self):
+        if self.conn is not None:
+            self.conn.commit()
+
+    def rollback(self):
+        try:
+            self.conn.rollback()
+        except Exception:
+            pass
+
+    def close(self):
+        if self.cursor is not None:
+            self.cursor.close()
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.cursor = None
+
+    def describe(self):
+        return self.name
+
+
+class PostgresSink(Sink):
+    """PostgreSQL / Supabase via psycopg2; rows that already exist are skipped"""
+
+    name = 'postgres'
+    METHODS = ('copy', 'values', 'async')
+
+    def __init__(self, host=None, database=None, user=None, password=None, port=None,
+                 sslmode=None, method='copy', connections=4):
+        super().__init__()
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}, got {method!r}")
+        self.method = method
+        # Size of the asyncpg pool (method='async')
+        self.connections = connections
+        self.writer = None
+        # Run on every new session, e.g. SET synchronous_commit during bulk loads
+        self.session_settings = []
+        self.host = host or os.getenv('SUPABASE_HOST')
+        self.database = database or os.getenv('SUPABASE_DB', 'postgres')
+        self.user = user or os.getenv('SUPABASE_USER', 'postgres')
+        self.password = password or os.getenv('SUPABASE_PASSWORD')
+        self.port = port or os.getenv('SUPABASE_PORT', '5432')
+        self.sslmode = sslmode or os.getenv('SUPABASE_SSLMODE', 'require')
+
+        if not all([self.host, self.password]):
+            raise ValueError(
+                "Missing Supabase credentials! Please set SUPABASE_HOST and "
+                "SUPABASE_PASSWORD (or create a .env file)."
+            )
+
+    def open_connection(self):
+        """A new psycopg2 connection with the configured credentials"""
+        import psycopg2
+        return psycopg2.connect(host=self.host, database=self.database, user=self.user,
+                                password=self.password, port=self.port, sslmode=self.sslmode)
+
+    def connect(self):
+        self.conn = self.open_connection()
+        self.cursor = self.conn.cursor()
+        for statement in self.session_settings:
+            self.cursor.execute(statement)
+        self.conn.commit()
+        if self.method == 'async':
+            from async_pg_loader import AsyncCopyWriter
+            self.writer = AsyncCopyWriter(
+                connections=self.connections, host=self.host, database=self.database,
+                user=self.user, password=self.password, port=int(self.port), ssl=self.sslmode
+            )
+        return self
+
+    def worker(self):
+        if self.writer is not None:
+            return self  # Batches share the asyncpg pool; copy() is thread-safe
+        sink = PostgresSink(self.host, self.database, self.user, self.password, self.port,
+                            self.sslmode, self.method)
+        sink.session_settings = list(self.session_settings)
+        return sink.connect()
+
+    def begin_table(self, table, source=None, batch_rows=None):
+        super().begin_table(table, source, batch_rows)
+        if self.writer is not None:
+            self.writer.begin_table(table)
+
+    def write_batch(self, table, df, column_types):
+        if self.writer is not None:
+            return self.writer.copy(table, list(df.columns), python_rows(df, column_types))
+        if self.method == 'values':
+            return self.insert_values(table, df, column_types)
+        return self.copy_batch(table, df)
+
+    def copy_batch(self, table, df):
+        """COPY the batch as CSV into a session temp table, then move it across"""
+        staging = self.quote(f"_load_{table}")
+        columns = self.column_list(df.columns)
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d')
+        buffer.seek(0)
+        try:
+            # Emptied by every commit, so one temp table serves all batches
+            self.cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                                f"(LIKE {self.table_name(table)}) ON COMMIT DELETE ROWS")
+            self.cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN "
+                                    f"WITH (FORMAT csv, NULL '\\N')", buffer)
+            self.cursor.execute(f"INSERT INTO {self.table_name(table)} ({columns}) "
+                                f"SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING")
+            inserted = self.cursor.rowcount
+            self.conn.commit()
+            return inserted
+        except Exception:
+            self.rollback()
+            raise
+
+    def insert_values(self, table, df, column_types):
+        from psycopg2.extras import execute_values
+        query = (f"INSERT INTO {self.table_name(table)} ({self.column_list(df.columns)}) "
+                 f"VALUES %s ON CONFLICT DO NOTHING")
+        try:
+            # One page, so rowcount covers the whole batch
+            execute_values(self.cursor, query, python_rows(df, column_types),
+                           page_size=len(df))
+            inserted = self.cursor.rowcount
+            self.conn.commit()
+            return inserted
+        except Exception:
+            self.rollback()
+            raise
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.writer = None
+        super().close()
+
+    def describe(self):
+        return f"{self.name} ({self.host}/{self.database}, {self.method})"
+
+
+class DatabricksSink(Sink):
+    """Databricks SQL warehouse: Delta tables loaded with INSERT ... VALUES or COPY INTO"""
+
+    name = 'databricks'
+    TYPE_NAMES = {
+        'string': 'STRING',
+        'integer': 'INT',
+        'date': 'DATE',
+        'boolean': 'BOOLEAN',
+    }
+
+    LOADERS = ('insert', 'copy')
+    MODES = ('append', 'merge')
+
+    def __init__(self, server_hostname=None, http_path=None, access_token=None,
+                 catalog=None, schema=None, loader='insert', staging_volume=None,
+                 mode='append', ledger=None, stager=None, endpoint=None):
+        """stager replaces the volume (e.g. a LocalStager) and endpoint the
+        warehouse connection (e.g. a LocalSqlEndpoint), for local testing"""
+        super().__init__()
+        if loader not in self.LOADERS:
+            raise ValueError(f"loader must be one of {self.LOADERS}, got {loader!r}")
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got {mode!r}")
+        self.loader = loader
+        self.mode = mode
+        self.ledger = ledger
+        self.stager = stager
+        self.endpoint = endpoint
+        self.server_hostname = server_hostname or os.getenv('DATABRICKS_SERVER_HOSTNAME')
+        self.http_path = http_path or os.getenv('DATABRICKS_HTTP_PATH')
+        self.access_token = access_token or os.getenv('DATABRICKS_ACCESS_TOKEN')
+        self.catalog = catalog or os.getenv('DATABRICKS_CATALOG', 'main')
+        self.schema = schema or os.getenv('DATABRICKS_SCHEMA', 'nourishbox')
+        self.staging_volume = staging_volume or os.getenv(
+            'DATABRICKS_STAGING_VOLUME', f'/Volumes/{self.catalog}/{self.schema}/staging'
+        )
+        self.work_dir = None
+        self.copy_loader = None
+
+        if endpoint is None and not all([self.server_hostname, self.http_path,
+                                         self.access_token]):
+            raise ValueError(
+                "Missing Databricks credentials! Please set DATABRICKS_SERVER_HOSTNAME, "
+                "DATABRICKS_HTTP_PATH and DATABRICKS_ACCESS_TOKEN (or create a .env file)."
+            )
+
+    def open_connection(self):
+        """A new warehouse connection (or the shared stand-in endpoint)"""
+        if self.endpoint is not None:
+            return self.endpoint
+        from databricks import sql
+        connect_args = {
+            'server_hostname': self.server_hostname,
+            'http_path': self.http_path,
+            'access_token': self.access_token,
+        }
+        if self.work_dir:
+            # PUT/REMOVE may only read files under this directory
+            connect_args['staging_allowed_local_path'] = self.work_dir
+        return sql.connect(**connect_args)
+
+    def connect(self):
+        if self.loader == 'copy':
+            self.work_dir = tempfile.mkdtemp(prefix='nourishbox_parquet_')
+        self.conn = self.open_connection()
+        self.cursor = self.conn.cursor()
+        self.cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {self.catalog}.{self.schema}")
+        if self.loader == 'copy':
+            stager = self.stager
+            if stager is None:
+                volume = self.staging_volume.rstrip('/').split('/')
+                if len(volume) != 5 or volume[1] != 'Volumes':
+                    raise ValueError(f"DATABRICKS_STAGING_VOLUME must look like "
+                                     f"/Volumes/catalog/schema/volume, got {self.staging_volume}")
+                self.cursor.execute(
+                    f"CREATE VOLUME IF NOT EXISTS {volume[2]}.{volume[3]}.{volume[4]}"
+                )
+                stager = VolumeStager(self.cursor, self.staging_volume)
+            self.copy_loader = ParquetCopyLoader(self.cursor, stager, self.work_dir)
+        return self
+
+    def worker(self):
+        return DatabricksSink(self.server_hostname, self.http_path, self.access_token,
+                              self.catalog, self.schema, self.loader, self.staging_volume,
+                              mode=self.mode, stager=self.stager,
+                              endpoint=self.endpoint).connect()
+
+    def quote(self, identifier):
+        return f"`{identifier}`"
+
+    def table_name(self, table):
+        return f"{self.catalog}.{self.schema}.{table}"
+
+    def create_table_sql(self, table, column_types, primary_key):
+        # Delta does not enforce primary keys
+        return super().create_table_sql(table, column_types, None) + " USING DELTA"
+
+    def commit(self):
+        pass  # Statements auto-commit
+
+    def get_column_types(self, table):
+        """{column: type} of an existing table"""
+        self.cursor.execute(f"DESCRIBE TABLE {self.table_name(table)}")
+        column_types = {}
+        for row in self.cursor.fetchall():
+            # Partition/metadata sections start with a blank or '#' row
+            if not row[0] or row[0].startswith('#'):
+                break
+            column_types[row[0]] = row[1].upper()
+        return column_types
+
+    def write_target(self, table):
+        """Where batches go: the table, or its staging table in merge mode"""
+        if self.mode == 'merge':
+            return self.table_name(table + MERGE_STAGING_SUFFIX)
+        return self.table_name(table)
+
+    def write_batch(self, table, df, column_types):
+        types = {col: self.column_type(column_types.get(col, 'TEXT')) for col in df.columns}
+        target = self.write_target(table)
+        if self.copy_loader is not None:
+            return self.copy_loader.load(df, target, table, types)['affected']
+        values_sql = ',\n'.join(encode_rows(df, types))
+        self.cursor.execute(f"INSERT INTO {target} "
+                            f"({self.column_list(df.columns)}) VALUES {values_sql}")
+        row = self.cursor.fetchone()
+        return int(row[0]) if row is not None and row[0] is not None else len(df)
+
+    # ------------------------------------------------------------------
+    # Merge mode
+    # ------------------------------------------------------------------
+
+    def begin_table(self, table, source=None, batch_rows=None):
+        super().begin_table(table, source, batch_rows)
+        if self.mode == 'merge':
+            self.cursor.execute(f"CREATE OR REPLACE TABLE {self.write_target(table)} AS "
+                                f"SELECT * FROM {self.table_name(table)} LIMIT 0")
+
+    def end_table(self, table, inserted):
+        """Merge mode: MERGE the staged rows into the table, then drop the staging table"""
+        inserted = super().end_table(table, inserted)
+        if self.mode != 'merge':
+            return inserted
+        try:
+            self.cursor.execute(self.merge_sql(table, list(self.get_column_types(table))))
+            row = self.cursor.fetchone()
+        finally:
+            self.cursor.execute(f"DROP TABLE IF EXISTS {self.write_target(table)}")
+
+        counts = merge_counts(row, inserted)
+        print(f"   ✓ Merged {inserted:,} staged rows: {counts['matched']:,} matched "
+              f"({counts['updated']:,} updated, {counts['unchanged']:,} unchanged), "
+              f"{counts['inserted']:,} inserted")
+        return counts['inserted']
+
+    def merge_sql(self, table, columns):
+        """MERGE staged rows into the target on the primary key.
+
+        Matched rows are only updated when their content hash differs, so
+        unchanged rows (and the Delta files holding them) are not rewritten.
+        """
+        primary_key = TABLE_CONFIGS[table]
+        value_columns = [col for col in columns if col != primary_key]
+
+        update_list = ',\n                    '.join(f"`{col}` = s.`{col}`" for col in value_columns)
+        insert_columns = ', '.join(f"`{col}`" for col in columns)
+        insert_values = ', '.join(f"s.`{col}`" for col in columns)
+
+        return f"""
+            MERGE INTO {self.table_name(table)} AS t
+            USING {self.write_target(table)} AS s
+            ON t.`{primary_key}` = s.`{primary_key}`
+            WHEN MATCHED AND {row_hash_sql('t', value_columns)} <> {row_hash_sql('s', value_columns)}
+                THEN UPDATE SET
+                    {update_list}
+            WHEN NOT MATCHED
+                THEN INSERT ({insert_columns}) VALUES ({insert_values})
+        """
+
+    def close(self):
+        if self.endpoint is not None:
+            self.conn = None  # The stand-in endpoint belongs to the caller
+        super().close()
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        self.work_dir = None
+
+    def describe(self):
+        return f"{self.name} ({self.catalog}.{self.schema}, {self.loader}, {self.mode})"
+
+
+def row_hash_sql(alias, columns):
+    """SQL expression hashing a row's values (NULL-safe, order-sensitive)"""
+    parts = ', '.join(f"COALESCE(CAST({alias}.`{col}` AS STRING), chr(0))" for col in columns)
+    return f"md5(concat_ws(chr(31), {parts}))"
+
+
+def merge_counts(row, staged_rows):
+    """Counts from a MERGE result row.
+
+    Databricks returns (num_affected_rows, num_updated_rows,
+    num_deleted_rows, num_inserted_rows). Staged rows that were not inserted
+    matched an existing row.
+    """
+    updated = int(row[1]) if row and len(row) > 3 and row[1] is not None else 0
+    inserted = int(row[3]) if row and len(row) > 3 and row[3] is not None else 0
+    matched = max(0, staged_rows - inserted)
+    return {
+        'matched': matched,
+        'updated': updated,
+        'unchanged': matched - updated,
+        'inserted': inserted,
+    }
+
+
+class DuckDBSink(Sink):
+    """Local DuckDB database file; batches are inserted straight from the DataFrame"""
+
+    name = 'duckdb'
+
+    def __init__(self, path, db=None):
+        super().__init__()
+        self.path = path
+        self.db = db
+        self.owns_db = db is None
+
+    def connect(self):
+        import duckdb  # Optional dependency
+        if self.db is None:
+            self.db = duckdb.connect(self.path)
+        self.conn = self.db
+        self.cursor = self.db.cursor()
+        return self
+
+    def worker(self):
+        # Cursors on one DuckDB database are independent connections
+        return DuckDBSink(self.path, db=self.db).connect()
+
+    def commit(self):
+        pass  # Autocommit
+
+    def write_batch(self, table, df, column_types):
+        view = f"batch_{id(df):x}"
+        columns = self.column_list(df.columns)
+        self.cursor.register(view, df)
+        try:
+            self.cursor.execute(f"INSERT OR IGNORE INTO {self.table_name(table)} ({columns}) "
+                                f"SELECT {columns} FROM {view}")
+            return self.cursor.fetchone()[0]
+        finally:
+            self.cursor.unregister(view)
+
+    def close(self):
+        if self.cursor is not None:
+            self.cursor.close()
+        if self.owns_db and self.db is not None:
+            self.db.close()
+        self.cursor = None
+        self.conn = None
+        self.db = None
+
+    def describe(self):
+        return f"{self.name} ({self.path})"
+
+
+class SQLiteSink(Sink):
+    """Local SQLite database file (one writer; dates stored as ISO text)"""
+
+    name = 'sqlite'
+    parallel_writes = False
+    TYPE_NAMES = {
+        'string': 'TEXT',
+        'integer': 'INTEGER',
+        'decimal': 'REAL',
+        'date': 'TEXT',
+        'boolean': 'INTEGER',
+    }
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def connect(self):
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.cursor = self.conn.cursor()
+        return self
+
+    def worker(self):
+        return self
+
+    def write_batch(self, table, df, column_types):
+        placeholders = ', '.join('?' for _ in df.columns)
+        query = (f"INSERT OR IGNORE INTO {self.table_name(table)} "
+                 f"({self.column_list(df.columns)}) VALUES ({placeholders})")
+        try:
+            self.cursor.executemany(query, python_rows(df, column_types, date_format='%Y-%m-%d'))
+            inserted = self.cursor.rowcount
+            self.conn.commit()
+            return inserted
+        except Exception:
+            self.rollback()
+            raise
+
+    def describe(self):
+        return f"{self.name} ({self.path})"
+
+
+SINKS = {
+    'postgres': PostgresSink,
+    'databricks': DatabricksSink,
+    'duckdb': DuckDBSink,
+    'sqlite': SQLiteSink,
+}
@@ -0,0 +1,143 @@
+"""
+NourishBox SQL Literal Encoder
+Column-wise rendering of DataFrames to SQL literals for INSERT ... VALUES
+
+Each column is rendered in one pass with vectorized pandas string
+operations, driven by the declared column type (from DESCRIBE TABLE), rather
+than by inspecting every cell in Python:
+
+    STRING / VARCHAR   'text' with quotes and backslashes escaped
+    DATE               DATE'2024-01-31'
+    TIMESTAMP          TIMESTAMP'2024-01-31 12:00:00'
+    INT / BIGINT / ... 42
+    DECIMAL / DOUBLE   70.94
+    BOOLEAN            TRUE / FALSE (bools, 'true'/'false', 1/0, 'yes'/'no')
+
+Missing values (NaN, None, NaT, empty or unparseable numbers and dates, and
+non-finite floats) become NULL.
+
+Databricks SQL reads backslash as the escape character inside string
+literals, so quotes are escaped as \' rather than doubled: on runtimes that
+do not accept '', 'O''Brien' is two adjacent literals and reads as OBrien.
+unescape_string() is the reverse, following Spark's rules; the DuckDB
+stand-in (databricks_staging.py) uses it to read literals the way the
+warehouse does.
+
+Usage:
+    rows = encode_rows(df, {'order_id': 'STRING', 'order_date': 'DATE', ...})
+    values_sql = ',\n'.join(rows[0:1000])
+"""
+
+import string
+
+import numpy as np
+import pandas as pd
+
+INTEGER_TYPES = ('TINYINT', 'SMALLINT', 'INT', 'INTEGER', 'BIGINT', 'LONG')
+FLOAT_TYPES = ('DECIMAL', 'NUMERIC', 'DOUBLE', 'FLOAT', 'REAL')
+TRUE_STRINGS = ('true', 't', '1', '1.0', 'yes', 'y')
+# Spark's single-character escapes; any other escaped character stands for itself
+SPARK_ESCAPES = {
+    '0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a',
+    '%': '\\%', '_': '\\_',
+}
+
+
+def _base_type(sql_type):
+    return sql_type.upper().split('(')[0].strip()
+
+
+def _with_nulls(rendered, missing):
+    return rendered.where(~missing, 'NULL')
+
+
+def encode_column(series, sql_type):
+    """Render one column to a Series of SQL literal strings"""
+    base = _base_type(sql_type)
+
+    if base in INTEGER_TYPES:
+        numbers = pd.to_numeric(series, errors='coerce')
+        missing = numbers.isna()
+        rendered = numbers.fillna(0).round().astype('int64').astype(str)
+        return _with_nulls(rendered, missing)
+
+    if base in FLOAT_TYPES:
+        numbers = pd.to_numeric(series, errors='coerce').astype(float)
+        missing = ~np.isfinite(numbers)
+        rendered = numbers.astype(str)
+        return _with_nulls(rendered, missing)
+
+    if base == 'BOOLEAN':
+        missing = series.isna()
+        if series.dtype == bool:
+            values = series
+        else:
+            values = series.astype(str).str.strip().str.lower().isin(TRUE_STRINGS)
+        rendered = pd.Series(np.where(values, 'TRUE', 'FALSE'), index=series.index)
+        return _with_nulls(rendered, missing)
+
+    if base == 'DATE':
+        dates = pd.to_datetime(series, errors='coerce')
+        missing = dates.isna()
+        # numpy renders datetime64[D] as YYYY-MM-DD in C, unlike dt.strftime
+        text = pd.Series(dates.values.astype('datetime64[D]').astype(str), index=series.index)
+        return _with_nulls("DATE'" + text + "'", missing)
+
+    if base.startswith('TIMESTAMP'):
+        stamps = pd.to_datetime(series, errors='coerce')
+        missing = stamps.isna()
+        text = pd.Series(stamps.values.astype('datetime64[s]').astype(str), index=series.index)
+        return _with_nulls("TIMESTAMP'" + text.str.replace('T', ' ', regex=False) + "'", missing)
+
+    # Strings: Databricks SQL treats backslash as an escape character
+    missing = series.isna()
+    text = series.astype(str)
+    if series.dtype == bool:
+        text = text.str.lower()
+    elif series.dtype.kind == 'f':
+        # Whole numbers read as float because of NaNs (zip codes, keys)
+        # keep their integer spelling: '12345', not '12345.0'
+        present = series[~missing]
+        if (present == present.round()).all():
+            text = series.fillna(0).astype('int64').astype(str)
+    escaped = text.str.replace('\\', '\\\\', regex=False).str.replace("'", "\\'", regex=False)
+    return _with_nulls("'" + escaped + "'", missing)
+
+
+def unescape_string(body):
+    """Value of a Spark string literal's body (the text between the quotes)"""
+    chars = []
+    i = 0
+    while i < len(body):
+        if body[i] != '\\' or i + 1 == len(body):
+            chars.append(body[i])
+            i += 1
+            continue
+        escaped = body[i + 1]
+        unicode_digits = body[i + 2:i + 6]
+        octal_digits = body[i + 1:i + 4]
+        if escaped == 'u' and len(unicode_digits) == 4 and \
+                all(c in string.hexdigits for c in unicode_digits):
+            chars.append(chr(int(unicode_digits, 16)))
+            i += 6
+        elif len(octal_digits) == 3 and octal_digits[0] in '0123' and \
+                all(c in string.octdigits for c in octal_digits):
+            chars.append(chr(int(octal_digits, 8)))
+            i += 4
+        else:
+            chars.append(SPARK_ESCAPES.get(escaped, escaped))
+            i += 2
+    return ''.join(chars)
+
+
+def encode_rows(df, column_types):
+    """Render every row of df to a '(v1, v2, ...)' literal tuple.
+
+    column_types maps column -> SQL type; columns missing from it are
+    rendered as strings.
+    """
+    if len(df) == 0:
+        return []
+    columns = [encode_column(df[col], column_types.get(col, 'STRING')) for col in df.columns]
+    joined = columns[0].str.cat(columns[1:], sep=', ') if len(columns) > 1 else columns[0]
+    return ('(' + joined + ')').tolist()
@@ -0,0 +1,145 @@
+-- ============================================================================
+-- NourishBox Supabase Materialized Views
+-- ============================================================================
+--
+-- Pre-aggregated versions of the heavier reporting views in supabase_views.sql.
+-- Power BI can read these small tables instead of re-aggregating orders and
+-- order_items on every refresh.
+--
+-- sync_to_supabase.py runs this file after loading and then refreshes every
+-- view with REFRESH MATERIALIZED VIEW CONCURRENTLY (in parallel), recording
+-- the result in reporting_refresh_log. Each view has a unique index, which is
+-- what allows the concurrent refresh (readers are never blocked).
+--
+-- The views are created WITH NO DATA; the first sync populates them.
+-- ============================================================================
+
+-- ============================================================================
+-- FRESHNESS METADATA
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS reporting_refresh_log (
+    view_name VARCHAR(100) PRIMARY KEY,
+    refreshed_at TIMESTAMPTZ NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    row_count INTEGER,
+    refresh_mode VARCHAR(20) NOT NULL
+);
+
+-- ============================================================================
+-- MATERIALIZED VIEWS
+-- ============================================================================
+
+-- Monthly revenue summary
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_monthly_revenue AS
+SELECT
+    year_month,
+    COUNT(DISTINCT customer_id) AS unique_customers,
+    COUNT(*) AS total_orders,
+    SUM(order_total) AS total_revenue,
+    AVG(order_total) AS avg_order_value,
+    SUM(CASE WHEN delivery_status = 'delivered'
+        THEN order_total ELSE 0 END) AS delivered_revenue,
+    COUNT(CASE WHEN delivery_status = 'delivered' THEN 1 END) AS delivered_orders
+FROM orders
+GROUP BY year_month
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_monthly_revenue
+    ON mv_monthly_revenue (year_month);
+
+-- Customer lifetime value
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_customer_lifetime_value AS
+SELECT
+    c.customer_id,
+    c.registration_date,
+    c.acquisition_channel,
+    COUNT(DISTINCT o.order_id) AS total_orders,
+    COALESCE(SUM(o.order_total), 0) AS total_revenue,
+    COALESCE(AVG(o.order_total), 0) AS avg_order_value,
+    CURRENT_DATE - c.registration_date AS days_since_registration,
+    CASE
+        WHEN EXISTS (
+            SELECT 1 FROM subscriptions s2
+            WHERE s2.customer_id = c.customer_id
+            AND s2.status = 'active'
+        ) THEN TRUE
+        ELSE FALSE
+    END AS is_active
+FROM customers c
+LEFT JOIN orders o ON c.customer_id = o.customer_id
+GROUP BY c.customer_id, c.registration_date, c.acquisition_channel
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_customer_lifetime_value
+    ON mv_customer_lifetime_value (customer_id);
+CREATE INDEX IF NOT EXISTS idx_mv_customer_lifetime_value_channel
+    ON mv_customer_lifetime_value (acquisition_channel);
+
+-- Product popularity
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_product_popularity AS
+SELECT
+    product_type,
+    product_name,
+    product_category,
+    COUNT(*) AS times_ordered,
+    SUM(quantity) AS total_quantity,
+    AVG(unit_cost) AS avg_cost
+FROM order_items
+GROUP BY product_type, product_name, product_category
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_product_popularity
+    ON mv_product_popularity (product_type, product_name, product_category);
+
+-- Churn summary by reason
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_churn_summary AS
+SELECT
+    churn_reason,
+    COUNT(*) AS churn_count,
+    ROUND(AVG(subscription_length_days), 0) AS avg_days_before_churn,
+    SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END) AS retention_attempts,
+    SUM(CASE WHEN retention_offer_accepted THEN 1 ELSE 0 END) AS retention_successes,
+    CASE
+        WHEN SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END) > 0
+        THEN ROUND(
+            100.0 * SUM(CASE WHEN retention_offer_accepted THEN 1 ELSE 0 END) /
+            SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END), 2
+        )
+        ELSE 0
+    END AS retention_success_rate
+FROM churn_events
+GROUP BY churn_reason
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_churn_summary
+    ON mv_churn_summary (churn_reason);
+
+-- ============================================================================
+-- COMMENTS
+-- ============================================================================
+
+COMMENT ON TABLE reporting_refresh_log IS 'Last refresh time, duration and row count per materialized view';
+COMMENT ON MATERIALIZED VIEW mv_monthly_revenue IS 'Materialized v_monthly_revenue, refreshed after each sync';
+COMMENT ON MATERIALIZED VIEW mv_customer_lifetime_value IS 'Materialized v_customer_lifetime_value, refreshed after each sync';
+COMMENT ON MATERIALIZED VIEW mv_product_popularity IS 'Materialized v_product_popularity, refreshed after each sync';
+COMMENT ON MATERIALIZED VIEW mv_churn_summary IS 'Materialized v_churn_summary, refreshed after each sync';
+
+-- ============================================================================
+-- Example queries
+-- ============================================================================
+
+/*
+
+-- Monthly revenue trend (index lookup on a ~60-row table)
+SELECT * FROM mv_monthly_revenue ORDER BY year_month DESC LIMIT 12;
+
+-- Top customers by lifetime value
+SELECT * FROM mv_customer_lifetime_value ORDER BY total_revenue DESC LIMIT 10;
+
+-- How fresh is each view?
+SELECT view_name, refreshed_at, duration_ms, row_count, refresh_mode
+FROM reporting_refresh_log
+ORDER BY view_name;
+
+*/
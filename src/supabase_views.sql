@@ -1,11 +1,15 @@
 -- ============================================================================
--- NourishBox Supabase Views (CSV-Compatible)
+-- NourishBox Supabase Views
 -- ============================================================================
 --
--- This file creates views that work with data imported from CSV files.
--- CSV imports store dates as TEXT, so we use explicit type casting.
+-- This file creates reporting views over the typed tables created by
+-- sync_to_supabase.py (DATE, DECIMAL, INTEGER and BOOLEAN columns, see
+-- TABLE_SCHEMAS). The views use the columns directly, without casts, so
+-- date-range filters and aggregates can use the indexes on these tables.
 --
--- Run this AFTER importing your CSV data to Supabase.
+-- sync_to_supabase.py runs this file at the end of every sync. Tables that
+-- were imported through the Supabase CSV importer (all TEXT) are migrated
+-- to typed columns in place the next time the sync runs.
 -- ============================================================================
 
 -- Drop existing views if they exist
@@ -26,13 +30,13 @@ SELECT
     c.first_name,
     c.last_name,
     c.email,
-    c.registration_date::DATE,
+    c.registration_date,
     c.acquisition_channel,
     s.subscription_id,
     s.plan_name,
-    s.monthly_price::DECIMAL(10,2),
-    s.start_date::DATE,
-    CURRENT_DATE - s.start_date::DATE AS days_active
+    s.monthly_price,
+    s.start_date,
+    CURRENT_DATE - s.start_date AS days_active
 FROM customers c
 JOIN subscriptions s ON c.customer_id = s.customer_id
 WHERE s.status = 'active';
@@ -43,10 +47,10 @@ SELECT
     year_month,
     COUNT(DISTINCT customer_id) AS unique_customers,
     COUNT(*) AS total_orders,
-    SUM(order_total::DECIMAL) AS total_revenue,
-    AVG(order_total::DECIMAL) AS avg_order_value,
+    SUM(order_total) AS total_revenue,
+    AVG(order_total) AS avg_order_value,
     SUM(CASE WHEN delivery_status = 'delivered'
-        THEN order_total::DECIMAL ELSE 0 END) AS delivered_revenue,
+        THEN order_total ELSE 0 END) AS delivered_revenue,
     COUNT(CASE WHEN delivery_status = 'delivered' THEN 1 END) AS delivered_orders
 FROM orders
 GROUP BY year_month
@@ -56,12 +60,12 @@ ORDER BY year_month;
 CREATE OR REPLACE VIEW v_customer_lifetime_value AS
 SELECT
     c.customer_id,
-    c.registration_date::DATE,
+    c.registration_date,
     c.acquisition_channel,
     COUNT(DISTINCT o.order_id) AS total_orders,
-    COALESCE(SUM(o.order_total::DECIMAL), 0) AS total_revenue,
-    COALESCE(AVG(o.order_total::DECIMAL), 0) AS avg_order_value,
-    CURRENT_DATE - c.registration_date::DATE AS days_since_registration,
+    COALESCE(SUM(o.order_total), 0) AS total_revenue,
+    COALESCE(AVG(o.order_total), 0) AS avg_order_value,
+    CURRENT_DATE - c.registration_date AS days_since_registration,
     CASE
         WHEN EXISTS (
             SELECT 1 FROM subscriptions s2
@@ -81,8 +85,8 @@ SELECT
     product_name,
     product_category,
     COUNT(*) AS times_ordered,
-    SUM(quantity::INTEGER) AS total_quantity,
-    AVG(unit_cost::DECIMAL) AS avg_cost
+    SUM(quantity) AS total_quantity,
+    AVG(unit_cost) AS avg_cost
 FROM order_items
 GROUP BY product_type, product_name, product_category
 ORDER BY times_ordered DESC;
@@ -92,14 +96,14 @@ CREATE OR REPLACE VIEW v_churn_summary AS
 SELECT
     churn_reason,
     COUNT(*) AS churn_count,
-    ROUND(AVG(subscription_length_days::INTEGER), 0) AS avg_days_before_churn,
-    SUM(CASE WHEN attempted_retention::BOOLEAN THEN 1 ELSE 0 END) AS retention_attempts,
-    SUM(CASE WHEN retention_offer_accepted::BOOLEAN THEN 1 ELSE 0 END) AS retention_successes,
+    ROUND(AVG(subscription_length_days), 0) AS avg_days_before_churn,
+    SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END) AS retention_attempts,
+    SUM(CASE WHEN retention_offer_accepted THEN 1 ELSE 0 END) AS retention_successes,
     CASE
-        WHEN SUM(CASE WHEN attempted_retention::BOOLEAN THEN 1 ELSE 0 END) > 0
+        WHEN SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END) > 0
         THEN ROUND(
-            100.0 * SUM(CASE WHEN retention_offer_accepted::BOOLEAN THEN 1 ELSE 0 END) /
-            SUM(CASE WHEN attempted_retention::BOOLEAN THEN 1 ELSE 0 END), 2
+            100.0 * SUM(CASE WHEN retention_offer_accepted THEN 1 ELSE 0 END) /
+            SUM(CASE WHEN attempted_retention THEN 1 ELSE 0 END), 2
         )
         ELSE 0
     END AS retention_success_rate
@@ -139,7 +143,7 @@ SELECT * FROM v_churn_summary;
 
 -- Total revenue
 /*
-SELECT SUM(order_total::DECIMAL) as total_revenue
+SELECT SUM(order_total) as total_revenue
 FROM orders;
 */
 
@@ -159,8 +163,8 @@ ORDER BY count DESC;
 SELECT
     s.plan_name,
     COUNT(DISTINCT o.order_id) as total_orders,
-    SUM(o.order_total::DECIMAL) as total_revenue,
-    AVG(o.order_total::DECIMAL) as avg_order_value
+    SUM(o.order_total) as total_revenue,
+    AVG(o.order_total) as avg_order_value
 FROM subscriptions s
 JOIN orders o ON s.subscription_id = o.subscription_id
 GROUP BY s.plan_name
@@ -186,9 +190,9 @@ ORDER BY churn_rate DESC;
 SELECT
     s.plan_name,
     COUNT(r.review_id) AS review_count,
-    ROUND(AVG(r.rating::INTEGER), 2) AS avg_rating,
-    ROUND(AVG(r.meal_quality_rating::INTEGER), 2) AS avg_meal_rating,
-    ROUND(AVG(r.beauty_quality_rating::INTEGER), 2) AS avg_beauty_rating
+    ROUND(AVG(r.rating), 2) AS avg_rating,
+    ROUND(AVG(r.meal_quality_rating), 2) AS avg_meal_rating,
+    ROUND(AVG(r.beauty_quality_rating), 2) AS avg_beauty_rating
 FROM reviews r
 JOIN subscriptions s ON r.subscription_id = s.subscription_id
 GROUP BY s.plan_name
@@ -198,11 +202,11 @@ ORDER BY avg_rating DESC;
 -- Monthly subscriber growth
 /*
 SELECT
-    DATE_TRUNC('month', registration_date::DATE) AS month,
+    DATE_TRUNC('month', registration_date) AS month,
     COUNT(*) AS new_subscribers,
-    SUM(COUNT(*)) OVER (ORDER BY DATE_TRUNC('month', registration_date::DATE)) AS cumulative_subscribers
+    SUM(COUNT(*)) OVER (ORDER BY DATE_TRUNC('month', registration_date)) AS cumulative_subscribers
 FROM customers
-GROUP BY DATE_TRUNC('month', registration_date::DATE)
+GROUP BY DATE_TRUNC('month', registration_date)
 ORDER BY month;
 */
 
@@ -213,8 +217,8 @@ SELECT
     c.first_name || ' ' || c.last_name AS customer_name,
     c.email,
     COUNT(DISTINCT o.order_id) AS total_orders,
-    SUM(o.order_total::DECIMAL) AS lifetime_value,
-    MAX(o.order_date::DATE) AS last_order_date
+    SUM(o.order_total) AS lifetime_value,
+    MAX(o.order_date) AS last_order_date
 FROM customers c
 JOIN orders o ON c.customer_id = o.customer_id
 WHERE o.delivery_status = 'delivered'
@@ -226,7 +230,7 @@ LIMIT 10;
 -- Cohort retention analysis (simplified)
 /*
 SELECT
-    DATE_TRUNC('month', registration_date::DATE) AS cohort_month,
+    DATE_TRUNC('month', registration_date) AS cohort_month,
     COUNT(*) AS cohort_size,
     SUM(CASE
         WHEN EXISTS (
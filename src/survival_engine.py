@@ -0,0 +1,352 @@
+"""
+NourishBox Survival Engine
+Kaplan-Meier churn curves, hazard rates and lifetime-based CLV per segment
+
+The mean of churn_events.subscription_length_days only looks at cancelled
+subscriptions, so it ignores every subscription that is still running and
+understates how long subscriptions last. Here each subscription is one
+observation:
+
+    churned     cancelled (in churn_events) by the as-of date: an event at
+                churn_date - start_date
+    censored    still active at the as-of date, or upgraded to another plan
+                (end_date): we only know it lasted at least that long
+
+and per segment (plan, acquisition channel, New Year signup, ...):
+
+    kaplan_meier()      survival S(t), hazard d/n and Greenwood standard
+                        error at every observed duration
+    hazard_rates()      churns per subscriber-month in fixed intervals
+                        (exposure counts censored time too)
+    lifetime_summary()  median lifetime, expected lifetime (area under S(t)
+                        up to a common horizon) and CLV = expected months x
+                        average monthly price x margin
+
+All segments are computed together: rows are sorted once by (segment,
+duration), and at-risk counts, survival products and areas come from
+cumulative sums over the sorted arrays, restarted per segment by
+subtracting each segment's starting offset. There is no loop over
+segments, so thousands of segments over millions of subscriptions take
+seconds.
+
+Usage:
+    from survival_engine import subscription_durations, segment_keys, lifetime_summary
+    observed = subscription_durations(subscriptions, churn_events)
+    keys = segment_keys(subscriptions, customers, 'plan')
+    summary = lifetime_summary(observed, keys, subscriptions['monthly_price'])
+
+    python src/survival_engine.py                        # by plan
+    python src/survival_engine.py --by channel new_year --as-of 2024-12-31
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cohort_engine import NEW_YEAR_LABELS
+
+SEGMENTS = ('all', 'plan', 'channel', 'new_year')
+
+ALL_LABEL = 'All subscriptions'
+
+DAYS_PER_MONTH = 30.4375
+
+
+def subscription_durations(subscriptions, churn_events, as_of=None):
+    """Observed lifetime per subscription (same row order as subscriptions).
+
+    Returns a DataFrame with duration_days and churned (False = censored).
+    Subscriptions starting after as_of get NaN durations; as_of defaults to
+    the latest date in either table.
+    """
+    start = subscriptions['start_date'].to_numpy(dtype='datetime64[ns]')
+    end = subscriptions['end_date'].to_numpy(dtype='datetime64[ns]')
+    churn_ids = pd.Index(churn_events['subscription_id'])
+    position = churn_ids.get_indexer(subscriptions['subscription_id'])
+    churn_dates = churn_events['churn_date'].to_numpy(dtype='datetime64[ns]')
+    churn = np.where(position >= 0, churn_dates[position], np.datetime64('NaT'))
+
+    if as_of is None:
+        as_of = max(pd.Series(start).max(), pd.Series(end).max(), pd.Series(churn_dates).max())
+    as_of = np.datetime64(pd.Timestamp(as_of), 'ns')
+
+    churned = ~np.isnat(churn) & (churn <= as_of)
+    # Upgrades (and any other end) are censored at end_date; the rest at as_of
+    stop = np.where(churned, churn, np.where(~np.isnat(end) & (end <= as_of), end, as_of))
+    duration = (stop - start) / np.timedelta64(1, 'D')
+    duration[start > as_of] = np.nan
+    return pd.DataFrame({'subscription_id': subscriptions['subscription_id'].to_numpy(),
+                         'duration_days': duration,
+                         'churned': churned & (start <= as_of)})
+
+
+def segment_keys(subscriptions, customers, by='plan'):
+    """Segment label per subscription (same row order as subscriptions).
+
+    by: 'all'       one segment
+        'plan'      plan_type
+        'channel'   the customer's acquisition_channel
+        'new_year'  New Year (Jan-Feb) vs Other Months signups
+        any other subscriptions or customers column
+        a list of these for crossed segments (a MultiIndex)
+    """
+    if not isinstance(by, str):
+        keys = [segment_keys(subscriptions, customers, key) for key in by]
+        return pd.MultiIndex.from_arrays(keys, names=list(by))
+    if by == 'all':
+        return pd.Series(ALL_LABEL, index=range(len(subscriptions)), name='all')
+    if by == 'plan':
+        by = 'plan_type'
+    if by in subscriptions.columns:
+        return pd.Series(subscriptions[by].to_numpy(), name=by)
+
+    if by == 'channel':
+        values = customers['acquisition_channel']
+    elif by == 'new_year':
+        values = customers['is_new_year_signup'].astype(bool).map(NEW_YEAR_LABELS)
+    else:
+        values = customers[by]
+    per_customer = pd.Series(values.to_numpy(), index=customers['customer_id'].to_numpy())
+    return pd.Series(per_customer.reindex(subscriptions['customer_id'].to_numpy()).to_numpy(), name=by)
+
+
+def _observations(durations, churned, keys):
+    """Segment codes, durations and churn flags of the usable rows, the
+    sorted segment labels and the row mask (rows without a segment or
+    duration are dropped)"""
+    durations = np.asarray(durations, dtype=float)
+    churned = np.asarray(churned, dtype=bool)
+    if isinstance(keys, pd.MultiIndex):
+        codes, labels = keys.factorize(sort=True)
+        labels = pd.MultiIndex.from_tuples(labels, names=keys.names)
+        # A missing label in any level leaves the row without a segment
+        codes[np.any([level < 0 for level in keys.codes], axis=0)] = -1
+    else:
+        codes, labels = pd.factorize(keys, sort=True)
+        labels = pd.Index(labels, name=getattr(keys, 'name', None) or 'segment')
+    keep = (codes >= 0) & ~np.isnan(durations)
+    return codes[keep], durations[keep], churned[keep], labels, keep
+
+
+def _segment_starts(codes):
+    """Row positions where a new segment begins in segment-sorted codes"""
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    return np.flatnonzero(first)
+
+
+def _segment_cumsum(values, starts):
+    """Cumulative sum of values restarting at every segment start"""
+    totals = np.cumsum(values)
+    before = totals[starts] - values[starts]
+    lengths = np.diff(np.append(starts, len(values)))
+    return totals - np.repeat(before, lengths)
+
+
+def _segment_sum(values, codes, n_segments):
+    return np.bincount(codes, weights=values, minlength=n_segments)
+
+
+def _sort_order(codes, durations):
+    """Row order by (segment, duration): one int64 argsort when durations are
+    whole days (always, for date differences), else a lexsort"""
+    if len(durations):
+        days = durations.astype(np.int64)
+        if (days == durations).all():
+            days -= days.min()
+            span = int(days.max()) + 1
+            if span * (int(codes.max()) + 1) < 2**62:
+                return np.argsort(codes * span + days)
+    return np.lexsort((durations, codes))
+
+
+def _curves(codes, durations, churned):
+    """Kaplan-Meier arrays, one entry per distinct (segment, duration), sorted"""
+    order = _sort_order(codes, durations)
+    codes, durations, churned = codes[order], durations[order], churned[order]
+    n = len(codes)
+
+    new_row = np.ones(n, dtype=bool)
+    new_row[1:] = (codes[1:] != codes[:-1]) | (durations[1:] != durations[:-1])
+    rows = np.flatnonzero(new_row)
+    segment = codes[rows]
+    events = np.add.reduceat(churned.astype(np.int64), rows) if n else np.zeros(0, dtype=np.int64)
+    removed = np.diff(np.append(rows, n))
+    # Everyone from this row to the end of the segment is still at risk
+    at_risk = np.searchsorted(codes, segment, side='right') - rows
+
+    starts = _segment_starts(segment)
+    hazard = events / at_risk
+    # S(t) = prod(1 - h): log-sum of the factors below 1, plus a running
+    # count of factors equal to 0 (everyone left at risk churned)
+    ended = hazard >= 1
+    survival = np.exp(_segment_cumsum(np.log1p(-np.where(ended, 0.0, hazard)), starts))
+    zeroed = _segment_cumsum(ended.astype(np.int64), starts) > 0
+    survival[zeroed] = 0.0
+
+    surviving = at_risk - events
+    greenwood = np.divide(events, at_risk * surviving, out=np.zeros(len(events)), where=surviving > 0)
+    std_error = survival * np.sqrt(_segment_cumsum(greenwood, starts))
+    std_error[zeroed] = np.nan
+
+    return {'segment': segment, 'time_days': durations[rows], 'at_risk': at_risk,
+            'churned': events, 'censored': removed - events, 'hazard': hazard,
+            'survival': survival, 'std_error': std_error}
+
+
+def kaplan_meier(durations, churned, keys):
+    """Kaplan-Meier curves for every segment, one row per observed duration.
+
+    Columns: the segment label(s), time_days, at_risk, churned, censored,
+    hazard (churned / at_risk), survival and std_error (Greenwood; NaN once
+    survival reaches 0).
+    """
+    codes, durations, churned, labels, _ = _observations(durations, churned, keys)
+    curves = _curves(codes, durations, churned)
+    frame = labels.take(curves.pop('segment')).to_frame(index=False)
+    for column, values in curves.items():
+        frame[column] = values
+    return frame
+
+
+def hazard_rates(durations, churned, keys, interval_days=30):
+    """Churns per subscriber-month in [k, k+1) x interval_days buckets.
+
+    Exposure counts every day a subscription was observed in the bucket,
+    churned or censored. Returns a segment x interval DataFrame.
+    """
+    codes, durations, churned, labels, _ = _observations(durations, churned, keys)
+    n_segments = len(labels)
+    bucket = (durations // interval_days).astype(np.int64)
+    n_buckets = int(bucket.max()) + 1 if len(bucket) else 0
+    cells = n_segments * n_buckets
+    cell = codes * n_buckets + bucket
+
+    ending = np.bincount(cell, minlength=cells).reshape(n_segments, n_buckets)
+    partial = np.bincount(cell, weights=durations - bucket * interval_days,
+                          minlength=cells).reshape(n_segments, n_buckets)
+    events = np.bincount(cell[churned], minlength=cells).reshape(n_segments, n_buckets)
+    # Subscriptions ending in a later bucket spend the whole interval here
+    later = np.cumsum(ending[:, ::-1], axis=1)[:, ::-1] - ending
+    exposure_months = (later * interval_days + partial) / DAYS_PER_MONTH
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(exposure_months > 0, events / exposure_months, np.nan)
+    return pd.DataFrame(rates, index=labels, columns=pd.RangeIndex(n_buckets, name='interval'))
+
+
+def lifetime_summary(observed, keys, monthly_price, horizon_days=None, margin=1.0):
+    """Per segment: counts, median and expected lifetime, churn rate and CLV.
+
+    observed       subscription_durations() frame
+    keys           segment label per row (segment_keys)
+    monthly_price  price per row; averaged per segment for CLV
+    horizon_days   expected lifetime is the area under S(t) up to this
+                   horizon (restricted mean), the same for every segment;
+                   default: the longest observed duration. A segment
+                   observed for less time keeps its last S(t) up to it.
+    """
+    codes, durations, churned, labels, keep = _observations(
+        observed['duration_days'], observed['churned'], keys)
+    prices = np.asarray(monthly_price, dtype=float)[keep]
+    n_segments = len(labels)
+    if horizon_days is None:
+        horizon_days = float(durations.max()) if len(durations) else 0.0
+
+    curves = _curves(codes, durations, churned)
+    segment, time, survival = curves['segment'], curves['time_days'], curves['survival']
+    starts = _segment_starts(segment)
+    last = np.append(starts[1:], len(segment)) - 1
+
+    # Area under the step function: S before each time x width of the step
+    previous_time = np.roll(time, 1)
+    previous_survival = np.roll(survival, 1)
+    previous_time[starts] = 0.0
+    previous_survival[starts] = 1.0
+    widths = np.minimum(time, horizon_days) - np.minimum(previous_time, horizon_days)
+    area = _segment_sum(previous_survival * widths, segment, n_segments)
+    area[segment[last]] += survival[last] * np.maximum(horizon_days - time[last], 0.0)
+
+    # Median: first time S(t) <= 0.5
+    median = np.full(n_segments, np.nan)
+    below = np.flatnonzero(survival <= 0.5)
+    first_below = below[_segment_starts(segment[below])]
+    median[segment[first_below]] = time[first_below]
+
+    counts = np.bincount(codes, minlength=n_segments)
+    churns = np.bincount(codes[churned], minlength=n_segments)
+    exposure_months = _segment_sum(durations, codes, n_segments) / DAYS_PER_MONTH
+    churned_days = _segment_sum(durations[churned], codes[churned], n_segments)
+    price_total = _segment_sum(prices, codes, n_segments)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary = pd.DataFrame({
+            'subscriptions': counts,
+            'churned': churns,
+            'censored': counts - churns,
+            'median_lifetime_days': median,
+            'expected_lifetime_days': area,
+            'naive_lifetime_days': np.where(churns > 0, churned_days / churns, np.nan),
+            'churn_per_month': np.where(exposure_months > 0, churns / exposure_months, np.nan),
+            'avg_monthly_price': np.where(counts > 0, price_total / counts, np.nan),
+        }, index=labels)
+    summary['clv'] = summary['expected_lifetime_days'] / DAYS_PER_MONTH * summary['avg_monthly_price'] * margin
+    summary.attrs['horizon_days'] = horizon_days
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NourishBox churn survival and lifetime value')
+    parser.add_argument('--by', nargs='+', default=['plan'],
+                        help=f"Segment by one or more of {', '.join(SEGMENTS)} or a subscriptions/"
+                             "customers column (default: plan)")
+    parser.add_argument('--as-of', help='Censor at this date (default: latest date in the data)')
+    parser.add_argument('--horizon-days', type=float,
+                        help='Horizon of the expected lifetime (default: longest observed duration)')
+    parser.add_argument('--margin', type=float, default=1.0,
+                        help='Gross margin applied to revenue for CLV (default: 1.0, i.e. revenue)')
+    parser.add_argument('--curves', help='Also write the Kaplan-Meier curves to this CSV file')
+    args = parser.parse_args()
+
+    from nourishbox import load
+
+    subscriptions = load('subscriptions')
+    churn_events = load('churn_events')
+    customers = load('customers')
+
+    observed = subscription_durations(subscriptions, churn_events, as_of=args.as_of)
+    by = args.by[0] if len(args.by) == 1 else args.by
+    try:
+        keys = segment_keys(subscriptions, customers, by)
+    except KeyError as e:
+        print(f"❌ Unknown segment column: {e}")
+        sys.exit(1)
+    summary = lifetime_summary(observed, keys, subscriptions['monthly_price'],
+                               horizon_days=args.horizon_days, margin=args.margin)
+
+    print("="*70)
+    print(f"SUBSCRIPTION SURVIVAL (by {', '.join(args.by)})")
+    print("="*70)
+    print(f"Horizon: {summary.attrs['horizon_days']:.0f} days, margin: {args.margin:.0%}\n")
+    print(f"{'Segment':32s} {'Subs':>6s} {'Churn':>6s} {'Median':>7s} {'Expect':>7s} "
+          f"{'Naive':>6s} {'%/mo':>5s} {'CLV':>8s}")
+    for label, row in summary.iterrows():
+        name = ' / '.join(map(str, label)) if isinstance(label, tuple) else str(label)
+        median = f"{row['median_lifetime_days']:.0f}" if pd.notna(row['median_lifetime_days']) else '-'
+        print(f"{name[:32]:32s} {row['subscriptions']:>6,.0f} {row['churned']:>6,.0f} {median:>7s} "
+              f"{row['expected_lifetime_days']:>7.0f} {row['naive_lifetime_days']:>6.0f} "
+              f"{row['churn_per_month'] * 100:>5.1f} ${row['clv']:>7,.0f}")
+    print("-"*70)
+    print("Lifetimes in days. Median/Expect: Kaplan-Meier, censoring active and upgraded")
+    print("subscriptions. Naive: mean length of cancelled subscriptions only.")
+
+    if args.curves:
+        kaplan_meier(observed['duration_days'], observed['churned'], keys).to_csv(args.curves, index=False)
+        print(f"\n✓ Kaplan-Meier curves saved to: {args.curves}")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+NourishBox Sync Telemetry
+Per-table and per-batch throughput instrumentation for the sync scripts
+
+Used by sync_to_supabase.py and sync_to_databricks.py to record, for every
+table and every batch sent to the server:
+- rows and payload bytes
+- parse time (reading/converting the CSV)
+- prepare time (building the batch / SQL statement in Python)
+- send time (statement round trip) and estimated server time
+- rows/sec and retries
+
+Server time is estimated as the statement round trip minus the connection's
+baseline latency, which is measured once with a trivial query.
+
+Reports:
+    --report DIR   writes sync_report_<backend>_<timestamp>.json (tables and
+                   batches) and a matching .csv with one row per batch
+    --live         prints one line per batch while loading
+"""
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+BATCH_FIELDS = [
+    'table', 'batch', 'rows', 'bytes', 'prepare_s', 'send_s', 'server_s',
+    'rows_per_sec', 'retries', 'affected_rows', 'error'
+]
+
+TABLE_FIELDS = [
+    'table', 'rows_read', 'rows_inserted', 'batches', 'bytes', 'file_bytes',
+    'parse_s', 'prepare_s', 'send_s', 'server_s', 'total_s', 'rows_per_sec',
+    'retries', 'failed_batches'
+]
+
+
+def _rate(rows, seconds):
+    return rows / seconds if seconds > 0 else 0.0
+
+
+class SyncTelemetry:
+    """Collects load statistics for one sync run"""
+
+    def __init__(self, backend, live=False):
+        self.backend = backend
+        self.live = live
+        self.started_at = datetime.now()
+        self.round_trip_s = 0.0
+        self.tables = {}
+        self.batches = []
+
+    def measure_latency(self, cursor, samples=3):
+        """Record the baseline round trip of a trivial query on this cursor"""
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            timings.append(time.perf_counter() - start)
+        self.round_trip_s = min(timings)
+        return self.round_trip_s
+
+    def start_table(self, table_name):
+        """Begin timing a table load"""
+        self.tables[table_name] = {
+            'table': table_name,
+            'rows_read': 0,
+            'rows_inserted': 0,
+            'batches': 0,
+            'bytes': 0,
+            'file_bytes': 0,
+            'parse_s': 0.0,
+            'prepare_s': 0.0,
+            'send_s': 0.0,
+            'server_s': 0.0,
+            'total_s': 0.0,
+            'rows_per_sec': 0.0,
+            'retries': 0,
+            'failed_batches': 0,
+            '_started': time.perf_counter(),
+        }
+        return self.tables[table_name]
+
+    def record_parse(self, table_name, rows, seconds, file_bytes=0):
+        """Record time spent reading and converting the source file"""
+        stats = self.tables[table_name]
+        stats['rows_read'] = rows
+        stats['parse_s'] += seconds
+        stats['file_bytes'] = file_bytes
+
+    def record_batch(self, table_name, batch_number, rows, bytes_sent, prepare_s,
+                     send_s, retries=0, affected_rows=None, error=None):
+        """Record one batch sent to the server"""
+        server_s = max(0.0, send_s - self.round_trip_s)
+        batch = {
+            'table': table_name,
+            'batch': batch_number,
+            'rows': rows,
+            'bytes': bytes_sent,
+            'prepare_s': round(prepare_s, 6),
+            'send_s': round(send_s, 6),
+            'server_s': round(server_s, 6),
+            'rows_per_sec': round(_rate(rows, prepare_s + send_s), 1),
+            'retries': retries,
+            'affected_rows': affected_rows,
+            'error': error,
+        }
+        self.batches.append(batch)
+
+        stats = self.tables[table_name]
+        stats['batches'] += 1
+        stats['bytes'] += bytes_sent
+        stats['prepare_s'] += prepare_s
+        stats['send_s'] += send_s
+        stats['server_s'] += server_s
+        stats['retries'] += retries
+        if error:
+            stats['failed_batches'] += 1
+
+        if self.live:
+            status = f"✗ {error}" if error else f"{batch['rows_per_sec']:>10,.0f} rows/s"
+            print(f"   ⏱  {table_name} #{batch_number}: {rows:,} rows, "
+                  f"{bytes_sent / 1024:,.0f} KiB, prepare {prepare_s * 1000:,.0f} ms, "
+                  f"send {send_s * 1000:,.0f} ms  {status}")
+        return batch
+
+    def finish_table(self, table_name, rows_inserted, finished_at=None):
+        """Close a table load with the row count reported by the server.
+
+        finished_at (a perf_counter() value) is for loads whose batches
+        complete in the background; it defaults to now.
+        """
+        stats = self.tables[table_name]
+        stats['rows_inserted'] = rows_inserted
+        finished_at = finished_at or time.perf_counter()
+        stats['total_s'] = finished_at - stats.pop('_started', finished_at)
+        stats['rows_per_sec'] = _rate(stats['rows_read'], stats['total_s'])
+        return stats
+
+    def table_rows(self):
+        """Per-table summaries with rounded timings"""
+        rows = []
+        for stats in self.tables.values():
+            row = {field: stats.get(field) for field in TABLE_FIELDS}
+            for field in ('parse_s', 'prepare_s', 'send_s', 'server_s', 'total_s'):
+                row[field] = round(row[field], 4)
+            row['rows_per_sec'] = round(row['rows_per_sec'], 1)
+            rows.append(row)
+        return rows
+
+    def print_summary(self):
+        """Print a per-table throughput table"""
+        if not self.tables:
+            return
+
+        print("\n" + "="*70)
+        print("LOAD THROUGHPUT")
+        print("="*70)
+        print(f"  {'table':22s} {'rows':>10s} {'parse':>7s} {'prep':>7s} "
+              f"{'send':>7s} {'server':>7s} {'rows/s':>10s} {'retry':>5s}")
+        for row in self.table_rows():
+            print(f"  {row['table']:22s} {row['rows_read']:>10,} {row['parse_s']:>6.1f}s "
+                  f"{row['prepare_s']:>6.1f}s {row['send_s']:>6.1f}s {row['server_s']:>6.1f}s "
+                  f"{row['rows_per_sec']:>10,.0f} {row['retries']:>5d}")
+        print("="*70)
+        print(f"  Baseline round trip: {self.round_trip_s * 1000:.1f} ms "
+              f"(server time = send time - round trip)")
+
+    def write_reports(self, directory):
+        """Write JSON (tables + batches) and CSV (batches) reports"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(directory, f'sync_report_{self.backend}_{stamp}')
+
+        report = {
+            'backend': self.backend,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'round_trip_s': round(self.round_trip_s, 6),
+            'tables': self.table_rows(),
+            'batches': self.batches,
+        }
+        with open(f'{base}.json', 'w') as f:
+            json.dump(report, f, indent=2)
+
+        with open(f'{base}.csv', 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.batches)
+
+        print(f"\n📈 Sync reports written: {base}.json, {base}.csv")
+        return f'{base}.json', f'{base}.csv'
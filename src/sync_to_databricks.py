@@ -11,6 +11,10 @@ This script:
 6. Loads data into tables
 7. Optionally: Clears old data and replaces with new data
 
+The load itself runs through LoadEngine (load_engine.py) with a
+DatabricksSink (sinks.py), which also handles COPY INTO, MERGE and the
+resume ledger; DatabricksSync adds the Delta layouts and OPTIMIZE.
+
 Prerequisites:
     pip install databricks-sql-connector python-dotenv pandas
 
@@ -22,88 +26,111 @@ Options:
     --clear     Clear all existing data before loading (fresh start)
     --append    Append new data to existing data (default)
     --setup     Create .env template with setup instructions
+    --report    Write per-table/per-batch load telemetry (JSON + CSV) to a directory
+    --live      Print per-batch throughput while loading
+    --loader    insert (default): batched INSERT ... VALUES statements
+                copy: compressed Parquet files staged in a volume, loaded with
+                one COPY INTO per 250,000-row batch (see databricks_staging.py
+                for why it does not wait for the whole table)
+    --merge     Upsert with MERGE INTO on the primary key: rows are staged,
+                changed rows (by content hash) are updated, new rows inserted.
+                Reruns are idempotent.
+    --layout-file
+                JSON file overriding TABLE_LAYOUTS (partitioning, liquid
+                clustering, Z-order, file size, statistics columns per table)
+    --no-optimize
+                Skip the post-load OPTIMIZE and ANALYZE TABLE
+    --ledger    Batch ledger (SQLite) used to resume interrupted loads
+                (default: data/nourishbox/.sync_ledger_databricks.sqlite)
+    --restart   Forget the ledger and load every batch again
+    --concurrency
+                Maximum batches in flight over a pool of connections
+                (default 1: one statement at a time); the level adapts to
+                latency and throttling (see LoadEngine)
 """
 
 import os
 import sys
-import pandas as pd
 from dotenv import load_dotenv
 import argparse
 from pathlib import Path
-from databricks import sql
 import time
+import json
+import traceback
+
+from load_engine import LoadEngine, LoadError
+from sinks import DatabricksSink
+from sync_telemetry import SyncTelemetry
+from databricks_staging import DEFAULT_ROWS_PER_FILE
+from batch_ledger import BatchLedger
+from table_schemas import DATA_DIR, CSV_FILES, TABLE_CONFIGS
 
 # Load environment variables
 load_dotenv()
 
-# Configuration
-DATA_DIR = 'data/nourishbox'
-CSV_FILES = [
-    'customers.csv',
-    'customer_preferences.csv',
-    'subscriptions.csv',
-    'orders.csv',
-    'order_items.csv',
-    'churn_events.csv',
-    'reviews.csv',
-    'marketing_campaigns.csv',
-    'product_catalog.csv'
-]
-
-# Table configurations (table_name: primary_key)
-TABLE_CONFIGS = {
-    'customers': 'customer_id',
-    'customer_preferences': 'customer_id',
-    'subscriptions': 'subscription_id',
-    'orders': 'order_id',
-    'order_items': 'item_id',
-    'churn_events': 'churn_id',
-    'reviews': 'review_id',
-    'marketing_campaigns': 'campaign_id',
-    'product_catalog': 'product_id'
+# Delta layout per table. Either liquid clustering (cluster_by) or Hive-style
+# partitioning (partition_by) with optional Z-ordering (zorder_by), plus:
+#   target_file_size  delta.targetFileSize for OPTIMIZE/auto compaction
+#   stats_columns     columns for ANALYZE TABLE (default: all columns)
+# Tables not listed are plain Delta tables. BI queries filter the fact tables
+# by month and customer, so those columns drive file pruning.
+TABLE_LAYOUTS = {
+    'orders': {
+        'cluster_by': ['year_month', 'customer_id'],
+        'target_file_size': '64mb',
+    },
+    'order_items': {
+        # No month/customer column: cluster on the join key to orders
+        'cluster_by': ['order_id'],
+        'target_file_size': '64mb',
+    },
+    'subscription_monthly': {
+        'cluster_by': ['month_start', 'customer_id'],
+        'target_file_size': '32mb',
+    },
 }
 
+# Batches already committed are recorded here and skipped by reruns
+DEFAULT_LEDGER = os.path.join(DATA_DIR, '.sync_ledger_databricks.sqlite')
+
+# Rows per INSERT statement; the copy loader sends one COPY INTO per batch.
+# Copy batches are one Parquet file each and large enough that a 1M-row
+# table is 4 COPY INTO statements, while the ledger can still resume, retry
+# and run them concurrently batch by batch (see databricks_staging.py)
+BATCH_SIZE = 1000
+COPY_BATCH_ROWS = DEFAULT_ROWS_PER_FILE
 
-class DatabricksSync:
-    """Handles syncing data to Databricks using Delta Lake"""
+# Transient batch failures are retried with exponential backoff
+BATCH_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 1.0
 
-    def __init__(self):
-        """Initialize Databricks connection from environment variables"""
-        self.connection = None
-        self.cursor = None
 
-        # Get connection details from environment
-        self.server_hostname = os.getenv('DATABRICKS_SERVER_HOSTNAME')
-        self.http_path = os.getenv('DATABRICKS_HTTP_PATH')
-        self.access_token = os.getenv('DATABRICKS_ACCESS_TOKEN')
-        self.catalog = os.getenv('DATABRICKS_CATALOG', 'main')
-        self.schema = os.getenv('DATABRICKS_SCHEMA', 'nourishbox')
+class DatabricksSync(DatabricksSink):
+    """Databricks target for LoadEngine: Delta layouts and post-load OPTIMIZE
+    on top of DatabricksSink"""
 
-        # Validate credentials
-        if not all([self.server_hostname, self.http_path, self.access_token]):
-            raise ValueError(
-                "Missing Databricks credentials! Please set environment variables:\n"
-                "  DATABRICKS_SERVER_HOSTNAME=dbc-xxxxx-yyyy.cloud.databricks.com\n"
-                "  DATABRICKS_HTTP_PATH=/sql/1.0/warehouses/xxxxx\n"
-                "  DATABRICKS_ACCESS_TOKEN=dapi...\n"
-                "\nOr create a .env file with these values."
-            )
+    def __init__(self, loader='insert', mode='append', layouts=None, ledger=None,
+                 optimize=True, stager=None, endpoint=None):
+        """Initialize from environment variables (see DatabricksSink)"""
+        super().__init__(loader=loader, mode=mode, ledger=ledger, stager=stager,
+                         endpoint=endpoint)
+        self.layouts = TABLE_LAYOUTS if layouts is None else layouts
+        self.optimize = optimize
 
     def connect(self):
-        """Establish connection to Databricks"""
+        """Establish connection to Databricks and create the schema"""
         try:
             print(f"\n🔌 Connecting to Databricks...")
             print(f"   Host: {self.server_hostname}")
             print(f"   Catalog: {self.catalog}")
             print(f"   Schema: {self.schema}")
 
-            self.connection = sql.connect(
-                server_hostname=self.server_hostname,
-                http_path=self.http_path,
-                access_token=self.access_token
-            )
-            self.cursor = self.connection.cursor()
-            print("✅ Connected successfully!\n")
+            super().connect()
+            print("✅ Connected successfully!")
+            print(f"   ✓ Schema '{self.catalog}.{self.schema}' ready")
+            if self.loader == 'copy' and self.stager is None:
+                print(f"   ✓ Staging volume '{self.staging_volume}' ready")
+            return self
 
         except Exception as e:
             print(f"\n❌ Connection failed: {e}")
@@ -114,232 +141,135 @@ class DatabricksSync:
             print("  4. Verify HTTP path is correct")
             sys.exit(1)
 
-    def disconnect(self):
+    def close(self):
         """Close database connection"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+        super().close()
         print("\n✅ Disconnected from Databricks")
 
-    def create_schema(self):
-        """Create schema/database if it doesn't exist"""
+    def create_table_sql(self, table_name, column_types, primary_key):
+        layout = self.layouts.get(table_name, {})
+        return super().create_table_sql(table_name, column_types, primary_key) + \
+            ("\n" + layout_clauses(layout) if layout else "")
+
+    def create_table(self, table_name, column_types, primary_key):
+        super().create_table(table_name, column_types, primary_key)
+        self.apply_layout(table_name)
+
+    def describe_table(self, table_name):
+        layout = self.layouts.get(table_name)
+        return f" ({describe_layout(layout)})" if layout else ""
+
+    def finish(self, table_names):
+        if self.optimize:
+            self.optimize_tables(table_names)
+
+    # ------------------------------------------------------------------
+    # Delta layout
+    # ------------------------------------------------------------------
+
+    def apply_layout(self, table_name):
+        """Bring an existing table's clustering and properties in line with
+        its layout (tables created by older syncs have neither).
+
+        Partitioning cannot be changed in place; a table created without its
+        partition_by has to be dropped and reloaded.
+        """
+        layout = self.layouts.get(table_name)
+        if not layout:
+            return
+        full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
         try:
-            print("\n" + "="*70)
-            print("CREATING SCHEMA")
-            print("="*70)
-
-            query = f"CREATE SCHEMA IF NOT EXISTS {self.catalog}.{self.schema}"
-            self.cursor.execute(query)
-            print(f"   ✓ Schema '{self.catalog}.{self.schema}' ready")
-
+            if layout.get('cluster_by'):
+                columns = ', '.join(f"`{col}`" for col in layout['cluster_by'])
+                self.cursor.execute(f"ALTER TABLE {full_table_name} CLUSTER BY ({columns})")
+            properties = layout_properties(layout)
+            if properties:
+                self.cursor.execute(f"ALTER TABLE {full_table_name} SET TBLPROPERTIES ({properties})")
         except Exception as e:
-            print(f"   ✗ Error creating schema: {e}")
-            raise
-
-    def table_exists(self, table_name):
-        """Check if table exists"""
-        try:
-            query = f"""
-                SHOW TABLES IN {self.catalog}.{self.schema}
-                LIKE '{table_name}'
-            """
-            self.cursor.execute(query)
-            result = self.cursor.fetchall()
-            return len(result) > 0
-        except:
-            return False
-
-    def get_row_count(self, table_name):
-        """Get current row count in table"""
-        try:
-            full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
-            query = f"SELECT COUNT(*) FROM {full_table_name}"
-            self.cursor.execute(query)
-            result = self.cursor.fetchone()
-            return result[0] if result else 0
-        except:
-            return 0
-
-    def clear_table(self, table_name):
-        """Delete all data from table"""
-        try:
-            full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
-            query = f"DELETE FROM {full_table_name}"
-            self.cursor.execute(query)
-            print(f"   ✓ Cleared existing data from '{table_name}'")
-        except Exception as e:
-            print(f"   ✗ Error clearing table '{table_name}': {e}")
-
-    def infer_spark_type(self, pandas_dtype, column_name):
-        """Map pandas dtype to Spark SQL type"""
-        dtype_str = str(pandas_dtype)
-
-        # Check column name patterns
-        if column_name.endswith('_date'):
-            return 'DATE'
-        elif column_name.endswith('_id'):
-            return 'STRING'
-        elif column_name in ['rating', 'age', 'household_size', 'quantity', 'calories']:
-            return 'INT'
-        elif column_name in ['price', 'cost', 'total', 'value', 'budget', 'ctr', 'rate']:
-            return 'DECIMAL(10, 2)'
-        elif column_name in ['auto_renew', 'active', 'would_recommend', 'attempted_retention',
-                            'retention_offer_accepted', 'feedback_provided']:
-            return 'BOOLEAN'
-
-        # Check dtype
-        if 'int' in dtype_str:
-            return 'INT'
-        elif 'float' in dtype_str:
-            return 'DECIMAL(10, 2)'
-        elif 'bool' in dtype_str:
-            return 'BOOLEAN'
-        elif 'datetime' in dtype_str:
-            return 'DATE'
-        else:
-            return 'STRING'
-
-    def create_table_from_csv(self, csv_file, table_name):
-        """Create Delta Lake table from CSV schema"""
-        try:
-            # Read CSV to get schema
-            df = pd.read_csv(csv_file, nrows=5)
-
-            # Build column definitions
-            columns = []
-            primary_key = TABLE_CONFIGS.get(table_name)
-
-            for col in df.columns:
-                spark_type = self.infer_spark_type(df[col].dtype, col)
-                columns.append(f"`{col}` {spark_type}")
-
-            # Create table DDL
-            full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
-            columns_sql = ",\n    ".join(columns)
-
-            create_table_sql = f"""
-                CREATE TABLE IF NOT EXISTS {full_table_name} (
-                    {columns_sql}
-                )
-                USING DELTA
-            """
-
-            self.cursor.execute(create_table_sql)
-            print(f"   ✓ Table '{table_name}' ready")
-
-        except Exception as e:
-            print(f"   ✗ Error creating table '{table_name}': {e}")
-            raise
-
-    def load_csv_to_table(self, csv_file, table_name, mode='append'):
-        """Load CSV data into Delta Lake table"""
-        print(f"\n📤 Loading {csv_file} → {table_name}")
-
-        try:
-            # Read CSV
-            df = pd.read_csv(csv_file)
-
-            if len(df) == 0:
-                print(f"   ⚠️  No data in {csv_file}, skipping...")
-                return
-
-            # Get current count
-            current_count = self.get_row_count(table_name)
-
-            # Create temp table name
-            temp_table = f"{self.catalog}.{self.schema}.temp_{table_name}"
-            full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
-
-            # For Databricks, we'll use a different approach:
-            # 1. Create temp view from pandas DataFrame
-            # 2. Insert into Delta table using SQL
-
-            # Convert DataFrame to SQL-compatible format
-            # This is a simplified approach - for production, use DBFS upload
-
-            print(f"   📊 Processing {len(df):,} rows...")
+            print(f"   ⚠️  Could not apply layout to '{table_name}': {e}")
 
-            # Batch insert (for smaller datasets)
-            # For larger datasets, you should upload to DBFS first
-            batch_size = 1000
-            total_batches = (len(df) + batch_size - 1) // batch_size
-
-            inserted_count = 0
-
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i+batch_size]
-
-                # Convert batch to INSERT statements
-                values = []
-                for _, row in batch.iterrows():
-                    row_values = []
-                    for val in row:
-                        if pd.isna(val):
-                            row_values.append('NULL')
-                        elif isinstance(val, str):
-                            # Escape single quotes
-                            escaped_val = val.replace("'", "''")
-                            row_values.append(f"'{escaped_val}'")
-                        elif isinstance(val, bool):
-                            row_values.append('TRUE' if val else 'FALSE')
-                        else:
-                            row_values.append(str(val))
-                    values.append(f"({', '.join(row_values)})")
-
-                # Build INSERT statement
-                columns = ', '.join([f"`{col}`" for col in df.columns])
-                values_sql = ',\n'.join(values)
-
-                insert_sql = f"""
-                    INSERT INTO {full_table_name} ({columns})
-                    VALUES {values_sql}
-                """
-
-                try:
-                    self.cursor.execute(insert_sql)
-                    inserted_count += len(batch)
-
-                    # Show progress
-                    batch_num = (i // batch_size) + 1
-                    print(f"   ⏳ Progress: {batch_num}/{total_batches} batches ({inserted_count:,}/{len(df):,} rows)", end='\r')
-
-                except Exception as e:
-                    print(f"\n   ⚠️  Error inserting batch {batch_num}: {e}")
-                    continue
-
-            print()  # New line after progress
-
-            new_count = self.get_row_count(table_name)
-            actual_inserted = new_count - current_count
-
-            print(f"   ✓ Processed {len(df):,} rows")
-            print(f"   ✓ Inserted: {actual_inserted:,} new rows")
-            print(f"   ✓ Total in table: {new_count:,} rows")
-
-        except Exception as e:
-            print(f"   ✗ Error loading data: {e}")
-            import traceback
-            traceback.print_exc()
-
-    def verify_data(self):
-        """Verify data was loaded correctly"""
+    def optimize_tables(self, table_names):
+        """OPTIMIZE (clustering/Z-order, compaction) and collect statistics"""
         print("\n" + "="*70)
-        print("VERIFICATION SUMMARY")
+        print("OPTIMIZING TABLES")
         print("="*70)
 
-        total_rows = 0
-        for table_name in TABLE_CONFIGS.keys():
+        for table_name in table_names:
+            layout = self.layouts.get(table_name, {})
+            full_table_name = f"{self.catalog}.{self.schema}.{table_name}"
+            statements = []
+
+            optimize_sql = f"OPTIMIZE {full_table_name}"
+            if layout.get('zorder_by') and not layout.get('cluster_by'):
+                columns = ', '.join(f"`{col}`" for col in layout['zorder_by'])
+                optimize_sql += f" ZORDER BY ({columns})"
+            if layout:
+                statements.append(('optimize', optimize_sql))
+
+            if layout.get('stats_columns'):
+                columns = ', '.join(f"`{col}`" for col in layout['stats_columns'])
+                statements.append(('analyze', f"ANALYZE TABLE {full_table_name} "
+                                              f"COMPUTE STATISTICS FOR COLUMNS {columns}"))
+            else:
+                statements.append(('analyze', f"ANALYZE TABLE {full_table_name} "
+                                              f"COMPUTE STATISTICS FOR ALL COLUMNS"))
+
+            timings = []
             try:
-                count = self.get_row_count(table_name)
-                total_rows += count
-                print(f"  {table_name:30s}: {count:>10,} rows")
-            except:
-                print(f"  {table_name:30s}: {'ERROR':>10s}")
-
-        print("="*70)
-        print(f"  {'TOTAL RECORDS':30s}: {total_rows:>10,}")
-        print("="*70 + "\n")
+                for label, statement in statements:
+                    start = time.perf_counter()
+                    self.cursor.execute(statement)
+                    timings.append(f"{label} {time.perf_counter() - start:.1f}s")
+                print(f"   ✓ {table_name:28s}: {', '.join(timings)}")
+            except Exception as e:
+                print(f"   ✗ {table_name:28s}: {e}")
+
+
+def layout_properties(layout):
+    """TBLPROPERTIES list for a layout (empty string if none)"""
+    properties = {}
+    if layout.get('target_file_size'):
+        properties['delta.targetFileSize'] = layout['target_file_size']
+    return ', '.join(f"'{key}' = '{value}'" for key, value in properties.items())
+
+
+def layout_clauses(layout):
+    """PARTITIONED BY / CLUSTER BY / TBLPROPERTIES clauses for CREATE TABLE"""
+    clauses = []
+    if layout.get('partition_by'):
+        clauses.append("PARTITIONED BY ({})".format(
+            ', '.join(f"`{col}`" for col in layout['partition_by'])))
+    if layout.get('cluster_by'):
+        clauses.append("CLUSTER BY ({})".format(
+            ', '.join(f"`{col}`" for col in layout['cluster_by'])))
+    properties = layout_properties(layout)
+    if properties:
+        clauses.append(f"TBLPROPERTIES ({properties})")
+    return '\n                '.join(clauses)
+
+
+def describe_layout(layout):
+    parts = []
+    for key, label in (('partition_by', 'partitioned by'), ('cluster_by', 'clustered by'),
+                       ('zorder_by', 'Z-ordered by')):
+        if layout.get(key):
+            parts.append(f"{label} {', '.join(layout[key])}")
+    return '; '.join(parts)
+
+
+def load_layouts(path):
+    """TABLE_LAYOUTS with per-table overrides from a JSON file.
+
+    A table mapped to null or {} in the file gets a plain layout.
+    """
+    layouts = dict(TABLE_LAYOUTS)
+    with open(path) as f:
+        overrides = json.load(f)
+    for table_name, layout in overrides.items():
+        if layout and layout.get('partition_by') and layout.get('cluster_by'):
+            raise ValueError(f"{table_name}: use either partition_by or cluster_by, not both")
+        layouts[table_name] = layout or {}
+    return layouts
 
 
 def create_env_template():
@@ -390,6 +320,29 @@ def main():
                        help='Clear existing data before loading (fresh start)')
     parser.add_argument('--setup', action='store_true',
                        help='Create .env template and setup instructions')
+    parser.add_argument('--report', metavar='DIR',
+                       help='Write per-table/per-batch load telemetry (JSON + CSV) to DIR')
+    parser.add_argument('--live', action='store_true',
+                       help='Print per-batch throughput while loading')
+    parser.add_argument('--loader', choices=['insert', 'copy'], default='insert',
+                       help='insert: batched INSERT statements (default); '
+                            'copy: staged Parquet files + COPY INTO')
+    parser.add_argument('--merge', action='store_true',
+                       help='Upsert with MERGE INTO on the primary key, updating only '
+                            'rows whose content changed (idempotent reruns)')
+    parser.add_argument('--layout-file', metavar='JSON',
+                       help='Per-table Delta layout overrides (partition_by, cluster_by, '
+                            'zorder_by, target_file_size, stats_columns)')
+    parser.add_argument('--no-optimize', action='store_true',
+                       help='Skip OPTIMIZE and ANALYZE TABLE after loading')
+    parser.add_argument('--ledger', default=DEFAULT_LEDGER, metavar='PATH',
+                       help='Batch ledger used to resume interrupted loads '
+                            f'(default: {DEFAULT_LEDGER})')
+    parser.add_argument('--restart', action='store_true',
+                       help='Forget the ledger and load every batch again')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Maximum batches in flight over a connection pool, '
+                            'adapted to latency and throttling (default: 1)')
     args = parser.parse_args()
 
     # Setup mode
@@ -414,51 +367,45 @@ def main():
         sys.exit(1)
 
     # Initialize sync
-    sync = DatabricksSync()
+    telemetry = SyncTelemetry('databricks', live=args.live)
+    layouts = load_layouts(args.layout_file) if args.layout_file else None
+    ledger = BatchLedger(args.ledger)
+    if args.restart:
+        ledger.reset()
+    sync = DatabricksSync(loader=args.loader, mode='merge' if args.merge else 'append',
+                          layouts=layouts, ledger=ledger, optimize=not args.no_optimize)
+    engine = None
 
     try:
-        # Connect
+        # Connect (creates the schema)
         sync.connect()
+        telemetry.measure_latency(sync.cursor)
+        engine = LoadEngine(sync, telemetry=telemetry,
+                            batch_rows=COPY_BATCH_ROWS if args.loader == 'copy' else BATCH_SIZE,
+                            workers=args.concurrency, retries=BATCH_RETRIES,
+                            backoff_seconds=RETRY_BACKOFF_SECONDS, adaptive=True)
 
-        # Create schema
-        sync.create_schema()
-
-        # Process each CSV file
-        print("\n" + "="*70)
-        print("CREATING TABLES")
-        print("="*70)
-
+        tables = []
         for csv_file in CSV_FILES:
             csv_path = os.path.join(DATA_DIR, csv_file)
-            table_name = csv_file.replace('.csv', '')
-
             if not os.path.exists(csv_path):
                 print(f"⚠️  Skipping {csv_file} (not found)")
                 continue
+            tables.append((csv_file.replace('.csv', ''), csv_path))
 
-            # Create table
-            sync.create_table_from_csv(csv_path, table_name)
-
-            # Clear if requested
-            if args.clear and sync.table_exists(table_name):
-                sync.clear_table(table_name)
-
-        # Load data
-        print("\n" + "="*70)
-        print("LOADING DATA")
-        print("="*70)
+        engine.run(tables, clear=args.clear)
 
-        for csv_file in CSV_FILES:
-            csv_path = os.path.join(DATA_DIR, csv_file)
-            table_name = csv_file.replace('.csv', '')
+        # Fail loudly (before optimizing) if any batch was given up on
+        engine.check_failures()
 
-            if not os.path.exists(csv_path):
-                continue
+        sync.finish([table_name for table_name, _ in tables])
 
-            sync.load_csv_to_table(csv_path, table_name)
+        telemetry.print_summary()
+        if args.report:
+            telemetry.write_reports(args.report)
 
         # Verify
-        sync.verify_data()
+        engine.verify(list(TABLE_CONFIGS))
 
         print("✅ Sync completed successfully!")
         print("\n" + "="*70)
@@ -479,16 +426,25 @@ def main():
 
     except KeyboardInterrupt:
         print("\n\n⚠️  Sync interrupted by user")
+        print("   Rerun the same command to resume from the ledger")
+        sys.exit(1)
+
+    except LoadError as e:
+        print(f"\n❌ Sync incomplete: {e}")
+        print(f"   Rerun the same command to retry them; completed batches are skipped "
+              f"(ledger: {ledger.path})")
         sys.exit(1)
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
     finally:
-        sync.disconnect()
+        if engine is not None:
+            engine.close()
+        sync.close()
+        ledger.close()
 
 
 if __name__ == "__main__":
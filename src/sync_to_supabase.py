@@ -9,6 +9,10 @@ This script:
 4. Loads data into tables
 5. Optionally: Clears old data and replaces with new data
 
+The load itself runs through LoadEngine (load_engine.py); SupabaseSync is a
+PostgresSink whose hooks add the Supabase-specific steps: typed-column
+migrations, bulk-mode index and foreign-key rebuilds, and the reporting views.
+
 Prerequisites:
     pip install psycopg2-binary python-dotenv
 
@@ -20,78 +24,85 @@ Options:
     --clear     Clear all existing data before loading (fresh start)
     --append    Append new data to existing data (default)
     --update    Update existing records (based on primary keys)
+    --bulk      Bulk-load mode: drop secondary indexes and foreign keys,
+                load, then rebuild them in parallel and ANALYZE
+    --workers   Parallel connections used to load batches, rebuild indexes
+                and refresh materialized views (default: 4)
+    --batch-rows
+                Rows per batch (default: 10000)
+    --report    Write per-table/per-batch load telemetry (JSON + CSV) to a directory
+    --live      Print per-batch throughput while loading
+    --backend   Loader: copy (default, CSV COPY through a temp table),
+                execute_values (INSERT ... VALUES) or async (asyncpg binary COPY)
 """
 
 import os
 import sys
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extras import execute_values
-import pandas as pd
 from dotenv import load_dotenv
 import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from load_engine import DEFAULT_BATCH_ROWS, LoadEngine, LoadError
+from sinks import PostgresSink
+from sync_telemetry import SyncTelemetry
+from table_schemas import DATA_DIR, CSV_FILES, TABLE_CONFIGS
 
 # Load environment variables
 load_dotenv()
 
-# Configuration
-DATA_DIR = 'data/nourishbox'
-CSV_FILES = [
-    'plan_dim.csv',
-    'date_dim.csv',
-    'customers.csv',
-    'customer_preferences.csv',
-    'subscriptions.csv',
-    'subscription_monthly.csv',
-    'orders.csv',
-    'order_items.csv',
-    'churn_events.csv',
-    'reviews.csv',
-    'marketing_campaigns.csv',
-    'product_catalog.csv'
+# Reporting views (see supabase_views.sql). They are dropped before column
+# types are migrated and recreated at the end of every sync.
+VIEWS_FILE = Path(__file__).resolve().parent / 'supabase_views.sql'
+REPORTING_VIEWS = [
+    'v_active_customers',
+    'v_monthly_revenue',
+    'v_customer_lifetime_value',
+    'v_product_popularity',
+    'v_churn_summary',
+]
+
+# Materialized reporting views (see supabase_materialized_views.sql),
+# refreshed concurrently at the end of every sync
+MATERIALIZED_VIEWS_FILE = Path(__file__).resolve().parent / 'supabase_materialized_views.sql'
+MATERIALIZED_VIEWS = [
+    'mv_monthly_revenue',
+    'mv_customer_lifetime_value',
+    'mv_product_popularity',
+    'mv_churn_summary',
 ]
 
-# Table configurations (table_name: primary_key)
-TABLE_CONFIGS = {
-    'plan_dim': 'plan_key',
-    'date_dim': 'date_key',
-    'customers': 'customer_id',
-    'customer_preferences': 'customer_id',
-    'subscriptions': 'subscription_id',
-    'subscription_monthly': 'snapshot_id',
-    'orders': 'order_id',
-    'order_items': 'item_id',
-    'churn_events': 'churn_id',
-    'reviews': 'review_id',
-    'marketing_campaigns': 'campaign_id',
-    'product_catalog': 'product_id'
+# Session settings for index builds during bulk loads
+BULK_MAINTENANCE_WORK_MEM = os.getenv('SUPABASE_MAINTENANCE_WORK_MEM', '256MB')
+
+# Loading sessions in bulk mode do not need to wait for WAL flushes
+BULK_SESSION_SETTING = "SET synchronous_commit = off;"
+
+# --backend name -> PostgresSink method
+BACKEND_METHODS = {
+    'copy': 'copy',
+    'execute_values': 'values',
+    'async': 'async',
 }
 
 
-class SupabaseSync:
-    """Handles syncing data to Supabase PostgreSQL database"""
-
-    def __init__(self):
-        """Initialize database connection from environment variables"""
-        self.conn = None
-        self.cursor = None
-
-        # Get connection details from environment
-        self.host = os.getenv('SUPABASE_HOST')
-        self.database = os.getenv('SUPABASE_DB', 'postgres')
-        self.user = os.getenv('SUPABASE_USER', 'postgres')
-        self.password = os.getenv('SUPABASE_PASSWORD')
-        self.port = os.getenv('SUPABASE_PORT', '5432')
-
-        # Validate credentials
-        if not all([self.host, self.password]):
-            raise ValueError(
-                "Missing Supabase credentials! Please set environment variables:\n"
-                "  SUPABASE_HOST=db.xxxxx.supabase.co\n"
-                "  SUPABASE_PASSWORD=your-password\n"
-                "\nOr create a .env file with these values."
-            )
+class SupabaseSync(PostgresSink):
+    """Supabase target for LoadEngine: typed-column migrations, bulk-load mode
+    and reporting views on top of PostgresSink"""
+
+    def __init__(self, method='copy', bulk=False, workers=4):
+        """Initialize from environment variables (see PostgresSink)"""
+        super().__init__(method=method, connections=workers)
+        self.bulk = bulk
+        self.workers = workers
+
+        # Index/foreign-key definitions deferred by bulk-load mode
+        self.deferred_indexes = []
+        self.deferred_foreign_keys = []
+        self.bulk_tables = []
 
     def connect(self):
         """Establish connection to Supabase"""
@@ -100,16 +111,9 @@ class SupabaseSync:
             print(f"   Host: {self.host}")
             print(f"   Database: {self.database}")
 
-            self.conn = psycopg2.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port,
-                sslmode='require'  # Supabase requires SSL
-            )
-            self.cursor = self.conn.cursor()
+            super().connect()
             print("✅ Connected successfully!\n")
+            return self
 
         except psycopg2.Error as e:
             print(f"\n❌ Connection failed: {e}")
@@ -119,12 +123,9 @@ class SupabaseSync:
             print("  3. Check if your IP is allowed (Supabase allows all by default)")
             sys.exit(1)
 
-    def disconnect(self):
+    def close(self):
         """Close database connection"""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        super().close()
         print("\n✅ Disconnected from Supabase")
 
     def table_exists(self, table_name):
@@ -139,163 +140,414 @@ class SupabaseSync:
         self.cursor.execute(query, (table_name,))
         return self.cursor.fetchone()[0]
 
-    def create_table_from_csv(self, csv_file, table_name):
-        """Create table schema based on CSV columns"""
-        df = pd.read_csv(csv_file, nrows=5)  # Just read a few rows to get schema
-
-        # Map pandas dtypes to PostgreSQL types
-        type_mapping = {
-            'int64': 'INTEGER',
-            'float64': 'DECIMAL(14, 2)',
-            'bool': 'BOOLEAN',
-            'object': 'TEXT',
-            'datetime64[ns]': 'DATE'
-        }
-
-        decimal_keywords = (
-            'price', 'cost', 'total', 'value', 'budget', 'ctr', 'rate',
-            'mrr', 'amount', 'discount'
-        )
-        date_columns = {'month_start', 'date'}
-
-        # Build CREATE TABLE statement
-        columns = []
-        primary_key = TABLE_CONFIGS.get(table_name)
-
-        for col, dtype in df.dtypes.items():
-            name_lower = col.lower()
-            pg_type = type_mapping.get(str(dtype), 'TEXT')
-
-            if col == primary_key:
-                columns.append(f'    {col} TEXT PRIMARY KEY')
-            elif col in date_columns or name_lower.endswith('_date'):
-                columns.append(f'    {col} DATE')
-            elif name_lower.endswith('_id') and col != primary_key:
-                columns.append(f'    {col} TEXT')
-            elif name_lower in ['rating', 'age', 'household_size', 'quantity',
-                                'year', 'quarter', 'month', 'day', 'day_of_week']:
-                columns.append(f'    {col} INTEGER')
-            elif name_lower == 'calories':
-                columns.append(f'    {col} DECIMAL(10, 2)')
-            elif any(keyword in name_lower for keyword in decimal_keywords):
-                columns.append(f'    {col} DECIMAL(14, 2)')
-            elif str(dtype) == 'int64':
-                columns.append(f'    {col} INTEGER')
-            elif str(dtype) == 'float64':
-                columns.append(f'    {col} DECIMAL(14, 2)')
-            elif str(dtype) == 'bool':
-                columns.append(f'    {col} BOOLEAN')
-            else:
-                columns.append(f'    {col} {pg_type}')
+    def create_table(self, table_name, column_types, primary_key):
+        """Create the table, migrating untyped columns of an existing one in place"""
+        super().create_table(table_name, column_types, primary_key)
+        self.migrate_column_types(table_name, column_types)
+        self.ensure_primary_key(table_name, primary_key)
+
+    def clear_table_sql(self, table_name):
+        return f"TRUNCATE TABLE {self.table_name(table_name)} CASCADE"
+
+    # ------------------------------------------------------------------
+    # Load hooks (see sinks.py)
+    # ------------------------------------------------------------------
+
+    def begin_load(self, table_names):
+        if self.bulk:
+            self.begin_bulk_load(table_names)
+
+    def end_load(self, table_names):
+        if not self.bulk:
+            return True
+        return self.end_bulk_load(workers=self.workers)
+
+    def finish(self, table_names):
+        """Reporting views over the typed tables"""
+        self.create_views()
+        self.refresh_materialized_views(workers=self.workers)
+
+    def get_column_types(self, table_name):
+        """Return {column: formatted type} for an existing table"""
+        self.cursor.execute("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            JOIN pg_class t ON t.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public'
+              AND t.relname = %s
+              AND a.attnum > 0
+              AND NOT a.attisdropped;
+        """, (table_name,))
+        return dict(self.cursor.fetchall())
+
+    def migrate_column_types(self, table_name, schema):
+        """Convert columns created by older syncs (TEXT, DECIMAL(14, 2)) to
+        their declared types with ALTER COLUMN ... TYPE ... USING.
+
+        Text columns declared as VARCHAR are left alone: the two are stored
+        identically and rewriting them would gain nothing.
+        """
+        current_types = self.get_column_types(table_name)
+        alterations = []
+
+        for col, declared in schema.items():
+            current = current_types.get(col)
+            if current is None:
+                continue
+
+            current_canonical = canonical_pg_type(current)
+            declared_canonical = canonical_pg_type(declared)
+            if current_canonical == declared_canonical:
+                continue
+            if is_text_type(current_canonical) and is_text_type(declared_canonical):
+                continue
+
+            alterations.append(
+                sql.SQL("ALTER COLUMN {col} TYPE {type} USING {expr}").format(
+                    col=sql.Identifier(col),
+                    type=sql.SQL(declared),
+                    expr=sql.SQL(conversion_expression(col, declared_canonical))
+                )
+            )
+
+        if not alterations:
+            return
 
-        create_table_sql = f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-            {','.join(columns)}
+        # Views depending on a column block ALTER COLUMN TYPE
+        self.drop_reporting_views()
+        self.cursor.execute(sql.SQL("ALTER TABLE {} {};").format(
+            sql.Identifier(table_name), sql.SQL(', ').join(alterations)
+        ))
+        self.conn.commit()
+        print(f"   ✓ Migrated {len(alterations)} column(s) on '{table_name}' to typed columns")
+
+    def ensure_primary_key(self, table_name, primary_key):
+        """Add the configured primary key to tables created without one
+        (e.g. by the Supabase CSV importer); ON CONFLICT depends on it"""
+        self.cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_constraint c
+                JOIN pg_class t ON t.oid = c.conrelid
+                JOIN pg_namespace n ON n.oid = t.relnamespace
+                WHERE n.nspname = 'public' AND t.relname = %s AND c.contype = 'p'
             );
-        """
+        """, (table_name,))
+        if primary_key is None or self.cursor.fetchone()[0]:
+            return
 
+        self.cursor.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({});").format(
+            sql.Identifier(table_name), sql.Identifier(primary_key)
+        ))
+        self.conn.commit()
+        print(f"   ✓ Added primary key ({primary_key}) to '{table_name}'")
+
+    def drop_reporting_views(self):
+        """Drop the reporting views so underlying column types can change"""
+        for view_name in REPORTING_VIEWS:
+            self.cursor.execute(sql.SQL("DROP VIEW IF EXISTS {} CASCADE;").format(
+                sql.Identifier(view_name)
+            ))
+        for view_name in MATERIALIZED_VIEWS:
+            self.cursor.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {} CASCADE;").format(
+                sql.Identifier(view_name)
+            ))
+
+    def create_views(self):
+        """(Re)create the reporting views from supabase_views.sql"""
         try:
-            self.cursor.execute(create_table_sql)
+            with open(VIEWS_FILE) as f:
+                self.cursor.execute(f.read())
             self.conn.commit()
-            print(f"   ✓ Table '{table_name}' ready")
-        except psycopg2.Error as e:
-            print(f"   ✗ Error creating table '{table_name}': {e}")
+            print(f"   ✓ Reporting views ready ({len(REPORTING_VIEWS)} views)")
+        except (OSError, psycopg2.Error) as e:
+            print(f"   ✗ Error creating reporting views: {e}")
             self.conn.rollback()
 
-    def clear_table(self, table_name):
-        """Delete all data from table"""
+    def create_materialized_views(self):
+        """Create the materialized views (if missing) from supabase_materialized_views.sql"""
         try:
-            self.cursor.execute(f"TRUNCATE TABLE {table_name} CASCADE;")
+            with open(MATERIALIZED_VIEWS_FILE) as f:
+                self.cursor.execute(f.read())
             self.conn.commit()
-            print(f"   ✓ Cleared existing data from '{table_name}'")
-        except psycopg2.Error as e:
-            print(f"   ✗ Error clearing table '{table_name}': {e}")
+            return True
+        except (OSError, psycopg2.Error) as e:
+            print(f"   ✗ Error creating materialized views: {e}")
             self.conn.rollback()
+            return False
 
-    def get_row_count(self, table_name):
-        """Get current row count in table"""
+    def _refresh_materialized_view(self, view_name):
+        """Refresh one materialized view on its own connection and log it"""
+        conn = self.open_connection()
+        conn.autocommit = True
+        cursor = conn.cursor()
         try:
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-            return self.cursor.fetchone()[0]
-        except:
-            return 0
-
-    def load_csv_to_table(self, csv_file, table_name, mode='append'):
-        """Load CSV data into PostgreSQL table"""
-        print(f"\n📤 Loading {csv_file} → {table_name}")
+            cursor.execute(
+                "SELECT ispopulated FROM pg_matviews WHERE schemaname = 'public' AND matviewname = %s;",
+                (view_name,)
+            )
+            row = cursor.fetchone()
+            # CONCURRENTLY needs an already-populated view
+            mode = 'concurrent' if row and row[0] else 'full'
+            refresh = "REFRESH MATERIALIZED VIEW CONCURRENTLY {};" if mode == 'concurrent' \
+                else "REFRESH MATERIALIZED VIEW {};"
+
+            start = time.perf_counter()
+            cursor.execute(sql.SQL(refresh).format(sql.Identifier(view_name)))
+            duration_ms = int((time.perf_counter() - start) * 1000)
+
+            cursor.execute(sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(view_name)))
+            row_count = cursor.fetchone()[0]
+
+            cursor.execute("""
+                INSERT INTO reporting_refresh_log
+                    (view_name, refreshed_at, duration_ms, row_count, refresh_mode)
+                VALUES (%s, now(), %s, %s, %s)
+                ON CONFLICT (view_name) DO UPDATE SET
+                    refreshed_at = EXCLUDED.refreshed_at,
+                    duration_ms = EXCLUDED.duration_ms,
+                    row_count = EXCLUDED.row_count,
+                    refresh_mode = EXCLUDED.refresh_mode;
+            """, (view_name, duration_ms, row_count, mode))
+            return view_name, mode, duration_ms, row_count, None
+        except psycopg2.Error as e:
+            return view_name, None, 0, 0, str(e).strip()
+        finally:
+            cursor.close()
+            conn.close()
 
-        # Read CSV
-        df = pd.read_csv(csv_file)
+    def refresh_materialized_views(self, workers=4):
+        """Refresh all materialized views in parallel and record freshness"""
+        print("\n" + "="*70)
+        print("REFRESHING MATERIALIZED VIEWS")
+        print("="*70)
 
-        # Convert NaN to None for PostgreSQL
-        df = df.where(pd.notnull(df), None)
+        if not self.create_materialized_views():
+            return False
 
-        # Convert boolean columns
-        bool_cols = df.select_dtypes(include=['bool']).columns
-        for col in bool_cols:
-            df[col] = df[col].astype(object)  # Convert to object to handle None
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(MATERIALIZED_VIEWS)))) as pool:
+            results = list(pool.map(self._refresh_materialized_view, MATERIALIZED_VIEWS))
 
-        if len(df) == 0:
-            print(f"   ⚠️  No data in {csv_file}, skipping...")
-            return
+        ok = True
+        for view_name, mode, duration_ms, row_count, error in results:
+            if error:
+                ok = False
+                print(f"   ✗ {view_name}: {error}")
+            else:
+                print(f"   ✓ {view_name:30s}: {row_count:>8,} rows  "
+                      f"({mode}, {duration_ms:,} ms)")
+        return ok
 
-        # Get current count
-        current_count = self.get_row_count(table_name)
+    # ------------------------------------------------------------------
+    # Bulk-load mode
+    # ------------------------------------------------------------------
 
-        # Prepare columns and values
-        columns = df.columns.tolist()
-        values = [tuple(row) for row in df.values]
+    def capture_secondary_objects(self, table_name):
+        """Return (indexes, foreign_keys) definitions for a table.
 
-        # Build INSERT statement
-        insert_query = sql.SQL("""
-            INSERT INTO {} ({})
-            VALUES %s
-            ON CONFLICT ({}) DO NOTHING
-        """).format(
-            sql.Identifier(table_name),
-            sql.SQL(', ').join(map(sql.Identifier, columns)),
-            sql.Identifier(TABLE_CONFIGS[table_name])
-        )
+        Only secondary indexes are captured: indexes that back a primary key,
+        unique or exclusion constraint stay in place so ON CONFLICT keeps
+        working while the data is loaded.
+        """
+        self.cursor.execute("""
+            SELECT i.relname, pg_get_indexdef(ix.indexrelid)
+            FROM pg_index ix
+            JOIN pg_class i ON i.oid = ix.indexrelid
+            JOIN pg_class t ON t.oid = ix.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public'
+              AND t.relname = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid
+              )
+            ORDER BY i.relname;
+        """, (table_name,))
+        indexes = [
+            {'table': table_name, 'name': name, 'definition': definition}
+            for name, definition in self.cursor.fetchall()
+        ]
+
+        self.cursor.execute("""
+            SELECT c.conname, pg_get_constraintdef(c.oid)
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            WHERE n.nspname = 'public'
+              AND t.relname = %s
+              AND c.contype = 'f'
+            ORDER BY c.conname;
+        """, (table_name,))
+        foreign_keys = [
+            {'table': table_name, 'name': name, 'definition': definition}
+            for name, definition in self.cursor.fetchall()
+        ]
+
+        return indexes, foreign_keys
+
+    def begin_bulk_load(self, table_names):
+        """Capture and drop secondary indexes and foreign keys before loading"""
+        print("\n" + "="*70)
+        print("BULK LOAD: DEFERRING INDEXES AND CONSTRAINTS")
+        print("="*70)
 
+        for table_name in table_names:
+            try:
+                indexes, foreign_keys = self.capture_secondary_objects(table_name)
+
+                for fk in foreign_keys:
+                    self.cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {};").format(
+                        sql.Identifier(table_name), sql.Identifier(fk['name'])
+                    ))
+                for index in indexes:
+                    self.cursor.execute(sql.SQL("DROP INDEX {};").format(
+                        sql.Identifier(index['name'])
+                    ))
+                self.conn.commit()
+
+                self.deferred_indexes.extend(indexes)
+                self.deferred_foreign_keys.extend(foreign_keys)
+                self.bulk_tables.append(table_name)
+                print(f"   ✓ {table_name}: deferred {len(indexes)} indexes, "
+                      f"{len(foreign_keys)} foreign keys")
+            except psycopg2.Error as e:
+                print(f"   ✗ Error deferring objects on '{table_name}': {e}")
+                self.conn.rollback()
+
+        # Applied to this session and to every worker connection opened later
+        self.session_settings.append(BULK_SESSION_SETTING)
+        self.cursor.execute(BULK_SESSION_SETTING)
+        self.conn.commit()
+
+    def _run_maintenance(self, statements, label):
+        """Run a list of statements on a dedicated connection, in order"""
+        conn = self.open_connection()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        failures = []
         try:
-            # Use execute_values for efficient bulk insert
-            execute_values(
-                self.cursor,
-                insert_query.as_string(self.conn),
-                values,
-                page_size=1000
-            )
-            self.conn.commit()
-
-            new_count = self.get_row_count(table_name)
-            inserted = new_count - current_count
-
-            print(f"   ✓ Loaded {len(df):,} rows")
-            print(f"   ✓ Inserted: {inserted:,} new rows")
-            print(f"   ✓ Total in table: {new_count:,} rows")
-
-        except psycopg2.Error as e:
-            print(f"   ✗ Error loading data: {e}")
-            self.conn.rollback()
-
-    def verify_data(self):
-        """Verify data was loaded correctly"""
+            try:
+                cursor.execute(
+                    sql.SQL("SET maintenance_work_mem = {};").format(
+                        sql.Literal(BULK_MAINTENANCE_WORK_MEM)
+                    )
+                )
+            except psycopg2.Error:
+                pass  # Keep server default if the role may not change it
+
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except psycopg2.Error as e:
+                    failures.append((label, str(e).strip()))
+        finally:
+            cursor.close()
+            conn.close()
+        return failures
+
+    def _run_parallel(self, jobs, workers):
+        """Run (label, statements) jobs across worker connections"""
+        failures = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(self._run_maintenance, statements, label)
+                       for label, statements in jobs]
+            for future in futures:
+                failures.extend(future.result())
+        return failures
+
+    def end_bulk_load(self, workers=4):
+        """Rebuild deferred indexes and foreign keys, then ANALYZE"""
         print("\n" + "="*70)
-        print("VERIFICATION SUMMARY")
+        print("BULK LOAD: REBUILDING INDEXES AND CONSTRAINTS")
         print("="*70)
 
-        total_rows = 0
-        for table_name in TABLE_CONFIGS.keys():
+        if BULK_SESSION_SETTING in self.session_settings:
+            self.session_settings.remove(BULK_SESSION_SETTING)
+        self.cursor.execute("SET synchronous_commit = on;")
+        self.conn.commit()
+
+        failures = []
+
+        # 1. Secondary indexes: CREATE INDEX only takes a SHARE lock, so
+        #    several builds can run against the same table at once.
+        index_jobs = [(index['name'], [index['definition']])
+                      for index in self.deferred_indexes]
+        failures += self._run_parallel(index_jobs, workers)
+        print(f"   ✓ Rebuilt {len(index_jobs) - len(failures)} indexes "
+              f"using {workers} connections")
+
+        # 2. Foreign keys: add as NOT VALID (cheap, serial), then validate
+        #    in parallel without blocking writers.
+        validate_jobs = []
+        for fk in self.deferred_foreign_keys:
             try:
-                count = self.get_row_count(table_name)
-                total_rows += count
-                print(f"  {table_name:30s}: {count:>10,} rows")
-            except:
-                print(f"  {table_name:30s}: {'ERROR':>10s}")
-
-        print("="*70)
-        print(f"  {'TOTAL RECORDS':30s}: {total_rows:>10,}")
-        print("="*70 + "\n")
+                self.cursor.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {} NOT VALID;").format(
+                    sql.Identifier(fk['table']),
+                    sql.Identifier(fk['name']),
+                    sql.SQL(fk['definition'])
+                ))
+                self.conn.commit()
+                validate_jobs.append((fk['name'], [
+                    sql.SQL("ALTER TABLE {} VALIDATE CONSTRAINT {};").format(
+                        sql.Identifier(fk['table']), sql.Identifier(fk['name'])
+                    )
+                ]))
+            except psycopg2.Error as e:
+                self.conn.rollback()
+                failures.append((fk['name'], str(e).strip()))
+
+        fk_failures = self._run_parallel(validate_jobs, workers)
+        failures += fk_failures
+        print(f"   ✓ Restored {len(validate_jobs) - len(fk_failures)} foreign keys")
+
+        # 3. Fresh planner statistics for everything that was loaded
+        analyze_jobs = [(table_name, [sql.SQL("ANALYZE {};").format(sql.Identifier(table_name))])
+                        for table_name in self.bulk_tables]
+        analyze_failures = self._run_parallel(analyze_jobs, workers)
+        failures += analyze_failures
+        print(f"   ✓ Analyzed {len(analyze_jobs) - len(analyze_failures)} tables")
+
+        # A dropped object that failed to rebuild is gone until it is recreated
+        # by hand, so print the statement that restores it
+        definitions = {index['name']: index['definition'] + ';' for index in self.deferred_indexes}
+        definitions.update({
+            fk['name']: f"ALTER TABLE {fk['table']} ADD CONSTRAINT {fk['name']} {fk['definition']};"
+            for fk in self.deferred_foreign_keys
+        })
+        for label, error in failures:
+            print(f"   ✗ {label}: {error}")
+            if label in definitions:
+                print(f"     Restore with: {definitions[label]}")
+
+        self.deferred_indexes = []
+        self.deferred_foreign_keys = []
+        self.bulk_tables = []
+
+        return not failures
+
+
+def canonical_pg_type(type_name):
+    """Normalize a type name so DDL spellings and format_type() output compare"""
+    canonical = type_name.upper().replace(' ', '')
+    for alias, name in (('CHARACTERVARYING', 'VARCHAR'),
+                        ('TIMESTAMPWITHOUTTIMEZONE', 'TIMESTAMP'),
+                        ('DECIMAL', 'NUMERIC'),
+                        ('INT4', 'INTEGER')):
+        canonical = canonical.replace(alias, name)
+    return canonical
+
+
+def is_text_type(canonical_type):
+    """True for TEXT / VARCHAR(n) types"""
+    return canonical_type == 'TEXT' or canonical_type.startswith('VARCHAR')
+
+
+def conversion_expression(column, canonical_type):
+    """USING expression that converts a column (typically TEXT) to a type"""
+    source = f"NULLIF(TRIM({column}::TEXT), '')"
+    if canonical_type == 'INTEGER':
+        # CSV loads may have written integers as '5.0'
+        return f"{source}::NUMERIC::INTEGER"
+    return f"{source}::{canonical_type}"
 
 
 def create_env_template():
@@ -341,6 +593,21 @@ def main():
                        help='Clear existing data before loading (fresh start)')
     parser.add_argument('--setup', action='store_true',
                        help='Create .env template and setup instructions')
+    parser.add_argument('--bulk', action='store_true',
+                       help='Defer secondary indexes and foreign keys during the load, '
+                            'rebuild them in parallel and ANALYZE afterwards')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Parallel connections for loading batches, rebuilding indexes '
+                            'in --bulk mode and refreshing materialized views (default: 4)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS,
+                       help=f'Rows per batch (default: {DEFAULT_BATCH_ROWS})')
+    parser.add_argument('--report', metavar='DIR',
+                       help='Write per-table/per-batch load telemetry (JSON + CSV) to DIR')
+    parser.add_argument('--live', action='store_true',
+                       help='Print per-batch throughput while loading')
+    parser.add_argument('--backend', choices=list(BACKEND_METHODS), default='copy',
+                       help='Loader: CSV COPY through a temp table (default), '
+                            'psycopg2 execute_values or asyncpg binary COPY')
     args = parser.parse_args()
 
     # Setup mode
@@ -365,48 +632,39 @@ def main():
         sys.exit(1)
 
     # Initialize sync
-    sync = SupabaseSync()
+    telemetry = SyncTelemetry('supabase', live=args.live)
+    sync = SupabaseSync(method=BACKEND_METHODS[args.backend], bulk=args.bulk,
+                        workers=args.workers)
+    engine = None
 
     try:
         # Connect
         sync.connect()
+        telemetry.measure_latency(sync.cursor)
+        engine = LoadEngine(sync, telemetry=telemetry, batch_rows=args.batch_rows,
+                            workers=args.workers)
 
-        # Process each CSV file
-        print("\n" + "="*70)
-        print("CREATING TABLES")
-        print("="*70)
-
+        tables = []
         for csv_file in CSV_FILES:
             csv_path = os.path.join(DATA_DIR, csv_file)
-            table_name = csv_file.replace('.csv', '')
-
             if not os.path.exists(csv_path):
                 print(f"⚠️  Skipping {csv_file} (not found)")
                 continue
+            tables.append((csv_file.replace('.csv', ''), csv_path))
 
-            # Create table
-            sync.create_table_from_csv(csv_path, table_name)
+        # Create (and clear) the tables and load them; in bulk mode indexes
+        # and foreign keys are restored even if a load fails
+        engine.run(tables, clear=args.clear)
 
-            # Clear if requested
-            if args.clear:
-                sync.clear_table(table_name)
+        telemetry.print_summary()
+        if args.report:
+            telemetry.write_reports(args.report)
+        engine.check_failures()
 
-        # Load data
-        print("\n" + "="*70)
-        print("LOADING DATA")
-        print("="*70)
-
-        for csv_file in CSV_FILES:
-            csv_path = os.path.join(DATA_DIR, csv_file)
-            table_name = csv_file.replace('.csv', '')
-
-            if not os.path.exists(csv_path):
-                continue
-
-            sync.load_csv_to_table(csv_path, table_name)
+        sync.finish([table_name for table_name, _ in tables])
 
         # Verify
-        sync.verify_data()
+        engine.verify(list(TABLE_CONFIGS))
 
         print("✅ Sync completed successfully!")
         print("\n" + "="*70)
@@ -425,12 +683,18 @@ def main():
         print("\n\n⚠️  Sync interrupted by user")
         sys.exit(1)
 
+    except LoadError as e:
+        print(f"\n❌ Sync incomplete: {e}")
+        sys.exit(1)
+
     except Exception as e:
         print(f"\n❌ Error: {e}")
         sys.exit(1)
 
     finally:
-        sync.disconnect()
+        if engine is not None:
+            engine.close()
+        sync.close()
 
 
 if __name__ == "__main__":
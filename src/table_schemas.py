@@ -0,0 +1,380 @@
+"""
+NourishBox Table Definitions
+The one schema registry: tables, keys, column types, categorical domains
+and sort order, shared by the generator, every loader and every reader
+
+CSV_FILES lists the generated files in load order (dimensions first),
+TABLE_CONFIGS maps each table to its primary key and TABLE_SCHEMAS gives
+the column types (PostgreSQL spelling, matching database_schema.sql).
+CATEGORIES lists the allowed values of the low-cardinality text columns
+and SORT_KEYS the physical row order of the large time-series tables.
+
+- The generator builds its frames with typed_table(), which parses dates
+  and checks every categorical value against its domain
+- Loaders create DDL from table_columns(); logical_type() reduces a
+  declared SQL type to one of: string, integer, decimal, date, boolean
+- Readers call read_table() (or pass csv_read_options() to pd.read_csv),
+  which sets dtypes, parse_dates and categoricals up front instead of
+  inferring every column as object and converting dates afterwards
+
+Usage:
+    from table_schemas import read_table
+    orders = read_table('orders')
+    orders = read_table('orders', columns=['customer_id', 'order_date', 'order_total'])
+"""
+
+import calendar
+import os
+
+import pandas as pd
+
+# Generated CSVs (see generate_nourishbox_data.py)
+DATA_DIR = 'data/nourishbox'
+CSV_FILES = [
+    'plan_dim.csv',
+    'date_dim.csv',
+    'customers.csv',
+    'customer_preferences.csv',
+    'subscriptions.csv',
+    'subscription_monthly.csv',
+    'orders.csv',
+    'order_items.csv',
+    'churn_events.csv',
+    'reviews.csv',
+    'marketing_campaigns.csv',
+    'product_catalog.csv'
+]
+
+# Table configurations (table_name: primary_key)
+TABLE_CONFIGS = {
+    'plan_dim': 'plan_key',
+    'date_dim': 'date_key',
+    'customers': 'customer_id',
+    'customer_preferences': 'customer_id',
+    'subscriptions': 'subscription_id',
+    'subscription_monthly': 'snapshot_id',
+    'orders': 'order_id',
+    'order_items': 'item_id',
+    'churn_events': 'churn_id',
+    'reviews': 'review_id',
+    'marketing_campaigns': 'campaign_id',
+    'product_catalog': 'product_id'
+}
+
+# Column types per table, matching database_schema.sql. Tables are created
+# from these definitions (not inferred from the CSV), so the reporting views
+# can aggregate and filter on native DATE/DECIMAL/BOOLEAN columns.
+TABLE_SCHEMAS = {
+    'plan_dim': {
+        'plan_key': 'VARCHAR(50)',
+        'plan_name': 'VARCHAR(100)',
+        'category': 'VARCHAR(20)',
+        'monthly_price': 'DECIMAL(10, 2)',
+        'meals_per_week': 'INTEGER',
+        'items_per_month': 'INTEGER',
+    },
+    'date_dim': {
+        'date_key': 'INTEGER',
+        'date': 'DATE',
+        'year': 'INTEGER',
+        'quarter': 'INTEGER',
+        'month': 'INTEGER',
+        'day': 'INTEGER',
+        'day_of_week': 'INTEGER',
+        'month_name': 'VARCHAR(20)',
+        'year_month': 'VARCHAR(7)',
+        'is_weekend': 'BOOLEAN',
+        'season': 'VARCHAR(10)',
+    },
+    'customers': {
+        'customer_id': 'VARCHAR(20)',
+        'first_name': 'VARCHAR(100)',
+        'last_name': 'VARCHAR(100)',
+        'email': 'VARCHAR(255)',
+        'phone': 'VARCHAR(50)',
+        'registration_date': 'DATE',
+        'acquisition_channel': 'VARCHAR(50)',
+        'age': 'INTEGER',
+        'gender': 'VARCHAR(30)',
+        'zip_code': 'VARCHAR(20)',
+        'city': 'VARCHAR(100)',
+        'state': 'VARCHAR(2)',
+        'referred_by_customer_id': 'VARCHAR(20)',
+        'is_new_year_signup': 'BOOLEAN',
+    },
+    'customer_preferences': {
+        'customer_id': 'VARCHAR(20)',
+        'dietary_preferences': 'TEXT',
+        'beauty_preferences': 'TEXT',
+        'skin_type': 'VARCHAR(20)',
+        'allergies': 'TEXT',
+        'preferred_meal_time': 'VARCHAR(20)',
+        'household_size': 'INTEGER',
+    },
+    'subscriptions': {
+        'subscription_id': 'VARCHAR(20)',
+        'customer_id': 'VARCHAR(20)',
+        'plan_type': 'VARCHAR(50)',
+        'plan_name': 'VARCHAR(100)',
+        'monthly_price': 'DECIMAL(10, 2)',
+        'start_date': 'DATE',
+        'end_date': 'DATE',
+        'status': 'VARCHAR(20)',
+        'billing_cycle': 'VARCHAR(20)',
+        'auto_renew': 'BOOLEAN',
+    },
+    'subscription_monthly': {
+        'snapshot_id': 'VARCHAR(20)',
+        'subscription_id': 'VARCHAR(20)',
+        'customer_id': 'VARCHAR(20)',
+        'plan_type': 'VARCHAR(50)',
+        'plan_name': 'VARCHAR(100)',
+        'month_start': 'DATE',
+        'status': 'VARCHAR(20)',
+        'mrr': 'DECIMAL(10, 2)',
+    },
+    'orders': {
+        'order_id': 'VARCHAR(20)',
+        'subscription_id': 'VARCHAR(20)',
+        'customer_id': 'VARCHAR(20)',
+        'order_date': 'DATE',
+        'delivery_date': 'DATE',
+        'order_total': 'DECIMAL(10, 2)',
+        'delivery_status': 'VARCHAR(20)',
+        'delivery_address_zip': 'VARCHAR(20)',
+        'shipping_cost': 'DECIMAL(10, 2)',
+        'discount_applied': 'DECIMAL(10, 2)',
+        'plan_type_at_order': 'VARCHAR(50)',
+        'plan_price_at_order': 'DECIMAL(10, 2)',
+        'campaign_id': 'VARCHAR(20)',
+        'order_date_key': 'INTEGER',
+        'year_month': 'VARCHAR(7)',
+    },
+    'order_items': {
+        'item_id': 'VARCHAR(20)',
+        'order_id': 'VARCHAR(20)',
+        'product_id': 'VARCHAR(20)',
+        'product_type': 'VARCHAR(20)',
+        'product_name': 'VARCHAR(200)',
+        'product_category': 'VARCHAR(50)',
+        'quantity': 'INTEGER',
+        'unit_cost': 'DECIMAL(10, 2)',
+        'line_price': 'DECIMAL(10, 2)',
+        'line_discount': 'DECIMAL(10, 2)',
+        'calories': 'INTEGER',
+        'retail_value': 'DECIMAL(10, 2)',
+        'tags': 'TEXT',
+    },
+    'churn_events': {
+        'churn_id': 'VARCHAR(20)',
+        'subscription_id': 'VARCHAR(20)',
+        'customer_id': 'VARCHAR(20)',
+        'churn_date': 'DATE',
+        'subscription_length_days': 'INTEGER',
+        'churn_reason': 'VARCHAR(50)',
+        'attempted_retention': 'BOOLEAN',
+        'retention_offer_accepted': 'BOOLEAN',
+        'feedback_provided': 'BOOLEAN',
+        'feedback_text': 'TEXT',
+    },
+    'reviews': {
+        'review_id': 'VARCHAR(20)',
+        'order_id': 'VARCHAR(20)',
+        'customer_id': 'VARCHAR(20)',
+        'subscription_id': 'VARCHAR(20)',
+        'review_date': 'DATE',
+        'rating': 'INTEGER',
+        'review_title': 'VARCHAR(200)',
+        'review_text': 'TEXT',
+        'would_recommend': 'BOOLEAN',
+        'meal_quality_rating': 'INTEGER',
+        'beauty_quality_rating': 'INTEGER',
+        'delivery_rating': 'INTEGER',
+        'value_rating': 'INTEGER',
+    },
+    'marketing_campaigns': {
+        'campaign_id': 'VARCHAR(20)',
+        'campaign_name': 'VARCHAR(200)',
+        'campaign_type': 'VARCHAR(50)',
+        'start_date': 'DATE',
+        'end_date': 'DATE',
+        'budget': 'DECIMAL(10, 2)',
+        'target_audience': 'VARCHAR(50)',
+        'offer_type': 'VARCHAR(50)',
+        'offer_value': 'INTEGER',
+        'impressions': 'INTEGER',
+        'clicks': 'INTEGER',
+        'conversions': 'INTEGER',
+        'ctr': 'DECIMAL(5, 2)',
+        'conversion_rate': 'DECIMAL(5, 2)',
+        'cost_per_acquisition': 'DECIMAL(10, 2)',
+    },
+    'product_catalog': {
+        'product_id': 'VARCHAR(20)',
+        'product_type': 'VARCHAR(20)',
+        'product_name': 'VARCHAR(200)',
+        'category': 'VARCHAR(50)',
+        'cost_to_company': 'DECIMAL(10, 2)',
+        'calories': 'INTEGER',
+        'tags': 'TEXT',
+        'active': 'BOOLEAN',
+        'retail_value': 'DECIMAL(10, 2)',
+    },
+}
+
+# Categorical domains. The generator draws from these lists, so the order of
+# each list is part of the (seeded) output.
+ACQUISITION_CHANNELS = ['organic_search', 'paid_social', 'referral', 'instagram', 'facebook_ads',
+                        'google_ads', 'partnership', 'direct']
+GENDERS = ['Female', 'Male', 'Non-binary', 'Prefer not to say']
+SKIN_TYPES = ['normal', 'oily', 'dry', 'combination', 'sensitive']
+MEAL_TIMES = ['lunch', 'dinner', 'both']
+PLAN_TYPES = ['meal_basic', 'meal_plus', 'beauty_essentials', 'beauty_premium',
+              'combo_starter', 'combo_deluxe']
+PLAN_NAMES = ['Meal Basic', 'Meal Plus', 'Beauty Essentials', 'Beauty Premium',
+              'Combo Starter', 'Combo Deluxe']
+PLAN_CATEGORIES = ['meals', 'beauty', 'combo']
+SUBSCRIPTION_STATUSES = ['active', 'cancelled', 'upgraded']
+BILLING_CYCLES = ['monthly']
+DELIVERY_STATUSES = ['delivered', 'delayed', 'cancelled', 'pending']
+PRODUCT_TYPES = ['meal', 'beauty']
+PRODUCT_CATEGORIES = ['protein', 'vegetarian', 'low_carb', 'paleo', 'vegan',
+                      'skincare_face', 'skincare_body', 'makeup', 'haircare', 'wellness']
+CHURN_REASONS = [
+    'too_expensive', 'moving', 'product_quality', 'variety_lacking',
+    'dietary_needs_changed', 'prefer_competitor', 'financial_reasons',
+    'delivery_issues', 'too_much_food', 'lifestyle_change', 'other'
+]
+CAMPAIGN_TYPES = ['email', 'social_media', 'influencer', 'paid_ads', 'referral_bonus', 'partnership']
+TARGET_AUDIENCES = ['new_customers', 'existing_customers', 'churned_customers', 'all']
+OFFER_TYPES = ['discount_percent', 'discount_fixed', 'free_trial', 'free_gift', 'none']
+SEASONS = ['winter', 'spring', 'summer', 'fall']
+MONTH_NAMES = list(calendar.month_name)[1:]
+
+CATEGORIES = {
+    'plan_dim': {'plan_key': PLAN_TYPES, 'plan_name': PLAN_NAMES, 'category': PLAN_CATEGORIES},
+    'date_dim': {'month_name': MONTH_NAMES, 'season': SEASONS},
+    'customers': {'acquisition_channel': ACQUISITION_CHANNELS, 'gender': GENDERS},
+    'customer_preferences': {'skin_type': SKIN_TYPES, 'preferred_meal_time': MEAL_TIMES},
+    'subscriptions': {'plan_type': PLAN_TYPES, 'plan_name': PLAN_NAMES,
+                      'status': SUBSCRIPTION_STATUSES, 'billing_cycle': BILLING_CYCLES},
+    'subscription_monthly': {'plan_type': PLAN_TYPES, 'plan_name': PLAN_NAMES,
+                             'status': SUBSCRIPTION_STATUSES},
+    'orders': {'delivery_status': DELIVERY_STATUSES, 'plan_type_at_order': PLAN_TYPES},
+    'order_items': {'product_type': PRODUCT_TYPES, 'product_category': PRODUCT_CATEGORIES},
+    'churn_events': {'churn_reason': CHURN_REASONS},
+    'marketing_campaigns': {'campaign_type': CAMPAIGN_TYPES, 'target_audience': TARGET_AUDIENCES,
+                            'offer_type': OFFER_TYPES},
+    'product_catalog': {'product_type': PRODUCT_TYPES, 'category': PRODUCT_CATEGORIES},
+}
+
+# Physical row order of the large time-series tables (time first, then the
+# usual filter/join column), used for sorted exports and clustering
+SORT_KEYS = {
+    'subscriptions': ['start_date', 'customer_id'],
+    'subscription_monthly': ['month_start', 'customer_id'],
+    'orders': ['order_date', 'customer_id'],
+    'order_items': ['order_id', 'item_id'],
+    'churn_events': ['churn_date'],
+    'reviews': ['review_date', 'customer_id'],
+}
+
+DATE_FORMAT = '%Y-%m-%d'
+
+LOGICAL_TYPES = ('string', 'integer', 'decimal', 'date', 'boolean')
+
+
+def logical_type(sql_type):
+    """Reduce a declared SQL type (e.g. 'DECIMAL(10, 2)') to a logical type"""
+    base = sql_type.upper().split('(')[0].strip()
+    if base in ('INTEGER', 'INT', 'BIGINT', 'SMALLINT'):
+        return 'integer'
+    if base in ('DECIMAL', 'NUMERIC', 'DOUBLE', 'FLOAT', 'REAL'):
+        return 'decimal'
+    if base == 'DATE':
+        return 'date'
+    if base == 'BOOLEAN':
+        return 'boolean'
+    return 'string'
+
+
+def table_columns(table_name, csv_columns=None):
+    """{column: declared SQL type} for a table, in CSV column order.
+
+    Columns the schema does not declare are typed as TEXT.
+    """
+    schema = TABLE_SCHEMAS.get(table_name, {})
+    columns = csv_columns if csv_columns is not None else list(schema)
+    return {col: schema.get(col, 'TEXT') for col in columns}
+
+
+def category_dtype(table_name, column):
+    """pandas CategoricalDtype for a categorical column (None otherwise).
+
+    Categories are sorted, so sorting and groupby order match plain strings.
+    """
+    domain = CATEGORIES.get(table_name, {}).get(column)
+    return pd.CategoricalDtype(sorted(domain)) if domain is not None else None
+
+
+def csv_read_options(table_name, columns=None):
+    """pd.read_csv keyword arguments for a generated CSV.
+
+    Text columns are read as str (IDs and zip codes stay verbatim),
+    categorical columns straight into their CategoricalDtype, decimals as
+    float64 and dates parsed with the fixed ISO format. Integer and boolean
+    columns are left to the C parser, which reads columns with missing
+    values as float/object instead of failing.
+    """
+    dtype = {}
+    parse_dates = []
+    for col, sql_type in table_columns(table_name, columns).items():
+        kind = logical_type(sql_type)
+        categories = category_dtype(table_name, col)
+        if categories is not None:
+            dtype[col] = categories
+        elif kind == 'string':
+            dtype[col] = str
+        elif kind == 'decimal':
+            dtype[col] = 'float64'
+        elif kind == 'date':
+            parse_dates.append(col)
+    options = {'dtype': dtype}
+    if parse_dates:
+        options['parse_dates'] = parse_dates
+        options['date_format'] = DATE_FORMAT
+    if columns is not None:
+        options['usecols'] = list(columns)
+    return options
+
+
+def read_table(table_name, data_dir=DATA_DIR, columns=None):
+    """Read one generated table from its CSV with the registry's types"""
+    path = os.path.join(data_dir, f'{table_name}.csv')
+    return pd.read_csv(path, **csv_read_options(table_name, columns))
+
+
+def typed_table(table_name, df):
+    """Copy of a generated frame with registry types applied.
+
+    Dates (ISO strings) become datetime64, categorical columns become
+    Categorical and decimals float. A value outside its column's domain
+    raises ValueError, so the generator cannot drift from the registry.
+    Writing the result with to_csv gives the same file as the untyped frame.
+    """
+    df = df.copy()
+    for col, sql_type in table_columns(table_name, list(df.columns)).items():
+        kind = logical_type(sql_type)
+        categories = category_dtype(table_name, col)
+        if categories is not None:
+            values = df[col].astype(categories)
+            unknown = df[col][values.isna() & df[col].notna()].unique()
+            if len(unknown):
+                raise ValueError(f"{table_name}.{col}: values outside the domain: "
+                                 f"{sorted(map(str, unknown))}")
+            df[col] = values
+        elif kind == 'date':
+            df[col] = pd.to_datetime(df[col], format=DATE_FORMAT)
+        elif kind == 'decimal':
+            df[col] = df[col].astype('float64')
+    return df
@@ -3,221 +3,47 @@ NourishBox MRR Visualization
 Visualize Monthly Recurring Revenue over time
 """
 
+import argparse
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from datetime import datetime
-import numpy as np
 
-# Configuration
-DATA_DIR = 'data/nourishbox'
+from analysis_backends import add_backend_arguments, backend_from_args, get_backend
+from chart_renderer import ChartJob, add_render_arguments, render, render_from_args
+from mrr_engine import MOVEMENTS
 
-def calculate_mrr():
+def calculate_mrr(backend=None):
     """Calculate Monthly Recurring Revenue using the snapshot table and orders"""
 
-    print("Loading data...")
-
-    subscription_monthly = pd.read_csv(f'{DATA_DIR}/subscription_monthly.csv')
-    orders = pd.read_csv(f'{DATA_DIR}/orders.csv')
-
-    subscription_monthly['month_start'] = pd.to_datetime(subscription_monthly['month_start'])
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
+    backend = backend or get_backend('pandas')
 
-    print(f"✓ Loaded {len(subscription_monthly)} subscription snapshots")
-    print(f"✓ Loaded {len(orders)} orders\n")
-
-    start_date = subscription_monthly['month_start'].min()
-    end_date = subscription_monthly['month_start'].max()
-
-    date_range = pd.date_range(start=start_date, end=end_date, freq='MS')
+    print("Loading data...")
 
-    mrr_data = []
+    print(f"✓ Loaded {backend.row_count('subscription_monthly')} subscription snapshots")
+    print(f"✓ Loaded {backend.row_count('orders')} orders\n")
 
     print("Calculating MRR for each month...")
 
-    for current_date in date_range:
-        snapshots = subscription_monthly[subscription_monthly['month_start'] == current_date]
-
-        mrr = snapshots['mrr'].sum()
-        active_count = snapshots[snapshots['status'].isin(['active', 'upgraded'])]['subscription_id'].nunique()
-
-        month_end = current_date + pd.DateOffset(months=1)
-        actual_revenue = orders[
-            (orders['order_date'] >= current_date) &
-            (orders['order_date'] < month_end) &
-            (orders['delivery_status'].isin(['delivered', 'pending', 'delayed']))
-        ]['order_total'].sum()
-
-        mrr_data.append({
-            'date': current_date,
-            'mrr': mrr,
-            'active_subscribers': active_count,
-            'actual_revenue': actual_revenue,
-            'year_month': current_date.strftime('%Y-%m')
-        })
-
-    mrr_df = pd.DataFrame(mrr_data)
-
-    mrr_df['growth_rate'] = mrr_df['mrr'].pct_change() * 100
+    # One grouped pass over each table (mrr_engine.py), or SQL in DuckDB
+    mrr_df = backend.monthly_mrr()
 
     print(f"✓ Calculated MRR for {len(mrr_df)} months\n")
 
     return mrr_df
 
 
-def create_mrr_visualization(mrr_df):
-    """Create comprehensive MRR visualizations"""
+def create_mrr_visualization(mrr_df, args=None):
+    """Create comprehensive MRR visualizations (charts.mrr_dashboard)"""
 
     print("Creating visualizations...")
 
-    mrr_df = mrr_df.copy()
-
-    # Create figure with subplots
-    fig, axes = plt.subplots(2, 2, figsize=(16, 10))
-    fig.suptitle('NourishBox - Monthly Recurring Revenue Analysis',
-                 fontsize=16, fontweight='bold', y=0.995)
-
-    # Color scheme
-    primary_color = '#2E86AB'    # Blue
-    secondary_color = '#A23B72'  # Purple
-    success_color = '#06A77D'    # Green
-
-    # ========================================================================
-    # Plot 1: MRR Over Time (Main Chart)
-    # ========================================================================
-    ax1 = axes[0, 0]
-    ax1.plot(mrr_df['date'], mrr_df['mrr'],
-             linewidth=3, color=primary_color, marker='o', markersize=4)
-    ax1.fill_between(mrr_df['date'], mrr_df['mrr'],
-                      alpha=0.3, color=primary_color)
-
-    # Format
-    ax1.set_title('Monthly Recurring Revenue (MRR)',
-                  fontsize=12, fontweight='bold', pad=10)
-    ax1.set_xlabel('Date', fontsize=10)
-    ax1.set_ylabel('MRR ($)', fontsize=10)
-    ax1.grid(True, alpha=0.3, linestyle='--')
-    ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-
-    # Date formatting
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    ax1.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-    plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-    # Add current MRR annotation
-    current_mrr = mrr_df['mrr'].iloc[-1]
-    ax1.annotate(f'Current MRR:\n${current_mrr:,.0f}',
-                xy=(mrr_df['date'].iloc[-1], current_mrr),
-                xytext=(-100, 20), textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor=primary_color, alpha=0.8),
-                color='white', fontweight='bold', fontsize=10,
-                arrowprops=dict(arrowstyle='->', color=primary_color, lw=2))
-
-    # ========================================================================
-    # Plot 2: Active Subscribers Over Time
-    # ========================================================================
-    ax2 = axes[0, 1]
-    ax2.plot(mrr_df['date'], mrr_df['active_subscribers'],
-             linewidth=3, color=secondary_color, marker='s', markersize=4)
-    ax2.fill_between(mrr_df['date'], mrr_df['active_subscribers'],
-                      alpha=0.3, color=secondary_color)
-
-    ax2.set_title('Active Subscribers Over Time',
-                  fontsize=12, fontweight='bold', pad=10)
-    ax2.set_xlabel('Date', fontsize=10)
-    ax2.set_ylabel('Active Subscribers', fontsize=10)
-    ax2.grid(True, alpha=0.3, linestyle='--')
-    ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f}'))
-
-    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    ax2.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-    plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-    # Add current subscriber annotation
-    current_subs = mrr_df['active_subscribers'].iloc[-1]
-    ax2.annotate(f'{current_subs:,} subscribers',
-                xy=(mrr_df['date'].iloc[-1], current_subs),
-                xytext=(-100, 20), textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor=secondary_color, alpha=0.8),
-                color='white', fontweight='bold', fontsize=10,
-                arrowprops=dict(arrowstyle='->', color=secondary_color, lw=2))
-
-    # ========================================================================
-    # Plot 3: MRR vs Actual Revenue
-    # ========================================================================
-    ax3 = axes[1, 0]
-
-    x_pos = np.arange(len(mrr_df))
-    width = 0.35
-
-    ax3.bar(x_pos - width/2, mrr_df['mrr'], width,
-            label='MRR (Expected)', color=primary_color, alpha=0.8)
-    ax3.bar(x_pos + width/2, mrr_df['actual_revenue'], width,
-            label='Actual Revenue', color=success_color, alpha=0.8)
-
-    ax3.set_title('MRR vs Actual Revenue',
-                  fontsize=12, fontweight='bold', pad=10)
-    ax3.set_xlabel('Month', fontsize=10)
-    ax3.set_ylabel('Revenue ($)', fontsize=10)
-    ax3.grid(True, alpha=0.3, linestyle='--', axis='y')
-    ax3.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-    ax3.legend(loc='upper left', fontsize=9)
-
-    # Show every 6th month label
-    tick_positions = range(0, len(mrr_df), 6)
-    tick_labels = [mrr_df['year_month'].iloc[i] for i in tick_positions]
-    ax3.set_xticks(tick_positions)
-    ax3.set_xticklabels(tick_labels, rotation=45, ha='right')
-
-    # ========================================================================
-    # Plot 4: MRR Growth Rate (Month-over-Month)
-    # ========================================================================
-    ax4 = axes[1, 1]
-
-    # Calculate month-over-month growth rate
-    mrr_df['growth_rate'] = mrr_df['mrr'].pct_change() * 100
-
-    # Color positive/negative growth differently
-    colors = [success_color if x >= 0 else '#E63946' for x in mrr_df['growth_rate'][1:]]
-
-    ax4.bar(mrr_df['date'][1:], mrr_df['growth_rate'][1:],
-            color=colors, alpha=0.8, width=20)
-    ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
-
-    ax4.set_title('MRR Growth Rate (Month-over-Month)',
-                  fontsize=12, fontweight='bold', pad=10)
-    ax4.set_xlabel('Date', fontsize=10)
-    ax4.set_ylabel('Growth Rate (%)', fontsize=10)
-    ax4.grid(True, alpha=0.3, linestyle='--', axis='y')
-    ax4.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-
-    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    ax4.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-    plt.setp(ax4.xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-    # Add average growth rate
-    avg_growth = mrr_df['growth_rate'][1:].mean()
-    ax4.axhline(y=avg_growth, color='gray', linestyle='--', linewidth=1.5,
-                label=f'Avg: {avg_growth:.2f}%')
-    ax4.legend(loc='upper left', fontsize=9)
-
-    # ========================================================================
-    # Adjust layout and save
-    # ========================================================================
-    plt.tight_layout()
-
-    # Save figure
-    output_file = 'mrr_analysis.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved visualization: {output_file}")
-
-    # Show plot
-    plt.show()
+    jobs = [ChartJob('mrr_dashboard', mrr_df, 'mrr_analysis.png')]
+    if args is None:
+        return render(jobs)
+    return render_from_args(args, jobs)
 
-    return mrr_df
 
 
-def print_mrr_summary(mrr_df):
+def print_mrr_summary(mrr_df, backend=None):
     """Print MRR summary statistics"""
 
     def safe_div(num, denom):
@@ -269,6 +95,13 @@ def print_mrr_summary(mrr_df):
     realization = safe_div(total_actual, total_mrr) * 100
     print(f"  Revenue Realization:  {realization:.1f}%")
 
+    # MRR movements (customer level)
+    print(f"\n🔄 MRR Movements (all months):")
+    bridge = (backend or get_backend('pandas')).mrr_movements()
+    for movement in MOVEMENTS:
+        label = movement.replace('_mrr', '').capitalize() + ':'
+        print(f"  {label:19s} ${bridge[movement].sum():,.2f}")
+
     # Monthly breakdown (last 12 months)
     print(f"\n📅 Last 12 Months MRR:")
     last_12 = mrr_df.tail(12)
@@ -283,18 +116,24 @@ def print_mrr_summary(mrr_df):
 def main():
     """Main execution"""
 
+    parser = argparse.ArgumentParser(description='NourishBox MRR analysis')
+    add_backend_arguments(parser)
+    add_render_arguments(parser)
+    args = parser.parse_args()
+    backend = backend_from_args(args)
+
     print("\n" + "="*70)
     print("NOURISHBOX MRR ANALYSIS")
     print("="*70 + "\n")
 
     # Calculate MRR
-    mrr_df = calculate_mrr()
+    mrr_df = calculate_mrr(backend)
 
     # Create visualizations
-    mrr_visualization = create_mrr_visualization(mrr_df)
+    create_mrr_visualization(mrr_df, args)
 
     # Print summary
-    print_mrr_summary(mrr_df)
+    print_mrr_summary(mrr_df, backend)
 
     # Save MRR data to CSV for further analysis
     output_csv = 'mrr_data.csv'
@@ -0,0 +1,139 @@
+"""PandasBackend and DuckDBBackend agree on a small synthetic dataset"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_backends import COHORT_SPECS, DuckDBBackend, PandasBackend, check_parity
+from table_schemas import TABLE_SCHEMAS
+
+pytest.importorskip('duckdb')
+
+PLANS = {
+    'meal_basic': ('Meal Basic', 59.99),
+    'meal_plus': ('Meal Plus', 89.99),
+    'beauty_essentials': ('Beauty Essentials', 35.99),
+    'combo_starter': ('Combo Starter', 74.99),
+}
+CHANNELS = ['organic_search', 'paid_social', 'referral', 'instagram']
+DELIVERY_STATUSES = ['delivered', 'delivered', 'delivered', 'delayed', 'cancelled']
+
+
+def synthetic_tables(n_customers=80, seed=7):
+    """customers, subscriptions, subscription_monthly, orders and churn_events,
+    with every schema column (unused ones left empty)"""
+    rng = np.random.RandomState(seed)
+    end_of_data = pd.Timestamp('2024-06-30')
+    customers, subscriptions, snapshots, orders, churns = [], [], [], [], []
+
+    for i in range(1, n_customers + 1):
+        customer_id = f'CUST{i:06d}'
+        registered = pd.Timestamp('2022-01-01') + pd.Timedelta(days=int(rng.randint(0, 730)))
+        customers.append({
+            'customer_id': customer_id,
+            'first_name': 'Test',
+            'last_name': f'Customer{i}',
+            'email': f'customer{i}@example.com',
+            'registration_date': registered.date().isoformat(),
+            'acquisition_channel': CHANNELS[rng.randint(len(CHANNELS))],
+            'age': int(rng.randint(20, 70)),
+            'is_new_year_signup': bool(registered.month == 1),
+        })
+        # Some customers never subscribe or order
+        if i % 9 == 0:
+            continue
+
+        start = registered
+        for _ in range(rng.randint(1, 3)):
+            subscription_id = f'SUB{len(subscriptions) + 1:06d}'
+            plan_type = list(PLANS)[rng.randint(len(PLANS))]
+            plan_name, price = PLANS[plan_type]
+            end = start + pd.Timedelta(days=int(rng.randint(20, 500)))
+            status = 'cancelled' if end <= end_of_data else rng.choice(['active', 'upgraded'])
+            subscriptions.append({
+                'subscription_id': subscription_id, 'customer_id': customer_id,
+                'plan_type': plan_type, 'plan_name': plan_name, 'monthly_price': price,
+                'start_date': start.date().isoformat(),
+                'end_date': end.date().isoformat() if status == 'cancelled' else None,
+                'status': status, 'billing_cycle': 'monthly', 'auto_renew': bool(rng.randint(2)),
+            })
+
+            last = min(end, end_of_data)
+            for month_start in pd.date_range(start.to_period('M').to_timestamp(), last, freq='MS'):
+                cancelled = status == 'cancelled' and month_start == end.to_period('M').to_timestamp()
+                snapshots.append({
+                    'snapshot_id': f'SNAP{len(snapshots) + 1:07d}',
+                    'subscription_id': subscription_id, 'customer_id': customer_id,
+                    'plan_type': plan_type, 'plan_name': plan_name,
+                    'month_start': month_start.date().isoformat(),
+                    'status': 'cancelled' if cancelled else status,
+                    'mrr': 0.0 if cancelled else price,
+                })
+                order_date = month_start + pd.Timedelta(days=int(rng.randint(0, 28)))
+                if order_date < start or order_date > last:
+                    continue
+                orders.append({
+                    'order_id': f'ORD{len(orders) + 1:07d}',
+                    'subscription_id': subscription_id, 'customer_id': customer_id,
+                    'order_date': order_date.date().isoformat(),
+                    'order_total': round(price * rng.uniform(0.8, 1.1), 2),
+                    'delivery_status': DELIVERY_STATUSES[rng.randint(len(DELIVERY_STATUSES))],
+                })
+
+            if status == 'cancelled':
+                churns.append({
+                    'churn_id': f'CHURN{len(churns) + 1:06d}',
+                    'subscription_id': subscription_id, 'customer_id': customer_id,
+                    'churn_date': end.date().isoformat(),
+                    'subscription_length_days': (end - start).days,
+                    'churn_reason': 'too_expensive',
+                })
+            start = end + pd.Timedelta(days=int(rng.randint(1, 60)))
+            if start > end_of_data:
+                break
+
+    tables = {
+        'customers': customers,
+        'subscriptions': subscriptions,
+        'subscription_monthly': snapshots,
+        'orders': orders,
+        'churn_events': churns,
+    }
+    return {table_name: pd.DataFrame(rows).reindex(columns=list(TABLE_SCHEMAS[table_name]))
+            for table_name, rows in tables.items()}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for table_name, df in synthetic_tables().items():
+        df.to_csv(tmp_path / f'{table_name}.csv', index=False)
+    return str(tmp_path)
+
+
+def test_dataset_is_not_trivial(data_dir):
+    backend = PandasBackend(data_dir)
+    mrr = backend.monthly_mrr()
+    assert (mrr['mrr'] > 0).sum() > 12
+    assert backend.seasonality()['churns'] > 0
+
+
+def test_backends_match(data_dir):
+    results = check_parity(PandasBackend(data_dir), DuckDBBackend(data_dir), COHORT_SPECS)
+    analyses = [name for name, _, _, _ in results]
+    assert analyses[:3] == ['seasonality', 'monthly_mrr', 'mrr_movements']
+    assert len(analyses) == 3 + len(COHORT_SPECS)
+    problems = {name: problem for name, _, _, problem in results if problem}
+    assert problems == {}
+
+
+def test_parity_reports_differences(data_dir, tmp_path_factory):
+    other_dir = tmp_path_factory.mktemp('other')
+    tables = synthetic_tables()
+    tables['orders']['order_total'] *= 2
+    for table_name, df in tables.items():
+        df.to_csv(other_dir / f'{table_name}.csv', index=False)
+
+    results = check_parity(PandasBackend(data_dir), DuckDBBackend(str(other_dir)), COHORT_SPECS[:1])
+    problems = {name for name, _, _, problem in results if problem}
+    assert 'monthly_mrr' in problems
+    assert 'seasonality' in problems
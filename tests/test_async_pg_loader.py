@@ -0,0 +1,113 @@
+"""Typed rows survive the binary COPY path of AsyncCopyWriter.
+
+Needs a PostgreSQL server: set NOURISHBOX_TEST_PG_DSN, or pip install pgserver
+to start a throwaway one. Skipped otherwise.
+"""
+
+import datetime
+import os
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from load_engine import typed_frame
+from sinks import python_rows
+
+asyncpg = pytest.importorskip('asyncpg')
+psycopg2 = pytest.importorskip('psycopg2')
+
+from async_pg_loader import AsyncCopyWriter
+
+TABLE = 'test_async_copy'
+COLUMN_TYPES = {
+    'order_id': 'VARCHAR(20)',
+    'quantity': 'INTEGER',
+    'order_total': 'DECIMAL(10,2)',
+    'order_date': 'DATE',
+    'is_gift': 'BOOLEAN',
+    'note': 'TEXT',
+}
+
+
+@pytest.fixture(scope='module')
+def dsn(tmp_path_factory):
+    dsn = os.getenv('NOURISHBOX_TEST_PG_DSN')
+    if dsn:
+        yield dsn
+        return
+    pgserver = pytest.importorskip('pgserver', reason='no NOURISHBOX_TEST_PG_DSN and no pgserver')
+    server = pgserver.get_server(tmp_path_factory.mktemp('pgdata'), cleanup_mode='delete')
+    try:
+        yield server.get_uri()
+    finally:
+        server.cleanup()
+
+
+@pytest.fixture
+def db(dsn):
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    columns = ', '.join(f'"{col}" {sql_type}' for col, sql_type in COLUMN_TYPES.items())
+    cursor.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+    cursor.execute(f'CREATE TABLE "{TABLE}" ({columns}, PRIMARY KEY ("order_id"))')
+    conn.commit()
+    yield cursor
+    conn.rollback()
+    cursor.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+    conn.commit()
+    conn.close()
+
+
+def csv_batch(rows):
+    """A batch as LoadEngine builds it: CSV strings converted by typed_frame()"""
+    df = pd.DataFrame(rows, columns=list(COLUMN_TYPES), dtype=object)
+    return typed_frame(df, COLUMN_TYPES)
+
+
+def table_rows(cursor):
+    cursor.execute(f'SELECT {", ".join(COLUMN_TYPES)} FROM "{TABLE}" ORDER BY order_id')
+    return cursor.fetchall()
+
+
+def test_round_trip_typed_rows(dsn, db):
+    batch = csv_batch([
+        ['ORD1', '2', '74.99', '2024-01-31', 'True', "O'Brien, \"quoted\""],
+        ['ORD2', None, '0.10', None, 'False', None],
+        ['ORD3', '1', None, '2023-12-01', None, 'ünïcödé\ttab'],
+    ])
+    writer = AsyncCopyWriter(connections=2, dsn=dsn)
+    try:
+        writer.begin_table(TABLE)
+        inserted = writer.copy(TABLE, list(batch.columns), python_rows(batch, COLUMN_TYPES))
+    finally:
+        writer.close()
+
+    assert inserted == 3
+    assert table_rows(db) == [
+        ('ORD1', 2, Decimal('74.99'), datetime.date(2024, 1, 31), True, "O'Brien, \"quoted\""),
+        ('ORD2', None, Decimal('0.10'), None, False, None),
+        ('ORD3', 1, None, datetime.date(2023, 12, 1), None, 'ünïcödé\ttab'),
+    ]
+
+
+def test_existing_rows_are_skipped(dsn, db):
+    first = csv_batch([['ORD1', '1', '10.00', '2024-02-01', 'true', 'first']])
+    second = csv_batch([
+        ['ORD1', '9', '99.99', '2024-02-02', 'false', 'changed'],
+        ['ORD2', '3', '30.50', '2024-02-03', 'false', 'new'],
+    ])
+    writer = AsyncCopyWriter(connections=2, dsn=dsn)
+    try:
+        writer.begin_table(TABLE)
+        assert writer.copy(TABLE, list(first.columns), python_rows(first, COLUMN_TYPES)) == 1
+        # The table is no longer empty, so this batch goes through staging
+        writer.begin_table(TABLE)
+        assert writer.copy(TABLE, list(second.columns), python_rows(second, COLUMN_TYPES)) == 1
+    finally:
+        writer.close()
+
+    assert table_rows(db) == [
+        ('ORD1', 1, Decimal('10.00'), datetime.date(2024, 2, 1), True, 'first'),
+        ('ORD2', 3, Decimal('30.50'), datetime.date(2024, 2, 3), False, 'new'),
+    ]
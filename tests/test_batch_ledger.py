@@ -0,0 +1,120 @@
+"""Resuming loads from the batch ledger"""
+
+import sqlite3
+
+import pandas as pd
+
+from batch_ledger import BatchLedger
+from load_engine import LoadEngine
+from sinks import Sink, SQLiteSink
+from sync_telemetry import SyncTelemetry
+
+BATCH_ROWS = 2
+
+
+def write_reviews(path, n_rows=5, rating=5):
+    pd.DataFrame({
+        'review_id': [f'REV{i:06d}' for i in range(1, n_rows + 1)],
+        'customer_id': [f'CUST{i:06d}' for i in range(1, n_rows + 1)],
+        'rating': [rating] * n_rows,
+    }).to_csv(path, index=False)
+
+
+def batches(path):
+    return list(pd.read_csv(path, chunksize=BATCH_ROWS))
+
+
+def ledger_sink(ledger_path, csv_path):
+    sink = Sink()
+    sink.ledger = BatchLedger(str(ledger_path))
+    sink.begin_table('reviews', source=str(csv_path), batch_rows=BATCH_ROWS)
+    return sink
+
+
+def test_resume_skips_exactly_the_done_batches(tmp_path):
+    csv_path, ledger_path = tmp_path / 'reviews.csv', tmp_path / 'ledger.sqlite'
+    write_reviews(csv_path)
+    frames = batches(csv_path)
+    assert len(frames) == 3
+
+    # First run: batches 1 and 2 commit, batch 3 is in flight when it stops
+    sink = ledger_sink(ledger_path, csv_path)
+    for batch_number, df in enumerate(frames[:2], 1):
+        assert not sink.skip_batch('reviews', batch_number, (batch_number - 1) * BATCH_ROWS, df)
+        sink.batch_finished('reviews', batch_number, len(df), 0, None)
+    assert not sink.skip_batch('reviews', 3, 4, frames[2])
+    assert sink.ledger.failures() == [('reviews', 3, 1, 'interrupted')]
+    sink.ledger.close()
+
+    # Rerun against the reopened ledger
+    sink = ledger_sink(ledger_path, csv_path)
+    skipped = [sink.skip_batch('reviews', batch_number, (batch_number - 1) * BATCH_ROWS, df)
+               for batch_number, df in enumerate(frames, 1)]
+    assert skipped == [True, True, False]
+    sink.ledger.close()
+
+
+def test_changed_batch_is_resent(tmp_path):
+    csv_path, ledger_path = tmp_path / 'reviews.csv', tmp_path / 'ledger.sqlite'
+    write_reviews(csv_path)
+    frames = batches(csv_path)
+
+    sink = ledger_sink(ledger_path, csv_path)
+    assert not sink.skip_batch('reviews', 1, 0, frames[0])
+    sink.batch_finished('reviews', 1, len(frames[0]), 0, None)
+    sink.ledger.close()
+
+    sink = ledger_sink(ledger_path, csv_path)
+    edited = frames[0].assign(rating=1)
+    assert not sink.skip_batch('reviews', 1, 0, edited)
+    sink.ledger.close()
+
+
+def test_changed_source_starts_over(tmp_path):
+    csv_path, ledger_path = tmp_path / 'reviews.csv', tmp_path / 'ledger.sqlite'
+    write_reviews(csv_path)
+
+    sink = ledger_sink(ledger_path, csv_path)
+    for batch_number, df in enumerate(batches(csv_path), 1):
+        sink.skip_batch('reviews', batch_number, (batch_number - 1) * BATCH_ROWS, df)
+        sink.batch_finished('reviews', batch_number, len(df), 0, None)
+    sink.ledger.close()
+
+    # Same first batches, but the file (and so its fingerprint) changed
+    write_reviews(csv_path, n_rows=6)
+    sink = ledger_sink(ledger_path, csv_path)
+    skipped = [sink.skip_batch('reviews', batch_number, (batch_number - 1) * BATCH_ROWS, df)
+               for batch_number, df in enumerate(batches(csv_path), 1)]
+    assert skipped == [False, False, False]
+    # The stale load was dropped
+    with sqlite3.connect(ledger_path) as conn:
+        load_ids = {row[0] for row in conn.execute("SELECT load_id FROM batches")}
+    assert len(load_ids) == 1
+    sink.ledger.close()
+
+
+def test_engine_rerun_sends_nothing(tmp_path):
+    csv_path, ledger_path = tmp_path / 'reviews.csv', tmp_path / 'ledger.sqlite'
+    write_reviews(csv_path)
+
+    def load():
+        sink = SQLiteSink(str(tmp_path / 'target.sqlite')).connect()
+        sink.ledger = BatchLedger(str(ledger_path))
+        engine = LoadEngine(sink, telemetry=SyncTelemetry('test'), batch_rows=BATCH_ROWS)
+        try:
+            engine.prepare_table('reviews', ['review_id', 'customer_id', 'rating'])
+            inserted = engine.load_table(str(csv_path), 'reviews')
+            engine.check_failures()
+            return inserted
+        finally:
+            engine.close()
+            sink.ledger.close()
+            sink.close()
+
+    assert load() == 5
+    # Emptied behind the ledger's back: only a skip (not INSERT OR IGNORE) leaves it empty
+    with sqlite3.connect(tmp_path / 'target.sqlite') as conn:
+        conn.execute('DELETE FROM "reviews"')
+    assert load() == 0
+    with sqlite3.connect(tmp_path / 'target.sqlite') as conn:
+        assert conn.execute('SELECT COUNT(*) FROM "reviews"').fetchone()[0] == 0
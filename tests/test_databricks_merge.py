@@ -0,0 +1,95 @@
+"""DatabricksSink merge mode against the DuckDB stand-in warehouse"""
+
+import pandas as pd
+import pytest
+
+from load_engine import LoadEngine
+from sinks import DatabricksSink, merge_counts, row_hash_sql
+from sync_telemetry import SyncTelemetry
+from table_schemas import table_columns
+
+pytest.importorskip('duckdb')
+
+from databricks_staging import LocalSqlEndpoint
+
+COLUMNS = ['customer_id', 'first_name', 'age']
+EXISTING = [
+    ('CUST000001', 'Ana', 31),
+    ('CUST000002', 'Ben', 40),
+    ('CUST000003', None, 25),
+]
+STAGED = [
+    ('CUST000001', 'Ana', 31),      # unchanged
+    ('CUST000002', 'Ben', 41),      # changed
+    ('CUST000003', None, 25),       # unchanged, NULL included
+    ('CUST000004', 'Dee', 52),      # new
+]
+
+
+@pytest.fixture
+def sink():
+    endpoint = LocalSqlEndpoint()
+    sink = DatabricksSink(mode='merge', catalog='main', schema='nourishbox',
+                          endpoint=endpoint).connect()
+    sink.create_table('customers', table_columns('customers', COLUMNS), 'customer_id')
+    yield sink
+    sink.close()
+    endpoint.close()
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS).astype({'age': 'Int64'})
+
+
+def seed(sink):
+    """Load EXISTING straight into the table"""
+    sink.mode = 'append'
+    sink.write_batch('customers', frame(EXISTING), table_columns('customers', COLUMNS))
+    sink.mode = 'merge'
+
+
+def table_rows(sink):
+    sink.cursor.execute(f"SELECT * FROM {sink.table_name('customers')} ORDER BY customer_id")
+    return [tuple(row) for row in sink.cursor.fetchall()]
+
+
+def test_row_hash_tells_null_from_empty(sink):
+    sink.cursor.execute(f"SELECT {row_hash_sql('r', ['a'])} = {row_hash_sql('e', ['a'])} "
+                        f"FROM (SELECT CAST(NULL AS STRING) AS a) r, (SELECT '' AS a) e")
+    assert sink.cursor.fetchone()[0] is False
+
+
+def test_merge_sql_updates_only_changed_rows(sink):
+    seed(sink)
+    sink.cursor.execute(f"CREATE TABLE {sink.write_target('customers')} AS "
+                        f"SELECT * FROM {sink.table_name('customers')} LIMIT 0")
+    sink.cursor.execute(f"INSERT INTO {sink.write_target('customers')} VALUES "
+                        "('CUST000001', 'Ana', 31), ('CUST000002', 'Ben', 41), "
+                        "('CUST000003', NULL, 25), ('CUST000004', 'Dee', 52)")
+
+    sink.cursor.execute(sink.merge_sql('customers', COLUMNS))
+    counts = merge_counts(sink.cursor.fetchone(), len(STAGED))
+
+    assert counts == {'matched': 3, 'updated': 1, 'unchanged': 2, 'inserted': 1}
+    assert table_rows(sink) == STAGED
+
+
+def test_merge_mode_load(sink, capsys):
+    seed(sink)
+    engine = LoadEngine(sink, telemetry=SyncTelemetry('test'), batch_rows=2)
+    try:
+        inserted = engine.load_frame('customers', frame(STAGED))
+    finally:
+        engine.close()
+
+    assert inserted == 1
+    assert "Merged 4 staged rows: 3 matched (1 updated, 2 unchanged), 1 inserted" in capsys.readouterr().out
+    assert table_rows(sink) == STAGED
+    # The staging table is dropped afterwards
+    sink.cursor.execute("SELECT COUNT(*) FROM information_schema.tables "
+                        "WHERE table_name LIKE '%merge_staging%'")
+    assert sink.cursor.fetchone()[0] == 0
+
+
+def test_merge_counts_without_result_row():
+    assert merge_counts(None, 5) == {'matched': 5, 'updated': 0, 'unchanged': 5, 'inserted': 0}
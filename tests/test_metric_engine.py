@@ -0,0 +1,42 @@
+"""metric_engine value_counts results match pandas, tied counts included"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metric_engine import Metric, compute
+
+
+def tied_values(seed, n_values=30):
+    """Shuffled column in which many values share a count"""
+    rng = np.random.RandomState(seed)
+    labels = [f'value_{i:02d}' for i in rng.permutation(n_values)]
+    values = np.repeat(labels, rng.randint(1, 4, size=n_values))
+    rng.shuffle(values)
+    return values
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('dtype', [object, 'category'])
+def test_value_counts_order_matches_pandas(seed, dtype):
+    df = pd.DataFrame({'reason': tied_values(seed)}).astype({'reason': dtype})
+    result = compute([Metric('reasons', 'churn', 'value_counts', 'reason')], {'churn': df})['reasons']
+    expected = df['reason'].astype(object).value_counts()
+    assert list(result.index) == list(expected.index)
+    assert result.tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_value_counts_by_dimension_matches_subsets(seed):
+    rng = np.random.RandomState(seed)
+    values = tied_values(seed)
+    df = pd.DataFrame({
+        'product_type': rng.choice(['meal', 'beauty'], size=len(values)),
+        'product_category': values,
+    }).astype({'product_type': 'category'})
+    result = compute([Metric('categories', 'items', 'value_counts', 'product_category',
+                             by='product_type')], {'items': df})['categories']
+    for product_type in ('meal', 'beauty'):
+        expected = df.loc[df['product_type'] == product_type, 'product_category'].value_counts()
+        assert list(result.loc[product_type].index) == list(expected.index)
+        assert result.loc[product_type].tolist() == expected.tolist()
@@ -0,0 +1,86 @@
+"""RFM sketch accuracy and point-in-time snapshots against brute force"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rfm_engine import OrderIndex, QuantileSketch, score_rfm, stream_rfm
+
+QUANTILES = np.array([0.0, 0.01, 0.2, 0.4, 0.5, 0.6, 0.8, 0.99, 1.0])
+
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.05])
+def test_sketch_quantiles_within_relative_accuracy(relative_accuracy):
+    values = np.random.RandomState(3).lognormal(mean=4, sigma=1.5, size=5000)
+    sketch = QuantileSketch(relative_accuracy).update(values)
+
+    expected = np.quantile(values, QUANTILES, method='lower')
+    estimated = sketch.quantiles(QUANTILES)
+    assert np.all(np.abs(estimated - expected) <= relative_accuracy * expected)
+
+
+def test_merged_sketches_match_one_sketch():
+    values = np.random.RandomState(4).exponential(scale=50, size=3000)
+    values[:100] = 0.0
+    whole = QuantileSketch().update(values)
+    merged = QuantileSketch().update(values[:1000]).merge(QuantileSketch().update(values[1000:]))
+
+    assert merged.count == whole.count == 3000
+    assert merged.quantile_keys(QUANTILES).tolist() == whole.quantile_keys(QUANTILES).tolist()
+    assert merged.quantiles([0.01])[0] == 0.0
+
+
+def random_orders(seed=5, n_orders=2000, n_customers=150):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'customer_id': [f'CUST{i:06d}' for i in rng.randint(1, n_customers + 1, size=n_orders)],
+        'order_date': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.randint(0, 730, size=n_orders), 'D'),
+        'order_total': rng.uniform(10, 120, size=n_orders).round(2),
+        'delivery_status': rng.choice(['delivered', 'delayed', 'pending', 'cancelled'], size=n_orders),
+    })
+
+
+def brute_force_rfm(orders, as_of):
+    as_of = pd.Timestamp(as_of)
+    kept = orders[orders['delivery_status'].isin(['delivered', 'pending', 'delayed'])
+                  & (orders['order_date'] <= as_of)]
+    grouped = kept.groupby('customer_id', sort=True)
+    return pd.DataFrame({
+        'customer_id': grouped.size().index.to_numpy(),
+        'recency_days': (as_of - grouped['order_date'].max()).dt.days.to_numpy(),
+        'frequency': grouped.size().to_numpy(),
+        'monetary': grouped['order_total'].sum().round(2).to_numpy(),
+    })
+
+
+@pytest.mark.parametrize('as_of', ['2022-12-31', '2023-01-01', '2023-06-30', '2024-02-29',
+                                   '2024-12-30', '2026-01-01'])
+def test_snapshot_matches_brute_force(as_of):
+    orders = random_orders()
+    snapshot = OrderIndex(orders).snapshot(as_of)
+    expected = brute_force_rfm(orders, as_of)
+
+    assert snapshot.attrs['as_of'] == as_of
+    pd.testing.assert_frame_equal(snapshot.reset_index(drop=True), expected, check_dtype=False)
+
+
+def test_stream_matches_index(tmp_path):
+    orders = random_orders()
+    path = tmp_path / 'orders.csv'
+    orders.assign(order_date=orders['order_date'].dt.strftime('%Y-%m-%d')).to_csv(path, index=False)
+
+    streamed = stream_rfm(str(path), as_of='2024-06-30', chunksize=300)
+    indexed = OrderIndex(orders).snapshot('2024-06-30')
+    pd.testing.assert_frame_equal(streamed, indexed, check_dtype=False)
+
+
+def test_scores_are_quintiles():
+    rfm = brute_force_rfm(random_orders(), '2024-12-30')
+    scored = score_rfm(rfm)
+
+    assert set(scored['r_score']) == set(scored['f_score']) == set(scored['m_score']) == {1, 2, 3, 4, 5}
+    # Higher spend never scores lower; more recent (fewer days) never scores lower
+    by_monetary = scored.sort_values('monetary')
+    assert by_monetary['m_score'].is_monotonic_increasing
+    by_recency = scored.sort_values('recency_days')
+    assert by_recency['r_score'].is_monotonic_decreasing
@@ -0,0 +1,69 @@
+"""Round trips of Databricks string literals through sql_literals.py"""
+
+import pandas as pd
+import pytest
+
+from databricks_staging import STRING_LITERAL
+from sql_literals import encode_column, encode_rows, unescape_string
+
+TRICKY_STRINGS = [
+    "O'Brien",
+    "''",
+    "it's 'quoted'",
+    "C:\\Users\\nourish",
+    "ends with backslash\\",
+    "\\'",
+    "literal \\n, not a newline",
+    "50% off_today \\% \\_",
+    "line one\nline two\ttabbed",
+    "ünïcödé — ✓",
+]
+
+
+def test_quotes_are_backslash_escaped():
+    encoded = encode_column(pd.Series(["O'Brien", "a\\b"]), 'STRING').tolist()
+    assert encoded == ["'O\\'Brien'", "'a\\\\b'"]
+
+
+@pytest.mark.parametrize('value', TRICKY_STRINGS)
+def test_string_round_trip(value):
+    literal = encode_column(pd.Series([value]), 'STRING').iloc[0]
+    # One literal token, not adjacent literals that Spark would concatenate
+    match = STRING_LITERAL.fullmatch(literal)
+    assert match is not None
+    assert unescape_string(match.group(1)) == value
+
+
+def test_spark_escapes():
+    assert unescape_string("a\\nb") == "a\nb"
+    assert unescape_string("\\u00e9\\101") == "éA"
+    assert unescape_string("\\%\\_") == "\\%\\_"
+    assert unescape_string("\\q") == "q"
+
+
+def test_round_trip_through_stand_in():
+    pytest.importorskip('duckdb')
+    from databricks_staging import LocalSqlEndpoint
+
+    endpoint = LocalSqlEndpoint()
+    cursor = endpoint.cursor()
+    cursor.execute("CREATE TABLE main.nourishbox_names (`id` INT, `name` STRING)")
+    df = pd.DataFrame({'id': range(len(TRICKY_STRINGS)), 'name': TRICKY_STRINGS})
+    values_sql = ',\n'.join(encode_rows(df, {'id': 'INT', 'name': 'STRING'}))
+    cursor.execute(f"INSERT INTO main.nourishbox_names (`id`, `name`) VALUES {values_sql}")
+
+    cursor.execute("SELECT `name` FROM main.nourishbox_names ORDER BY `id`")
+    assert [row[0] for row in cursor.fetchall()] == TRICKY_STRINGS
+    endpoint.close()
+
+
+def test_stand_in_reads_doubled_quotes_like_spark():
+    pytest.importorskip('duckdb')
+    from databricks_staging import LocalSqlEndpoint
+
+    endpoint = LocalSqlEndpoint()
+    cursor = endpoint.cursor()
+    # Adjacent literals: what the old '' escaping produced on the warehouse
+    cursor.execute("SELECT 'O''Brien'")
+    assert cursor.fetchone()[0] == 'OBrien'
+    endpoint.close()
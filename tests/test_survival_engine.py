@@ -0,0 +1,77 @@
+"""Kaplan-Meier curves and lifetimes against hand-computed values"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from survival_engine import DAYS_PER_MONTH, kaplan_meier, lifetime_summary, subscription_durations
+
+# Segment a: churns at 2, 3, 5 and 8 days, censored at 3 and 6.
+# Segment b: censored at 4 and 7 (never churns).
+OBSERVED = pd.DataFrame({
+    'duration_days': [2, 3, 3, 5, 6, 8, 4, 7],
+    'churned': [True, True, False, True, False, True, False, False],
+})
+KEYS = pd.Series(['a'] * 6 + ['b'] * 2, name='segment')
+
+
+def test_kaplan_meier_with_censoring():
+    curve = kaplan_meier(OBSERVED['duration_days'], OBSERVED['churned'], KEYS)
+    a = curve[curve['segment'] == 'a']
+
+    assert a['time_days'].tolist() == [2, 3, 5, 6, 8]
+    assert a['at_risk'].tolist() == [6, 5, 3, 2, 1]
+    assert a['churned'].tolist() == [1, 1, 1, 0, 1]
+    assert a['censored'].tolist() == [0, 1, 0, 1, 0]
+    # S(t) = prod(1 - d/n): 5/6, 5/6 * 4/5, 2/3 * 2/3, unchanged, 0
+    assert a['survival'].tolist() == pytest.approx([5 / 6, 2 / 3, 4 / 9, 4 / 9, 0.0])
+    # Greenwood: S(t) * sqrt(sum d / (n (n - d)))
+    assert a['std_error'].iloc[0] == pytest.approx(5 / 6 * math.sqrt(1 / 30))
+    assert a['std_error'].iloc[1] == pytest.approx(2 / 3 * math.sqrt(1 / 30 + 1 / 20))
+    assert np.isnan(a['std_error'].iloc[-1])
+
+    b = curve[curve['segment'] == 'b']
+    assert b['survival'].tolist() == [1.0, 1.0]
+
+
+def test_lifetime_summary():
+    summary = lifetime_summary(OBSERVED, KEYS, monthly_price=[30.0] * 8)
+
+    assert summary.attrs['horizon_days'] == 8
+    a, b = summary.loc['a'], summary.loc['b']
+    # First time S(t) <= 0.5
+    assert a['median_lifetime_days'] == 5
+    # Area under S(t) to day 8: 2 x 1 + 1 x 5/6 + 2 x 2/3 + 3 x 4/9
+    assert a['expected_lifetime_days'] == pytest.approx(5.5)
+    assert a['naive_lifetime_days'] == pytest.approx((2 + 3 + 5 + 8) / 4)
+    assert a['churn_per_month'] == pytest.approx(4 / (27 / DAYS_PER_MONTH))
+    assert a['clv'] == pytest.approx(5.5 / DAYS_PER_MONTH * 30.0)
+
+    # Never churns: median not reached, S(t) = 1 up to the horizon
+    assert np.isnan(b['median_lifetime_days'])
+    assert b['expected_lifetime_days'] == pytest.approx(8.0)
+    assert b['censored'] == 2
+
+
+def test_subscription_durations_censoring():
+    subscriptions = pd.DataFrame({
+        'subscription_id': ['S1', 'S2', 'S3', 'S4', 'S5'],
+        'start_date': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-15',
+                                      '2024-04-01', '2024-02-01']),
+        'end_date': pd.to_datetime(['2024-01-31', '2024-02-10', None, None, '2024-03-15']),
+    })
+    churn_events = pd.DataFrame({
+        'subscription_id': ['S1', 'S5'],
+        'churn_date': pd.to_datetime(['2024-01-31', '2024-03-15']),
+    })
+    observed = subscription_durations(subscriptions, churn_events, as_of='2024-03-01')
+
+    durations = observed['duration_days'].tolist()
+    # Churned; upgraded (censored at end_date); active (censored at as_of);
+    # not started yet; churned after as_of (censored at as_of)
+    assert durations[:3] == [30, 40, 46]
+    assert np.isnan(durations[3])
+    assert durations[4] == 29
+    assert observed['churned'].tolist() == [True, False, False, False, False]